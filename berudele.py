@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+"""The headless entry point of Berudele, which runs a transfer
+without a display and without importing PyQt5, e.g. from cron:
+
+    python -m berudele transfer sqlite_to_mysql --sqlite db.sqlite3 \
+        --user root --database shop --tables orders customers
+
+The password is read from --password or the MYSQL_PWD variable.
+Ctrl+C cancels a transfer after the current chunks, and SIGUSR1
+and SIGUSR2 pause and resume it where they exist.
+The transfers are measured on synthetic databases with:
+
+    python -m berudele benchmark --start-server --output result.json
+
+and the conversion in processes against the threads, without MySQL:
+
+    python -m berudele benchmark --conversion --processes 4 --workers 4
+"""
+
+import argparse
+import functools
+import json
+import os
+import signal
+import sys
+import threading
+from res.logic import benchmark as benchmark_module
+from res.logic import engine
+from res.logic import pool
+
+
+def parse_args(argv):
+    """Parses the command-line arguments, the options are the
+    same as the options of the transfer dialog.
+    """
+    parser = argparse.ArgumentParser(
+        prog='berudele',
+        description='Transfers tables from a SQLite database to '
+                    'a MySQL database and vice versa.'
+        )
+    commands = parser.add_subparsers(dest='command', required=True)
+    transfer = commands.add_parser('transfer', help='transfer tables')
+    transfer.add_argument('mode',
+                          choices=['sqlite_to_mysql', 'mysql_to_sqlite'])
+    transfer.add_argument('--sqlite', required=True,
+                          help='the SQLite database file')
+    transfer.add_argument('--host', default='localhost')
+    transfer.add_argument('--port', type=int, default=3306)
+    transfer.add_argument('--user', required=True)
+    transfer.add_argument('--password',
+                          default=os.environ.get('MYSQL_PWD', ''))
+    transfer.add_argument('--database', required=True)
+    transfer.add_argument('--tables', nargs='+', default=[],
+                          help='the tables to transfer, all by default')
+    transfer.add_argument('--where', action='append', default=[],
+                          metavar='TABLE=CONDITION',
+                          help='transfer only the rows of the table which '
+                               'match the condition, in the SQL of the '
+                               'source database')
+    transfer.add_argument('--columns', action='append', default=[],
+                          metavar='TABLE=COLUMN,...',
+                          help='transfer only these columns of the table '
+                               'and its primary key')
+    transfer.add_argument('--chunk', type=int, default=0,
+                          help='chunk reading/writing SQL records, '
+                               '0 adjusts it to each table')
+    transfer.add_argument('--without-foreign-keys', action='store_true',
+                          help='do not transfer foreign keys')
+    transfer.add_argument('--rowid', action='store_true',
+                          help='transfer rowid columns')
+    transfer.add_argument('--integer-type', default='INT(11)',
+                          help='MySQL default integer field type')
+    transfer.add_argument('--string-type', default='VARCHAR(255)',
+                          help='MySQL default string field type')
+    transfer.add_argument('--full-text', action='store_true',
+                          help='use FULLTEXT indexes on TEXT columns')
+    transfer.add_argument('--bulk', action='store_true',
+                          help='load the rows into MySQL with '
+                               'LOAD DATA LOCAL INFILE')
+    transfer.add_argument('--defer-keys', action='store_true',
+                          help='create the MySQL indexes and foreign keys '
+                               'after the rows')
+    transfer.add_argument('--vacuum', action='store_true',
+                          help='vacuum the SQLite database at the end')
+    transfer.add_argument('--fast-load', action='store_true',
+                          help='write SQLite without fsyncs and create '
+                               'the indexes after the rows')
+    transfer.add_argument('--buffered', action='store_true',
+                          help='use MySQLCursorBuffered for reading MySQL')
+    transfer.add_argument('--log', default='', help='the log file')
+    transfer.add_argument('--workers', type=int, default=1,
+                          help='the number of parallel workers')
+    transfer.add_argument('--ranges', type=int, default=1,
+                          help='the key ranges of the --split tables')
+    transfer.add_argument('--split', nargs='+', default=[],
+                          help='the tables to split into key ranges')
+    transfer.add_argument('--queue-depth', type=int,
+                          default=engine.QUEUE_DEPTH,
+                          help='the chunks which are read ahead while the '
+                               'previous chunk is written, 0 reads and '
+                               'writes them in turn')
+    transfer.add_argument('--processes', type=int, default=0,
+                          help='convert the chunks in this many worker '
+                               'processes, 0 converts them in the workers')
+    transfer.add_argument('--incremental', action='store_true',
+                          help='copy only the rows beyond the last '
+                               'watermark of each table')
+    transfer.add_argument('--restart', action='store_true',
+                          help='copy the tables from the start instead of '
+                               'resuming an interrupted transfer')
+    transfer.add_argument('--verify', action='store_true',
+                          help='compare the checksums of the copied tables '
+                               'in both databases')
+    transfer.add_argument('--profile', action='store_true',
+                          help='time the stages of every table and write '
+                               'a Chrome trace and a summary next to the '
+                               'log file')
+    transfer.add_argument('--cprofile', action='store_true',
+                          help='run cProfile in the workers as well')
+    transfer.add_argument('--snapshot', action='store_true',
+                          help='read all the MySQL tables in one '
+                               'consistent snapshot (mysql_to_sqlite)')
+    transfer.add_argument('--max-rows-per-second', type=int, default=0,
+                          help='the rows per second of all the workers, '
+                               '0 for no limit')
+    transfer.add_argument('--max-mb-per-second', type=float, default=0,
+                          help='the megabytes per second of all the '
+                               'workers, 0 for no limit')
+    transfer.add_argument('--max-lag', type=int, default=0,
+                          help='hold the workers while the replication lag '
+                               'of the MySQL server is above the seconds')
+    transfer.add_argument('--max-threads-running', type=int, default=0,
+                          help='hold the workers while the MySQL server '
+                               'runs more threads')
+    transfer.add_argument('--metrics-port', type=int, default=0,
+                          help='serve Prometheus metrics of the transfer '
+                               'on this port')
+    transfer.add_argument('--metrics-host', default='127.0.0.1',
+                          help='the address of the metrics endpoint')
+    transfer.add_argument('--metrics-file',
+                          help='write Prometheus metrics of the transfer to '
+                               'this file, e.g. for the textfile collector '
+                               'of node_exporter')
+    transfer.add_argument('--interval', type=float, default=10,
+                          help='seconds between two progress reports, '
+                               '0 disables them')
+    benchmark = commands.add_parser(
+        'benchmark',
+        help='measure the transfers of a synthetic database'
+        )
+    benchmark.add_argument('--start-server', action='store_true',
+                           help='start a temporary MySQL or MariaDB server')
+    benchmark.add_argument('--mysqld', default='',
+                           help='the server of --start-server, mariadbd or '
+                                'mysqld in PATH by default')
+    benchmark.add_argument('--host', default='localhost')
+    benchmark.add_argument('--port', type=int, default=3306)
+    benchmark.add_argument('--user', default='root')
+    benchmark.add_argument('--password',
+                           default=os.environ.get('MYSQL_PWD', ''))
+    benchmark.add_argument('--database', default='berudele_benchmark',
+                           help='the MySQL database, it is dropped and '
+                                'created before every run')
+    shape = benchmark_module.DEFAULT_SHAPE
+    benchmark.add_argument('--tables', type=int, default=shape['tables'],
+                           help='the tables of the synthetic database')
+    benchmark.add_argument('--rows', type=int, default=shape['rows'],
+                           help='the rows of every table')
+    benchmark.add_argument('--integers', type=int,
+                           default=shape['integers'],
+                           help='the INTEGER columns of every table')
+    benchmark.add_argument('--reals', type=int, default=shape['reals'],
+                           help='the REAL columns of every table')
+    benchmark.add_argument('--texts', type=int, default=shape['texts'],
+                           help='the VARCHAR columns of every table')
+    benchmark.add_argument('--text-width', type=int,
+                           default=shape['text_width'],
+                           help='the characters of the VARCHAR values')
+    benchmark.add_argument('--blobs', type=int, default=shape['blobs'],
+                           help='the BLOB columns of every table')
+    benchmark.add_argument('--blob-width', type=int,
+                           default=shape['blob_width'],
+                           help='the bytes of the BLOB values')
+    benchmark.add_argument('--indexes', type=int, default=shape['indexes'],
+                           help='the secondary indexes of every table')
+    benchmark.add_argument('--seed', type=int, default=shape['seed'],
+                           help='the seed of the random values')
+    benchmark.add_argument('--repeat', type=int, default=1,
+                           help='the runs of each direction')
+    benchmark.add_argument('--chunk', type=int, default=0)
+    benchmark.add_argument('--workers', type=int, default=1)
+    benchmark.add_argument('--queue-depth', type=int,
+                           default=engine.QUEUE_DEPTH)
+    benchmark.add_argument('--processes', type=int, default=0,
+                           help='the conversion processes, 0 converts '
+                                'the chunks in the workers')
+    benchmark.add_argument('--conversion', action='store_true',
+                           help='compare converting the chunks in the '
+                                'workers and in --processes processes '
+                                '(all the cores by default) instead of '
+                                'transferring them')
+    benchmark.add_argument('--bulk', action='store_true')
+    benchmark.add_argument('--defer-keys', action='store_true')
+    benchmark.add_argument('--fast-load', action='store_true')
+    benchmark.add_argument('--output', default='',
+                           help='the JSON file of the result, '
+                                'standard output by default')
+    return parser.parse_args(argv)
+
+
+def table_options(options):
+    """Parses the TABLE=VALUE options into a dictionary."""
+    result = {}
+    for option in options:
+        table, separator, value = option.partition('=')
+        if separator == '' or table.strip() == '':
+            raise ValueError('Expected TABLE=VALUE instead of {}.'.format(
+                option))
+        result[table.strip()] = value.strip()
+    return result
+
+
+def get_info(args):
+    """Builds the dictionary of the transfer options,
+    the same dictionary which transfer_thread collects.
+    """
+    info = {
+        'full_text': args.full_text,
+        'chunk': args.chunk,
+        'foreign': args.without_foreign_keys,
+        'rowid': args.rowid,
+        'log': args.log,
+        'integer': args.integer_type,
+        'string': args.string_type,
+        'tables': args.tables,
+        'vacuum': args.vacuum,
+        'mode': args.mode,
+        'username': args.user,
+        'password': args.password,
+        'database': args.database,
+        'host': args.host,
+        'port': args.port,
+        'sqlite_database': args.sqlite,
+        'buffered': args.buffered,
+        'workers': args.workers,
+        'ranges': args.ranges,
+        'split': args.split,
+        'queue': args.queue_depth,
+        'processes': args.processes,
+        'max_rows_rate': args.max_rows_per_second,
+        'max_bytes_rate': args.max_mb_per_second * 1048576,
+        'max_lag': args.max_lag,
+        'max_threads': args.max_threads_running,
+        'metrics_port': args.metrics_port,
+        'metrics_host': args.metrics_host,
+        'metrics_file': args.metrics_file,
+        'incremental': args.incremental,
+        'resume': not args.restart,
+        'bulk': args.bulk,
+        'fast_load': args.fast_load,
+        'defer_keys': args.defer_keys,
+        'verify': args.verify,
+        'profile': args.profile,
+        'cprofile': args.cprofile,
+        'snapshot': args.snapshot,
+        'filters': table_options(args.where),
+        'columns': dict(map(
+            lambda item: (item[0], list(map(str.strip, item[1].split(',')))),
+            table_options(args.columns).items()))
+        }
+    if info['tables'] == []:
+        info['tables'] = engine.list_tables(info)
+    return info
+
+
+def report(progress, stopped, interval):
+    """Prints the progress of the whole transfer and of the tables
+    every `interval` seconds until the stopped event is set.
+    """
+    while not stopped.wait(interval):
+        tables = progress.snapshot()
+        overall = progress.overall(tables)
+        print('Total: {}/{} rows, {:.0f} rows/s, remaining {}'.format(
+            overall['written'],
+            overall['total'],
+            overall['rate'],
+            engine.format_seconds(overall['remaining'])
+            ), file=sys.stderr)
+        for stats in tables:
+            if stats['finished'] is not None:
+                continue
+            print('{}: {}/{} rows, {:.0f} rows/s, remaining {}'.format(
+                stats['table'],
+                stats['written'],
+                stats['total'],
+                stats['rate'],
+                engine.format_seconds(stats['remaining'])
+                ), file=sys.stderr)
+
+
+def table_done(progress, table, error):
+    """Prints the result of a table and the duration of its phases."""
+    if error is not None:
+        print('{}: {}'.format(table, error), file=sys.stderr)
+        return
+    for stats in progress.snapshot():
+        if stats['table'] == table:
+            phases = map(
+                lambda name: '{} {}'.format(
+                    name, engine.format_seconds(stats['phases'][name])),
+                stats['phases']
+                )
+            print('{}: transferred ({})'.format(table, ', '.join(phases)),
+                  file=sys.stderr)
+
+
+def transfer(args):
+    """Runs a transfer and returns the exit status."""
+    try:
+        info = get_info(args)
+    except Exception as error:
+        print(error, file=sys.stderr)
+        return 1
+    if info['tables'] == []:
+        print('There is no table to transfer.', file=sys.stderr)
+        return 1
+    # The planning and the index creation borrow
+    # one more connection besides the workers.
+    info['pool'] = pool.ConnectionPool(
+        lambda: engine.connect_mysql(info),
+        info['workers'] + 1
+        )
+    progress = engine.Progress()
+    control = engine.Control(info['max_rows_rate'], info['max_bytes_rate'])
+    signal.signal(signal.SIGINT, lambda number, frame: control.cancel())
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda number, frame: control.pause())
+        signal.signal(signal.SIGUSR2, lambda number, frame: control.resume())
+    stopped = threading.Event()
+    if args.interval > 0:
+        reporter = threading.Thread(
+            target=report,
+            args=(progress, stopped, args.interval),
+            daemon=True
+            )
+        reporter.start()
+    try:
+        engine.transfer(info, functools.partial(table_done, progress),
+                        progress, control)
+    except engine.Cancelled as error:
+        print(error, file=sys.stderr)
+        return 130
+    except Exception as error:
+        print(error, file=sys.stderr)
+        return 1
+    finally:
+        stopped.set()
+        info['pool'].close()
+    print('Successful transferring!', file=sys.stderr)
+    return 0
+
+
+def benchmark(args):
+    """Runs the benchmark and writes its JSON result."""
+    shape = dict(map(lambda name: (name, getattr(args, name)),
+                     benchmark_module.DEFAULT_SHAPE))
+    info = {
+        'full_text': False,
+        'chunk': args.chunk,
+        'foreign': False,
+        'rowid': False,
+        'log': '',
+        'integer': 'INT(11)',
+        'string': 'VARCHAR(255)',
+        'vacuum': False,
+        'username': args.user,
+        'password': args.password,
+        'database': args.database,
+        'host': args.host,
+        'port': args.port,
+        'buffered': False,
+        'workers': args.workers,
+        'ranges': 1,
+        'split': [],
+        'queue': args.queue_depth,
+        'processes': args.processes,
+        'incremental': False,
+        'resume': False,
+        'bulk': args.bulk,
+        'fast_load': args.fast_load,
+        'defer_keys': args.defer_keys
+        }
+    try:
+        if args.conversion:
+            result = benchmark_module.run_conversion_benchmark(
+                shape, max(args.workers, 1),
+                args.processes or os.cpu_count())
+        elif args.start_server:
+            with benchmark_module.MySQLServer(args.mysqld) as server:
+                info.update({'host': '127.0.0.1', 'port': server.port,
+                             'username': 'root', 'password': ''})
+                result = benchmark_module.run_benchmark(
+                    info, shape, max(args.repeat, 1))
+        else:
+            result = benchmark_module.run_benchmark(
+                info, shape, max(args.repeat, 1))
+    except Exception as error:
+        print(error, file=sys.stderr)
+        return 1
+    output = json.dumps(result, indent=1, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'transfer':
+        return transfer(args)
+    if args.command == 'benchmark':
+        return benchmark(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
 
 from PyQt5 import QtCore, QtGui, QtWidgets
-import mysql.connector
+import functools
 import sqlite3
 import os
-from res.logic.transfer import run_transfer
 from res.logic import messages
 from res.pyui import main_ui
 
@@ -93,8 +92,8 @@ def connect_to_mysql(dialog, self):
         clicked signal of connect_pushButton.
 
     Signals:
-        connected: After a successful connection,
-          this signal emits a list with two objects: [conn, cur].
+        connected: After a successful connection, this signal
+          emits the pool of the MySQL connections.
         error: When an error occurred during connection to the server,
           this signal is emitted.
     """
@@ -111,11 +110,14 @@ def connect_to_mysql(dialog, self):
         'password': password,
         'database': database
         }
-    self.mysql_thread = ConnectToMySQL(self.mysql_information)
+    self.mysql_thread = ConnectToMySQL(
+        self.mysql_information,
+        self.pool_spinBox.value()
+        )
     self.mysql_thread.start()
     self.mysql_thread.connected.connect(
-        lambda conn_cur:
-        connected_to_mysql(dialog, self, conn_cur)
+        lambda mysql_pool:
+        connected_to_mysql(dialog, self, mysql_pool)
         )
     self.mysql_thread.error.connect(
         lambda error: mysql_error_handler(dialog, self, error)
@@ -132,18 +134,21 @@ def mysql_error_handler(dialog, self, error):
     messages.error(dialog, 'Error...', error)
 
 
-def connected_to_mysql(dialog, self, conn_cur):
+def connected_to_mysql(dialog, self, mysql_pool):
     """This function runs when a successful
     MySQL database connection is established.
     Then calls the connect_to_sqlite function,
     in order to validate the SQLite database.
+    The table list, the previews and the transfers
+    borrow their MySQL connections from self.mysql_pool.
 
     Connected to:
         The connected signal of the self.mysql_thread instance.
     """
     self.connect_pushButton.setDisabled(False)
-    self.mysql_conn = conn_cur[0]
-    self.mysql_cur = conn_cur[1]
+    if getattr(self, 'mysql_pool', None) is not None:
+        self.mysql_pool.close()
+    self.mysql_pool = mysql_pool
     connect_to_sqlite(dialog, self)
 
 
@@ -152,11 +157,13 @@ def connect_to_sqlite(dialog, self):
     MySQL database connection is established.
     Then validates the SQLite database, after a successful
     validation, the main dialog will be disappeared and the
-    transfer dialog will be opened.
+    transfer dialog will be opened. The transfer dialog
+    is imported on first use, so it doesn't slow down the startup.
 
     Connected to:
         connected_to_mysql function.
     """
+    from res.logic.transfer import run_transfer
     self.sqlite_database = self.sqlite_lineEdit.text()
     valid_sqlite_database = check_sqlite(self.sqlite_database)
     if valid_sqlite_database:
@@ -198,44 +205,48 @@ def check_sqlite(sqlite_database):
 
 
 class ConnectToMySQL(QtCore.QThread):
-    """A sub-class of the QThread class which establishes
-    a MySQL connection, as connecting to a remote server
-    might be a slow process, I used a thread to handle it
-    and prevent the GUI to freeze.
+    """A sub-class of the QThread class which creates the pool of
+    the MySQL connections and validates it by opening the first
+    connection, as connecting to a remote server might be a slow
+    process, I used a thread to handle it and prevent the GUI
+    to freeze.
+
+    Args:
+        mysql_information: The host, port, username, password and
+          database of the MySQL server.
+        size: The maximum number of open connections of the pool.
 
     Signals:
         connected: When a successful connection is established.
-          Emits a list with two objects: [conn, cur].
+          Emits the ConnectionPool instance.
         error: Emits an error string when the connecting process
           is failed.
     """
-    connected = QtCore.pyqtSignal(list)
+    connected = QtCore.pyqtSignal(object)
     error = QtCore.pyqtSignal(str)
 
-    def __init__(self, mysql_information):
+    def __init__(self, mysql_information, size):
         super().__init__()
-        self.host = mysql_information['host']
-        self.port = int(mysql_information['port'])
-        self.username = mysql_information['username']
-        self.password = mysql_information['password']
-        self.database = mysql_information['database']
+        self.mysql_information = mysql_information
+        self.size = size
         self.timeout = 5
-        self.conn = ''
 
     def run(self):
+        from res.logic import engine
+        from res.logic import pool
         try:
-            self.conn = mysql.connector.connect(
-                host=self.host,
-                port=self.port,
-                user=self.username,
-                password=self.password,
-                database=self.database,
+            connect = functools.partial(
+                engine.connect_mysql,
+                self.mysql_information,
                 connection_timeout=self.timeout
                 )
-            if self.conn.is_connected():
-                self.cur = self.conn.cursor()
-                self.connected.emit([self.conn, self.cur])
+            mysql_pool = pool.ConnectionPool(connect, self.size)
+            with mysql_pool.connection() as conn:
+                connected = conn.is_connected()
+            if connected:
+                self.connected.emit(mysql_pool)
             else:
+                mysql_pool.close()
                 self.error.emit("Can't connect to the database!")
         except Exception as error:
             self.error.emit(str(error))
@@ -243,10 +254,20 @@ class ConnectToMySQL(QtCore.QThread):
 
 if __name__ == "__main__":
     import sys
+    import time
+    profile_startup = '--profile-startup' in sys.argv
+    if profile_startup:
+        from res.logic import startup
+        sys.argv.remove('--profile-startup')
+        startup.print_imports(startup.profile_imports('main'))
+        started = time.perf_counter()
     app = QtWidgets.QApplication(sys.argv)
     main_win = QtWidgets.QMainWindow()
     ui = main_ui.Ui_main_win()
     ui.setupUi(main_win)
     init(main_win, ui)
     main_win.show()
+    if profile_startup:
+        elapsed = (time.perf_counter() - started) * 1000
+        print('Main window shown in {:.1f} ms'.format(elapsed))
     sys.exit(app.exec_())
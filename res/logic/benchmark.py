@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""Measures the transfers on synthetic databases, so the effect of a
+change to the chunks, the pragmas or the connector settings can be
+compared between commits. Every run happens in a fresh process, so
+its peak memory and its schema cache aren't inherited from the
+previous runs.
+"""
+
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from res.logic import conversion
+from res.logic import engine
+from res.logic import startup
+
+# The default shape of the synthetic SQLite database.
+DEFAULT_SHAPE = {
+    'tables': 4,
+    'rows': 100000,
+    'integers': 3,
+    'reals': 1,
+    'texts': 2,
+    'text_width': 32,
+    'blobs': 1,
+    'blob_width': 256,
+    'indexes': 2,
+    'seed': 1
+    }
+
+# Seconds to wait for a started MySQL server to accept connections.
+SERVER_TIMEOUT = 60
+
+# The rows which are inserted at once into the synthetic database.
+GENERATE_CHUNK = 10000
+
+# The chunk sizes of the conversion benchmark.
+CONVERSION_CHUNKS = (100, 1000, 5000, 20000)
+
+
+def table_columns(shape):
+    """Returns the (name, type) columns of the synthetic tables,
+    besides their integer primary key.
+    """
+    columns = []
+    for kind, column_type in (('integers', 'INTEGER'), ('reals', 'REAL'),
+                              ('texts', 'VARCHAR({})'), ('blobs', 'BLOB')):
+        for number in range(shape[kind]):
+            name = '{}{}'.format(kind[0], number)
+            columns.append((name, column_type.format(shape['text_width'])))
+    return columns
+
+
+def generate_rows(shape, columns, generator):
+    for key in range(1, shape['rows'] + 1):
+        row = [key]
+        for name, column_type in columns:
+            if column_type == 'INTEGER':
+                row.append(generator.randrange(-2 ** 31, 2 ** 31))
+            elif column_type == 'REAL':
+                row.append(generator.random() * 1000000)
+            elif column_type == 'BLOB':
+                row.append(bytes(generator.getrandbits(8)
+                                 for byte in range(shape['blob_width'])))
+            else:
+                row.append(''.join(generator.choice(
+                    'abcdefghijklmnopqrstuvwxyz ')
+                    for letter in range(shape['text_width'])))
+        yield row
+
+
+def generate_database(path, shape):
+    """Creates a SQLite database of `shape['tables']` tables of
+    `shape['rows']` rows each, with the given numbers of INTEGER,
+    REAL, VARCHAR and BLOB columns and secondary indexes. The rows
+    depend only on the shape, so two runs generate the same file.
+
+    Args:
+        path: The path of the database, an existing file is replaced.
+        shape: A dictionary of the keys of DEFAULT_SHAPE.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    generator = random.Random(shape['seed'])
+    columns = table_columns(shape)
+    conn = sqlite3.connect(path)
+    try:
+        for number in range(shape['tables']):
+            table = 'table{}'.format(number)
+            definitions = map(lambda column: '"{}" {}'.format(*column),
+                              columns)
+            conn.execute('CREATE TABLE "{}" (id INTEGER PRIMARY KEY, {});'
+                         .format(table, ', '.join(definitions)))
+            indexed = list(filter(lambda column: column[1] != 'BLOB',
+                                  columns))
+            for name, column_type in indexed[:shape['indexes']]:
+                conn.execute('CREATE INDEX "{0}_{1}" ON "{0}" ("{1}");'
+                             .format(table, name))
+            sql = 'INSERT INTO "{}" VALUES ({});'.format(
+                table, ', '.join(['?'] * (len(columns) + 1)))
+            rows = generate_rows(shape, columns, generator)
+            while True:
+                chunk = [row for _, row in zip(range(GENERATE_CHUNK), rows)]
+                if chunk == []:
+                    break
+                conn.executemany(sql, chunk)
+            conn.commit()
+    finally:
+        conn.close()
+
+
+class MySQLServer:
+    """A throwaway MySQL or MariaDB server in a temporary directory,
+    which listens on a free local port and has a root user without
+    a password. It's used as a context manager.
+
+    Args:
+        mysqld: The path of mysqld or mariadbd,
+          it's looked up in PATH if empty.
+    """
+
+    def __init__(self, mysqld=''):
+        self.mysqld = mysqld or shutil.which('mariadbd') or \
+            shutil.which('mysqld')
+        if self.mysqld is None:
+            raise RuntimeError('Neither mariadbd nor mysqld is found.')
+        self.directory = None
+        self.process = None
+        self.port = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exception):
+        self.stop()
+
+    def start(self):
+        self.directory = tempfile.mkdtemp(prefix='berudele-mysql-')
+        data = os.path.join(self.directory, 'data')
+        version = subprocess.run([self.mysqld, '--version'],
+                                 capture_output=True, text=True).stdout
+        if 'mariadb' in version.lower():
+            install = shutil.which('mariadb-install-db') or \
+                shutil.which('mysql_install_db')
+            command = [install, '--no-defaults', '--datadir=' + data,
+                       '--auth-root-authentication-method=normal']
+        else:
+            command = [self.mysqld, '--no-defaults',
+                       '--initialize-insecure', '--datadir=' + data]
+        subprocess.run(command, check=True, capture_output=True)
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        self.process = subprocess.Popen(
+            [self.mysqld, '--no-defaults',
+             '--datadir=' + data,
+             '--port={}'.format(self.port),
+             '--bind-address=127.0.0.1',
+             '--socket=' + os.path.join(self.directory, 'mysql.sock'),
+             '--pid-file=' + os.path.join(self.directory, 'mysql.pid'),
+             '--log-error=' + os.path.join(self.directory, 'error.log'),
+             '--local-infile=1'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+            )
+        deadline = time.monotonic() + SERVER_TIMEOUT
+        while True:
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), 1):
+                    break
+            except OSError:
+                if self.process.poll() is not None or \
+                        time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError('The MySQL server did not start.')
+                time.sleep(0.5)
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(SERVER_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+
+def reset_database(info):
+    """Drops and creates the MySQL database of the benchmark."""
+    target = dict(info, database=None)
+    conn = engine.connect_mysql(target)
+    try:
+        cur = conn.cursor()
+        cur.execute('DROP DATABASE IF EXISTS `{}`;'.format(info['database']))
+        cur.execute('CREATE DATABASE `{}` CHARACTER SET utf8mb4;'
+                    .format(info['database']))
+        cur.execute('SELECT VERSION();')
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def peak_rss():
+    """Returns the peak resident memory of this process in bytes,
+    or None where the resource module is missing (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak
+    return peak * 1024
+
+
+def run_transfer(info):
+    """Runs one transfer and returns its measurements, it's called
+    in a fresh process by measure.
+    """
+    from res.logic import pool
+    info['pool'] = pool.ConnectionPool(
+        lambda: engine.connect_mysql(info),
+        info['workers'] + 1
+        )
+    progress = engine.Progress()
+    started = time.monotonic()
+    try:
+        info['tables'] = engine.list_tables(info)
+        engine.transfer(info, None, progress)
+    finally:
+        info['pool'].close()
+    seconds = time.monotonic() - started
+    tables = progress.snapshot()
+    rows = sum(map(lambda stats: stats['written'], tables))
+    size = sum(map(lambda stats: stats['bytes'], tables))
+    return {
+        'mode': info['mode'],
+        'seconds': seconds,
+        'rows': rows,
+        'bytes': size,
+        'rows_per_second': rows / seconds if seconds else 0,
+        'megabytes_per_second': size / 1048576 / seconds if seconds else 0,
+        'peak_rss': peak_rss(),
+        'phases': dict(map(lambda stats: (stats['table'], stats['phases']),
+                           tables))
+        }
+
+
+def measure(info):
+    """Runs run_transfer in a new interpreter and returns its result."""
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_transfer, info).result()
+
+
+def git_commit():
+    """Returns the checked-out commit of Berudele, or None."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                                cwd=startup.ROOT, capture_output=True,
+                                text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmark(info, shape, repeat=1):
+    """Generates a SQLite database of the shape, transfers it into
+    the MySQL database of `info` and back into a new SQLite database
+    `repeat` times, the MySQL database is dropped before every run.
+
+    Args:
+        info: The dictionary of the transfer options, without
+          `mode`, `sqlite_database` and `tables`.
+        shape: A dictionary of the keys of DEFAULT_SHAPE.
+        repeat: The number of the runs of each direction.
+
+    Returns:
+        A dictionary which can be dumped as JSON, with the commit,
+        the versions, the shape, the options and a list of the runs.
+        Each run has its mode, seconds, rows, bytes, rows_per_second,
+        megabytes_per_second, peak_rss (bytes) and the phases of
+        every table.
+    """
+    directory = tempfile.mkdtemp(prefix='berudele-benchmark-')
+    try:
+        source = os.path.join(directory, 'source.sqlite3')
+        target = os.path.join(directory, 'target.sqlite3')
+        generate_database(source, shape)
+        runs = []
+        server = None
+        for number in range(repeat):
+            server = reset_database(info)
+            runs.append(measure(dict(info, mode='sqlite_to_mysql',
+                                     sqlite_database=source)))
+            if os.path.exists(target):
+                os.remove(target)
+            runs.append(measure(dict(info, mode='mysql_to_sqlite',
+                                     sqlite_database=target)))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    options = dict(info)
+    options.pop('password', None)
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'server': server,
+        'shape': shape,
+        'options': options,
+        'runs': runs
+        }
+
+
+def raw_rows(shape):
+    """Returns the rows of a synthetic table of the shape as the raw
+    bytes which the MySQL connector reads, and the converters of their
+    columns, see engine.column_converters.
+    """
+    columns = table_columns(shape)
+    converters = [engine.decode_integer]
+    for name, column_type in columns:
+        if column_type == 'INTEGER':
+            converters.append(engine.decode_integer)
+        elif column_type == 'REAL':
+            converters.append(engine.decode_real)
+        elif column_type == 'BLOB':
+            converters.append(None)
+        else:
+            converters.append(engine.decode_text)
+    rows = []
+    for row in generate_rows(shape, columns, random.Random(shape['seed'])):
+        rows.append(tuple(map(
+            lambda value: value if isinstance(value, bytes)
+            else str(value).encode(), row)))
+    return rows, converters
+
+
+def conversion_rate(rows, converters, chunk, workers, processes=0):
+    """Converts the rows in chunks of `chunk` rows by `workers`
+    threads, like the workers of a transfer, either in the threads
+    or in a conversion.ConversionPool of `processes` processes.
+
+    Returns:
+        The converted rows per second, without starting the processes.
+    """
+    function = functools.partial(engine.encode_rows, converters=converters)
+    chunks = list(map(lambda start: rows[start:start + chunk],
+                      range(0, len(rows), chunk)))
+    processes = conversion.ConversionPool(processes) if processes else None
+
+    def convert(rows):
+        if processes is None:
+            return function(rows)
+        return processes.result(processes.submit(function, rows))
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            if processes is not None:
+                # Starts the processes before the clock.
+                list(executor.map(convert, chunks[:workers]))
+            started = time.perf_counter()
+            list(executor.map(convert, chunks))
+            seconds = time.perf_counter() - started
+    finally:
+        if processes is not None:
+            processes.close()
+    return len(rows) / seconds if seconds else 0
+
+
+def run_conversion_benchmark(shape, workers, processes):
+    """Compares converting the raw MySQL rows of one synthetic table
+    in the threads of the workers and in a pool of processes, for
+    every chunk size of CONVERSION_CHUNKS. The processes only win
+    once the chunks are large enough to outweigh pickling them
+    through the shared memory, and only with free cores.
+
+    Returns:
+        A dictionary which can be dumped as JSON, with the commit, the
+        cores, the shape, the runs of every chunk with the rows per
+        second of both paths, and the crossover, the smallest chunk
+        from which the processes are faster, or None.
+    """
+    rows, converters = raw_rows(shape)
+    runs = []
+    crossover = None
+    for chunk in CONVERSION_CHUNKS:
+        threads = conversion_rate(rows, converters, chunk, workers)
+        pool = conversion_rate(rows, converters, chunk, workers, processes)
+        runs.append({'chunk': chunk, 'threads_rows_per_second': threads,
+                     'processes_rows_per_second': pool})
+        if pool > threads and crossover is None:
+            crossover = chunk
+        elif pool <= threads:
+            crossover = None
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'cores': os.cpu_count(),
+        'shape': shape,
+        'workers': workers,
+        'processes': processes,
+        'runs': runs,
+        'crossover': crossover
+        }
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Converts the chunks of a transfer in worker processes, so encoding
+and decoding the rows isn't bound to the one core of the interpreter
+lock. A chunk is pickled into a shared memory buffer, which the worker
+converts into another buffer for the writer, only the names of the
+buffers pass through the pipes of the pool.
+"""
+
+import concurrent.futures
+import multiprocessing
+import pickle
+import threading
+from multiprocessing import shared_memory
+
+
+def share(value):
+    """Pickles a value into a new shared memory buffer.
+
+    Returns:
+        The name and the size of the buffer, which is
+        removed by the process that takes it.
+    """
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    memory = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    try:
+        memory.buf[:len(data)] = data
+    finally:
+        memory.close()
+    return memory.name, len(data)
+
+
+def take(name, size):
+    """Unpickles the value of a shared memory buffer and removes it."""
+    memory = shared_memory.SharedMemory(name)
+    try:
+        return pickle.loads(memory.buf[:size])
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def convert(name, size, function, args):
+    """Converts the rows of a buffer in a worker process,
+    returns the buffer of the result, see share.
+    """
+    return share(function(take(name, size), *args))
+
+
+class ConversionPool:
+    """A pool of worker processes which convert the chunks of all the
+    workers of a transfer. The processes are spawned, so they don't
+    inherit the threads and the connections of the transfer.
+
+    Args:
+        processes: The number of the worker processes.
+
+    Methods:
+        submit: Starts converting a chunk, returns a future.
+        result: Waits for the rows of a future.
+        close: Stops the processes and removes the buffers of
+          the results which aren't taken.
+    """
+
+    def __init__(self, processes):
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn')
+            )
+        self.lock = threading.Lock()
+        self.pending = set()
+
+    def submit(self, function, rows, *args):
+        """Converts `rows` by `function(rows, *args)` in a worker
+        process, the function must be importable by the workers.
+        """
+        name, size = share(rows)
+        try:
+            future = self.executor.submit(convert, name, size, function,
+                                          args)
+        except Exception:
+            take(name, size)
+            raise
+        with self.lock:
+            self.pending.add(future)
+        return future
+
+    def result(self, future):
+        with self.lock:
+            self.pending.discard(future)
+        return take(*future.result())
+
+    def close(self):
+        with self.lock:
+            pending = list(self.pending)
+            self.pending.clear()
+        for future in pending:
+            try:
+                take(*future.result())
+            except Exception:
+                pass
+        self.executor.shutdown()
@@ -0,0 +1,2028 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import contextlib
+import datetime
+import decimal
+import functools
+import logging
+import math
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from res.logic import schema
+from res.logic import state
+from res.logic import verify
+
+# mysql.connector and the converters are imported on first use inside
+# the functions, they take most of the startup time of the GUI.
+
+# The bounds of the automatic chunk size, which is used when the
+# chunk option is zero. Every table starts with PROBE_CHUNK rows
+# and the chunk is doubled while the throughput improves.
+PROBE_CHUNK = 1000
+MIN_CHUNK = 100
+MAX_CHUNK = 200000
+
+# Bytes that the chunks of the automatic size may take, per worker,
+# together with the chunks which are read ahead.
+CHUNK_MEMORY = 32 * 1048576
+
+# Seconds that a chunk of the automatic size should take at most,
+# so the progress and the checkpoints stay fresh.
+CHUNK_SECONDS = 5
+
+# The integer column types which can be split into key ranges.
+INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'integer',
+                 'bigint')
+
+# The MySQL column types which are converted into floats and the ones
+# whose raw bytes are inserted into SQLite as they are, see
+# column_converters, the decimals are decoded as text, which their
+# NUMERIC affinity converts. The verification compares them the same
+# way, see verify.Side.
+REAL_TYPES = ('float', 'double', 'real')
+DECIMAL_TYPES = ('decimal', 'numeric')
+BINARY_TYPES = ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob',
+                'longblob', 'bit', 'geometry', 'point', 'linestring',
+                'polygon', 'multipoint', 'multilinestring', 'multipolygon',
+                'geometrycollection')
+
+# The columns which are used as the watermark of the incremental
+# transfers before the auto-increment keys, they also catch the
+# updated rows.
+WATERMARK_COLUMNS = ('updated_at', 'modified_at', 'last_modified')
+
+# The MySQL column types of the timestamp watermarks.
+TIME_TYPES = ('date', 'datetime', 'timestamp')
+
+# The chunks which are read ahead by default while the previous
+# chunk is being written, see prefetch.
+QUEUE_DEPTH = 2
+
+# Seconds between two checks of the reader of prefetch
+# whether the writer has stopped, while the queue is full.
+QUEUE_TIMEOUT = 0.1
+
+# Seconds that a worker waits for the lock of the SQLite database,
+# as the workers write into the same SQLite file.
+SQLITE_TIMEOUT = 300
+
+# The values which are written into the files of the bulk mode,
+# the chunks with other values (e.g. BLOBs) are inserted.
+BULK_TYPES = (int, float, str, decimal.Decimal, datetime.date,
+              datetime.time)
+
+# The escapes of the files of the bulk mode, the defaults of
+# `LOAD DATA`: tab-separated fields and `\N` for NULL.
+BULK_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\0': '\\0'
+    })
+
+# The pragmas of the connections which write into SQLite in the fast
+# load mode, a crash in the middle of a transfer may corrupt the file.
+# They only last as long as the connections of the workers.
+FAST_LOAD_PRAGMAS = (
+    'PRAGMA journal_mode = MEMORY;',
+    'PRAGMA synchronous = OFF;',
+    'PRAGMA cache_size = -262144;',
+    'PRAGMA mmap_size = 1073741824;',
+    'PRAGMA temp_store = MEMORY;'
+    )
+
+# The MySQL errors which mean `LOAD DATA LOCAL INFILE` is disabled
+# on the server or on the client, the rows are inserted instead.
+LOCAL_INFILE_ERRORS = (1148, 2068, 3948)
+
+# The MySQL errors which mean the user may not take the global read
+# lock of a snapshot, the tables are read through one connection.
+LOCK_ERRORS = (1044, 1045, 1227)
+
+# Seconds that `FLUSH TABLES WITH READ LOCK` waits for the running
+# statements, the writes of the server wait for it in the meantime.
+SNAPSHOT_LOCK_TIMEOUT = 10
+
+# Seconds that a worker waits for a connection of the snapshot before
+# it fails. The workers don't outnumber the connections, so a longer
+# wait means that a connection is never released.
+SNAPSHOT_WAIT = 3600
+
+# The table of the SQLite files which records the MySQL snapshot
+# that the rows were read in, it's never transferred itself.
+METADATA_TABLE = '_berudele_metadata'
+
+# Seconds between two checks of a paused or overloaded transfer
+# whether it may go on.
+CONTROL_POLL = 0.5
+
+# Seconds between two checks of the replication lag and the running
+# threads of the MySQL server, see watch_server.
+MONITOR_INTERVAL = 5
+
+# The upper bounds in seconds of the buckets of the histogram of the
+# time to write and commit a chunk, see Progress.chunk.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+                   10, 30)
+
+logger = logging.getLogger('Berudele')
+
+
+class TransferError(Exception):
+    """Raised when at least one of the tables is not transferred.
+
+    Args:
+        errors: A dictionary of the failed tables and their errors.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = map(lambda table: '{}: {}'.format(table, errors[table]),
+                    errors)
+        super().__init__('\n'.join(lines))
+
+
+class Cancelled(Exception):
+    """Raised by the workers when the transfer is cancelled."""
+
+
+class Control:
+    """Lets the GUI or the command-line cancel, pause and throttle a
+    running transfer. The workers call wait after every chunk, so a
+    cancel or a pause takes effect between two chunks and a throttled
+    transfer sleeps between them; the rows of the committed chunks
+    stay in the journal, so a cancelled transfer can be resumed.
+
+    Args:
+        rows_rate: The maximum rows per second of all the workers
+          together, zero for no limit.
+        bytes_rate: The maximum bytes per second of all the workers
+          together, zero for no limit.
+
+    Methods:
+        cancel, pause, resume: Called by the GUI or the command-line.
+        overload: Called by watch_server with the reason of a slowdown.
+        check: Raises Cancelled if the transfer is cancelled.
+        wait: Called by the workers between the chunks.
+    """
+
+    def __init__(self, rows_rate=0, bytes_rate=0):
+        self.rows_rate = rows_rate
+        self.bytes_rate = bytes_rate
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.paused = threading.Event()
+        self.reason = None
+        self.next = None
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def pause(self):
+        self.paused.set()
+
+    def resume(self):
+        self.paused.clear()
+
+    def overload(self, reason):
+        """Holds the workers while `reason` isn't None."""
+        with self.lock:
+            if reason != self.reason:
+                if reason is None:
+                    logger.info('Resuming the transfer')
+                else:
+                    logger.info('Holding the transfer: %s', reason)
+            self.reason = reason
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled('The transfer is cancelled.')
+
+    def wait(self, rows=0, size=0):
+        """Sleeps as long as the rate limits ask after a chunk of
+        `rows` rows and `size` bytes, and while the transfer is paused
+        or the server is overloaded.
+
+        Raises:
+            Cancelled: If the transfer is cancelled.
+        """
+        self.check()
+        seconds = 0
+        if self.rows_rate:
+            seconds = rows / self.rows_rate
+        if self.bytes_rate:
+            seconds = max(seconds, size / self.bytes_rate)
+        with self.lock:
+            now = time.monotonic()
+            # The chunks of the workers are scheduled one after
+            # another, the time of a pause isn't made up for later.
+            self.next = max(self.next or now, now) + seconds
+            delay = self.next - now
+        if delay > 0:
+            self.cancelled.wait(delay)
+        while self.paused.is_set() or self.reason is not None:
+            self.check()
+            self.cancelled.wait(CONTROL_POLL)
+        self.check()
+
+
+class Progress:
+    """Collects the progress of the tables from the workers.
+    The workers only add up counters under a lock, the GUI or the
+    command-line reads a snapshot at its own refresh rate, so a
+    fast transfer doesn't flood the event loop with signals.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tables = {}
+
+    def start(self, table, total):
+        """Registers a table with its estimated number of rows."""
+        with self.lock:
+            self.tables[table] = {
+                'table': table,
+                'total': total,
+                'read': 0,
+                'written': 0,
+                'bytes': 0,
+                'started': None,
+                'finished': None,
+                'error': None,
+                'cancelled': False,
+                'phases': {},
+                'chunks': 0,
+                'latency': [0] * (len(LATENCY_BUCKETS) + 1),
+                'latency_sum': 0,
+                'retries': {},
+                'queued': 0
+                }
+
+    def read(self, table, rows, size):
+        """Adds a chunk which is read from the source."""
+        with self.lock:
+            stats = self.tables[table]
+            if stats['started'] is None:
+                stats['started'] = time.monotonic()
+            stats['read'] += rows
+            stats['bytes'] += size
+
+    def written(self, table, rows):
+        """Adds a chunk which is committed to the target."""
+        with self.lock:
+            self.tables[table]['written'] += rows
+
+    def chunk(self, table, seconds):
+        """Adds the time to write and commit a chunk to the histogram
+        of the table, the last bucket counts the slower chunks.
+        """
+        with self.lock:
+            stats = self.tables[table]
+            bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+            stats['chunks'] += 1
+            stats['latency'][bucket] += 1
+            stats['latency_sum'] += seconds
+
+    def retry(self, table, reason):
+        """Counts a chunk which is written again, by its reason."""
+        with self.lock:
+            retries = self.tables[table]['retries']
+            retries[reason] = retries.get(reason, 0) + 1
+
+    def queued(self, table, depth):
+        """Records the chunks which wait in the read-ahead queue."""
+        with self.lock:
+            self.tables[table]['queued'] = depth
+
+    def phase(self, table, name, seconds):
+        """Records the duration of a phase of a table,
+        e.g. copying the rows or creating the indexes.
+        """
+        with self.lock:
+            self.tables[table]['phases'][name] = seconds
+
+    def finish(self, table, error=None, cancelled=False):
+        """Ends a table, which is copied, failed with an error
+        or whose copy is cancelled.
+        """
+        with self.lock:
+            self.tables[table]['finished'] = time.monotonic()
+            self.tables[table]['error'] = error
+            self.tables[table]['cancelled'] = cancelled
+            self.tables[table]['queued'] = 0
+
+    def snapshot(self):
+        """Returns a list of dictionaries, one per table, with
+        the counters and the elapsed seconds, the rate in rows per
+        second and the estimated remaining seconds (None if unknown).
+        """
+        now = time.monotonic()
+        result = []
+        with self.lock:
+            for stats in self.tables.values():
+                stats = dict(stats)
+                stats['phases'] = dict(stats['phases'])
+                stats['latency'] = list(stats['latency'])
+                stats['retries'] = dict(stats['retries'])
+                elapsed = 0
+                if stats['started'] is not None:
+                    elapsed = (stats['finished'] or now) - stats['started']
+                rate = stats['written'] / elapsed if elapsed else 0
+                remaining = None
+                if stats['finished'] is not None:
+                    remaining = 0
+                elif rate and stats['total']:
+                    left = max(stats['total'] - stats['written'], 0)
+                    remaining = left / rate
+                stats['elapsed'] = elapsed
+                stats['rate'] = rate
+                stats['remaining'] = remaining
+                result.append(stats)
+        return result
+
+    def overall(self, tables=None):
+        """Returns the progress of the whole transfer, a dictionary of
+        the estimated total and the written rows, the rate since the
+        first chunk and the estimated remaining seconds (None if it's
+        unknown). `tables` is a snapshot, a new one is taken if None.
+        """
+        if tables is None:
+            tables = self.snapshot()
+        total = 0
+        written = 0
+        started = None
+        for stats in tables:
+            if stats['finished'] is None:
+                total += max(stats['total'], stats['written'])
+            else:
+                total += stats['written']
+            written += stats['written']
+            if stats['started'] is not None:
+                started = min(started or stats['started'], stats['started'])
+        elapsed = time.monotonic() - started if started is not None else 0
+        rate = written / elapsed if elapsed else 0
+        remaining = None
+        if rate and total:
+            remaining = max(total - written, 0) / rate
+        return {
+            'total': total,
+            'written': written,
+            'rate': rate,
+            'remaining': remaining
+            }
+
+
+class ChunkSizer:
+    """Picks the number of rows which are read/written at once.
+    A fixed chunk is kept as it is, the automatic chunk starts from
+    PROBE_CHUNK and is doubled while the measured rows per second
+    improve, within the CHUNK_MEMORY ceiling for the average row
+    width and CHUNK_SECONDS, then it settles for the rest of the table.
+
+    Args:
+        chunk: The chunk option, zero for the automatic chunk.
+        chunks: The number of the chunks which are held in memory
+          at once, they share the CHUNK_MEMORY ceiling.
+    """
+
+    def __init__(self, chunk, chunks=1):
+        self.size = chunk or PROBE_CHUNK
+        self.settled = chunk != 0
+        self.best_rate = 0
+        self.memory = CHUNK_MEMORY / chunks
+
+    def update(self, rows, size, seconds):
+        """Measures a copied chunk and adjusts the chunk size.
+
+        Args:
+            rows: The number of the rows of the chunk.
+            size: The approximate size of the chunk in bytes.
+            seconds: The time of reading and writing the chunk, or
+              the time since the previous chunk if they overlap.
+
+        Returns:
+            True if the chunk size has just settled.
+        """
+        if self.settled or rows < self.size:
+            # The last chunk of a table is smaller than the others.
+            return False
+        ceiling = MAX_CHUNK
+        if size:
+            ceiling = int(self.memory / (size / rows))
+            ceiling = max(MIN_CHUNK, min(ceiling, MAX_CHUNK))
+        rate = rows / seconds if seconds else float('inf')
+        if rate > self.best_rate * 1.1 and seconds < CHUNK_SECONDS and \
+                self.size < ceiling:
+            self.best_rate = rate
+            self.size = min(self.size * 2, ceiling)
+            return False
+        if rate < self.best_rate:
+            # The last doubling didn't pay off.
+            self.size = max(self.size // 2, MIN_CHUNK)
+        self.size = min(self.size, ceiling)
+        self.settled = True
+        return True
+
+
+def format_size(size):
+    """Formats a number of bytes, e.g. `1.5 GB`."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = 'TB'
+    if unit == 'B':
+        return '{} B'.format(int(size))
+    return '{:.1f} {}'.format(size, unit)
+
+
+def format_seconds(seconds):
+    """Formats a number of seconds as H:MM:SS, `-` if it's unknown."""
+    if seconds is None:
+        return '-'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{}:{:02}:{:02}'.format(hours, minutes, seconds)
+
+
+def setup_logger(log_file):
+    """Appends the messages of the engine to the log file which
+    has been created by the converters.
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(logging.INFO)
+    if log_file:
+        handler = logging.FileHandler(log_file, mode='a')
+        handler.setFormatter(logging.Formatter(
+            fmt='%(asctime)s %(levelname)-8s %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+            ))
+        logger.addHandler(handler)
+
+
+def connect_mysql(info, **kwargs):
+    """Opens a new connection to the MySQL database.
+    Args:
+        info: The dictionary of the transfer options.
+        kwargs: Extra arguments of mysql.connector.connect.
+    """
+    import mysql.connector
+    return mysql.connector.connect(
+        host=info['host'],
+        port=int(info['port']),
+        user=info['username'],
+        password=info['password'],
+        database=info['database'],
+        charset='utf8mb4',
+        **kwargs
+        )
+
+
+@contextlib.contextmanager
+def mysql_connection(info, local_infile=False):
+    """A context manager which hands out a connection from the
+    connection pool of `info['pool']`, or opens a new connection
+    and closes it afterwards if there is no pool. The connections
+    which may read local files with `LOAD DATA LOCAL INFILE` are
+    never pooled, so the other connections can't be asked for files.
+    """
+    pool = info.get('pool')
+    if local_infile:
+        conn = connect_mysql(info, allow_local_infile=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    elif pool is not None:
+        with pool.connection() as conn:
+            yield conn
+    else:
+        conn = connect_mysql(info)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def connect_sqlite(info):
+    """Opens a new connection to the SQLite database."""
+    from sqlite3_to_mysql.sqlite_utils import unicase_compare
+    # The reader thread of prefetch reads through the connection
+    # which is opened by the worker, never at the same time.
+    conn = sqlite3.connect(
+        info['sqlite_database'],
+        timeout=SQLITE_TIMEOUT,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False
+        )
+    conn.create_collation('unicase', unicase_compare)
+    return conn
+
+
+@contextlib.contextmanager
+def sqlite_connection(info):
+    """A context manager which opens a new connection
+    to the SQLite database and closes it afterwards.
+    """
+    conn = connect_sqlite(info)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def fast_load(info):
+    """Returns True if the rows are written into SQLite in the
+    fast load mode, see FAST_LOAD_PRAGMAS.
+    """
+    return bool(info.get('fast_load')) and info['mode'] == 'mysql_to_sqlite'
+
+
+def set_fast_load_pragmas(conn):
+    for pragma in FAST_LOAD_PRAGMAS:
+        conn.execute(pragma)
+
+
+def defer_keys(info):
+    """Returns True if the MySQL tables are loaded with only their
+    primary keys and without the unique and foreign key checks,
+    their indexes and foreign keys are created afterwards.
+    """
+    return bool(info.get('defer_keys')) and \
+        info['mode'] == 'sqlite_to_mysql'
+
+
+def source_connection(info):
+    """Returns a connection context manager of the source database."""
+    if info['mode'] == 'sqlite_to_mysql':
+        return sqlite_connection(info)
+    return mysql_connection(info)
+
+
+def target_connection(info):
+    """Returns a connection context manager of the target database."""
+    if info['mode'] == 'sqlite_to_mysql':
+        return mysql_connection(info)
+    return sqlite_connection(info)
+
+
+def list_tables(info):
+    """Returns the names of all the tables of the source database."""
+    return list(schema.get_schema(info).tables)
+
+
+def create_tables(info):
+    """Creates the selected tables, their indexes and foreign keys
+    on the target database. The schema is translated by the
+    converters, the rows are copied by the workers afterwards.
+    """
+    import sqlite3_to_mysql
+    import mysql_to_sqlite3
+    if info['mode'] == 'sqlite_to_mysql':
+        converter = sqlite3_to_mysql.SQLite3toMySQL(
+            sqlite_file=info['sqlite_database'],
+            sqlite_tables=info['tables'],
+            without_foreign_keys=info['foreign'],
+            mysql_user=info['username'],
+            mysql_password=info['password'],
+            mysql_database=info['database'],
+            mysql_host=info['host'],
+            mysql_port=info['port'],
+            mysql_integer_type=info['integer'],
+            mysql_string_type=info['string'],
+            use_fulltext=info['full_text'],
+            with_rowid=info['rowid'],
+            mysql_transfer_data=False,
+            log_file=info['log']
+            )
+    else:
+        converter = mysql_to_sqlite3.MySQLtoSQLite(
+            sqlite_file=info['sqlite_database'],
+            mysql_tables=info['tables'],
+            without_foreign_keys=info['foreign'],
+            mysql_user=info['username'],
+            mysql_password=info['password'],
+            mysql_database=info['database'],
+            mysql_host=info['host'],
+            mysql_port=info['port'],
+            without_data=True,
+            log_file=info['log']
+            )
+    converter.transfer()
+
+
+def table_estimates(info):
+    """Returns a dictionary of the table names and their estimated
+    (rows, bytes). The estimates are read from the statistics of
+    the databases instead of counting the rows, they are used to
+    start the biggest tables first and to estimate the progress.
+    """
+    return dict(schema.get_schema(info).estimates)
+
+
+def plan(info):
+    """Returns the tables which contain rows to copy, sorted
+    largest-first, and their estimates. The views of the MySQL
+    database are created by the converter and have nothing to copy.
+    """
+    estimates = table_estimates(info)
+    tables = info['tables']
+    if info['mode'] == 'mysql_to_sqlite':
+        tables = list(filter(lambda table: table in estimates, tables))
+    # The sizes are unknown if SQLite has no dbstat table,
+    # then the tables are sorted by their rows.
+    tables = sorted(tables,
+                    key=lambda table: estimates.get(table, (0, 0))[::-1],
+                    reverse=True)
+    return tables, estimates
+
+
+def sqlite_has_rowid(conn, table):
+    """Returns True if the table has a rowid column,
+    it's False for the `WITHOUT ROWID` tables.
+    """
+    try:
+        conn.execute('SELECT rowid FROM "{}" LIMIT 0;'.format(table))
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def value_size(value):
+    """Returns the approximate size of a value in bytes."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return 8
+
+
+def chunk_size(rows):
+    """Returns the approximate size of a chunk of rows in bytes."""
+    return sum(map(lambda row: sum(map(value_size, row)), rows))
+
+
+def decode_text(value):
+    """Decodes a raw MySQL value as text, the values which
+    aren't UTF-8 are inserted as BLOBs.
+    """
+    if value is None:
+        return None
+    try:
+        return value.decode()
+    except UnicodeDecodeError:
+        return value
+
+
+def decode_integer(value):
+    return value if value is None else int(value)
+
+
+def decode_real(value):
+    return value if value is None else float(value)
+
+
+def column_converters(source, table, columns):
+    """Returns the converters of the raw MySQL values of the columns
+    of a table into SQLite values, one per column, which are picked
+    once per copy from the types of `source`, a schema.Schema. The
+    integers and the reals are converted as the INTEGER and REAL
+    affinities of their SQLite columns would convert their text. The
+    binary columns are None, as their bytes are inserted as they are
+    read, the other columns (and the columns which are missing from
+    the schema) are decoded as text.
+    """
+    types = dict(map(lambda column: column[:2],
+                     source.columns.get(table, [])))
+    converters = []
+    for column in columns:
+        column_type = types.get(column, '').lower()
+        if column_type in INTEGER_TYPES + ('year',):
+            converters.append(decode_integer)
+        elif column_type in REAL_TYPES:
+            converters.append(decode_real)
+        elif column_type in BINARY_TYPES:
+            converters.append(None)
+        else:
+            converters.append(decode_text)
+    return converters
+
+
+def encode_rows(rows, converters):
+    """Encodes a chunk of raw MySQL rows for inserting into SQLite
+    column by column, with the converters of column_converters.
+    """
+    if rows == [] or not any(converters):
+        return rows
+    columns = list(zip(*rows))
+    for index, converter in enumerate(converters):
+        if converter is not None:
+            columns[index] = map(converter, columns[index])
+    return list(zip(*columns))
+
+
+def encode_tsv(rows):
+    """Encodes a chunk of rows as the lines of a file for
+    `LOAD DATA`, returns None if a value can't be encoded.
+    """
+    lines = []
+    for row in rows:
+        fields = []
+        for value in row:
+            if value is None:
+                fields.append('\\N')
+            elif not isinstance(value, BULK_TYPES) or \
+                    isinstance(value, float) and not math.isfinite(value):
+                return None
+            else:
+                fields.append(str(value).translate(BULK_ESCAPES))
+        lines.append('\t'.join(fields))
+    return '\n'.join(lines) + '\n'
+
+
+def load_data(cur, sql, data):
+    """Writes a chunk of rows into a temporary file and loads it
+    with `LOAD DATA LOCAL INFILE`.
+
+    Args:
+        cur: A cursor of a connection which allows local files.
+        sql: The `LOAD DATA` statement with a placeholder
+          for the name of the file.
+        data: The chunk encoded by encode_tsv.
+
+    Returns:
+        False if the chunk can't be encoded, it's inserted instead.
+    """
+    if data is None:
+        return False
+    data_file = tempfile.NamedTemporaryFile('w', encoding='utf-8',
+                                            newline='\n', suffix='.tsv',
+                                            delete=False)
+    try:
+        with data_file:
+            data_file.write(data)
+        cur.execute(sql, (data_file.name,))
+    finally:
+        os.remove(data_file.name)
+    return True
+
+
+def split_key(info, table):
+    """Returns the integer key column which a table can be split by,
+    `rowid` for the SQLite tables with a rowid, otherwise the
+    primary key if it's a single integer column, or None.
+    """
+    source = schema.get_schema(info)
+    if table in source.rowid:
+        return 'rowid'
+    keys = list(filter(lambda column: column[2],
+                       source.columns.get(table, [])))
+    if len(keys) == 1:
+        column_type = keys[0][1].lower().split('(')[0].split(' ')[0]
+        if column_type in INTEGER_TYPES:
+            return keys[0][0]
+    return None
+
+
+def key_ranges(info, table, count):
+    """Splits a table into `count` ranges of its integer key,
+    in the spirit of the chunking of mydumper.
+
+    Returns:
+        A list of (key, low, high) tuples, the low bound is
+        inclusive and the high bound is exclusive, None means
+        unbounded. [None] if the table can't be split.
+    """
+    key = split_key(info, table)
+    if key is None:
+        return [None]
+    if info['mode'] == 'sqlite_to_mysql':
+        sql = 'SELECT MIN({0}), MAX({0}) FROM "{1}";'
+        sql = sql.format(key if key == 'rowid' else '"{}"'.format(key), table)
+    else:
+        sql = 'SELECT MIN(`{0}`), MAX(`{0}`) FROM `{1}`;'.format(key, table)
+    with source_connection(info) as conn:
+        cur = conn.cursor()
+        cur.execute(sql)
+        lowest, highest = cur.fetchone()
+    if lowest is None:
+        return [None]
+    step = -(-(int(highest) - int(lowest) + 1) // count)
+    ranges = []
+    for number in range(count):
+        low = int(lowest) + number * step
+        if low > int(highest):
+            break
+        high = low + step
+        if number == 0:
+            low = None
+        if high > int(highest):
+            high = None
+        ranges.append((key, low, high))
+    ranges[-1] = (key, ranges[-1][1], None)
+    return ranges
+
+
+def source_column(info, column):
+    """Quotes a column of the source database."""
+    if info['mode'] == 'sqlite_to_mysql':
+        if column == 'rowid':
+            return column
+        return '"{}"'.format(column)
+    return '`{}`'.format(column)
+
+
+def range_condition(info, key_range):
+    """Returns the conditions and the parameters
+    which select the rows of a key range.
+    """
+    if key_range is None:
+        return [], []
+    key, low, high = key_range
+    placeholder = '?' if info['mode'] == 'sqlite_to_mysql' else '%s'
+    key = source_column(info, key)
+    conditions = []
+    params = []
+    if low is not None:
+        conditions.append('{} >= {}'.format(key, placeholder))
+        params.append(low)
+    if high is not None:
+        conditions.append('{} < {}'.format(key, placeholder))
+        params.append(high)
+    return conditions, params
+
+
+def watermark_condition(info, watermark):
+    """Returns the conditions and the parameters which select the
+    rows beyond the last watermark, up to the highest value which
+    has been seen when the transfer started. A timestamp watermark
+    includes its last value, as more rows may have been updated in
+    the same second, they are upserted again.
+    """
+    if watermark is None:
+        return [], []
+    column, low, high, inclusive = watermark
+    placeholder = '?' if info['mode'] == 'sqlite_to_mysql' else '%s'
+    column = source_column(info, column)
+    conditions = ['{} <= {}'.format(column, placeholder)]
+    params = [high]
+    if low is not None:
+        operator = '>=' if inclusive else '>'
+        conditions.insert(0, '{} {} {}'.format(column, operator, placeholder))
+        params.insert(0, low)
+    return conditions, params
+
+
+def where_clause(info, key_range=None, watermark=None, last_key=None,
+                 row_filter=None):
+    """Returns the WHERE clause and the parameters which select the
+    rows of a key range beyond a watermark, and after the (key, value)
+    last_key of an interrupted copy, which match the row filter of
+    the table, a predicate in the SQL of the source database.
+    """
+    conditions, params = range_condition(info, key_range)
+    if row_filter:
+        conditions.insert(0, '({})'.format(row_filter))
+    more_conditions, more_params = watermark_condition(info, watermark)
+    conditions += more_conditions
+    params += more_params
+    if last_key is not None:
+        placeholder = '?' if info['mode'] == 'sqlite_to_mysql' else '%s'
+        conditions.append('{} > {}'.format(
+            source_column(info, last_key[0]), placeholder))
+        params.append(last_key[1])
+    if conditions == []:
+        return '', ()
+    return ' WHERE ' + ' AND '.join(conditions), tuple(params)
+
+
+def row_filter(info, table):
+    """Returns the row filter of a table, a predicate in the SQL of
+    the source database which is pushed down into its query, or None.
+    """
+    return info.get('filters', {}).get(table) or None
+
+
+def projection(info, table, columns):
+    """Returns the columns of `columns` which are copied, the columns
+    of `info['columns'][table]` and the primary key, or all of them.
+    The other columns of the target keep their default values.
+    """
+    selected = info.get('columns', {}).get(table)
+    if not selected:
+        return columns
+    keys = schema.get_schema(info).primary_key(table) + ['rowid']
+    return list(filter(lambda column: column in selected or column in keys,
+                       columns))
+
+
+def check_filter(info, table, predicate):
+    """Checks a row filter by preparing a query of the table with it,
+    `LIMIT 0` doesn't read any row.
+
+    Raises:
+        sqlite3.Error, mysql.connector.Error: If the predicate is invalid.
+    """
+    quote = '"{}"' if info['mode'] == 'sqlite_to_mysql' else '`{}`'
+    sql = 'SELECT 1 FROM {} WHERE ({}) LIMIT 0;'.format(
+        quote.format(table), predicate)
+    with source_connection(info) as conn:
+        cur = conn.cursor()
+        cur.execute(sql)
+        cur.fetchall()
+
+
+def watermark_column(info, table):
+    """Returns the watermark column of a table for the incremental
+    transfers, an `updated_at`-like column, otherwise the
+    auto-increment key, or the rowid of the SQLite tables.
+
+    Returns:
+        A (column, inclusive) tuple, inclusive is True for the
+        timestamp columns. None if the table isn't eligible.
+    """
+    source = schema.get_schema(info)
+    columns = source.columns.get(table, [])
+    if info['mode'] == 'sqlite_to_mysql':
+        for name, column_type, key, extra in columns:
+            if name.lower() in WATERMARK_COLUMNS:
+                return name, True
+        if table not in source.rowid:
+            return None
+        keys = list(filter(lambda column: column[2], columns))
+        if len(keys) == 1 and keys[0][1].upper() == 'INTEGER':
+            # An alias of the rowid.
+            return keys[0][0], False
+        return 'rowid', False
+    for name, column_type, key, extra in columns:
+        if name.lower() in WATERMARK_COLUMNS and \
+                column_type.lower() in TIME_TYPES:
+            return name, True
+    for name, column_type, key, extra in columns:
+        if 'auto_increment' in extra.lower():
+            return name, False
+    return None
+
+
+def table_watermarks(info, tables):
+    """Returns a dictionary of the tables and their (column, value)
+    watermarks, the value is the last watermark or None if the table
+    hasn't been transferred incrementally yet. The column is None if
+    the table isn't eligible for the incremental transfers.
+    """
+    saved = state.load_watermarks(info)
+    watermarks = {}
+    for table in tables:
+        column = watermark_column(info, table)
+        if column is None:
+            watermarks[table] = (None, None)
+            continue
+        value = None
+        if table in saved and saved[table]['column'] == column[0]:
+            value = saved[table]['value']
+        watermarks[table] = (column[0], value)
+    return watermarks
+
+
+def incremental_watermarks(info, tables):
+    """Returns a dictionary of the eligible tables and their
+    (column, low, high, inclusive) watermarks, low is the last
+    watermark and high is the current highest value of the column.
+    The tables which aren't eligible are copied in full.
+    """
+    saved = state.load_watermarks(info)
+    watermarks = {}
+    for table in tables:
+        column = watermark_column(info, table)
+        if column is None:
+            logger.info('The table %s has no watermark column, '
+                        'it is copied in full', table)
+            continue
+        column, inclusive = column
+        low = None
+        if table in saved and saved[table]['column'] == column:
+            low = saved[table]['value']
+        if info['mode'] == 'sqlite_to_mysql':
+            sql = 'SELECT MAX({}) FROM "{}";'
+        else:
+            sql = 'SELECT MAX({}) FROM `{}`;'
+        with source_connection(info) as conn:
+            cur = conn.cursor()
+            cur.execute(sql.format(source_column(info, column), table))
+            high = cur.fetchone()[0]
+        if high is None:
+            continue
+        watermarks[table] = (column, low, high, inclusive)
+    return watermarks
+
+
+def drop_indexes(info, table, foreign_keys=False):
+    """Drops the secondary indexes of a table on the target
+    database, so the rows are loaded without maintaining them.
+    The indexes which are needed by a foreign key can't be
+    dropped from MySQL and are kept.
+
+    Args:
+        foreign_keys: Drops the foreign keys of the MySQL table
+          as well, so all of its secondary indexes can be dropped.
+
+    Returns:
+        A list of the statements which create the dropped indexes,
+        the indexes and the foreign keys of a MySQL table are
+        created by one `ALTER TABLE` statement.
+    """
+    import mysql.connector
+    statements = []
+    if info['mode'] == 'mysql_to_sqlite':
+        with sqlite_connection(info) as conn:
+            sql = "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            sql += 'AND tbl_name = ? AND sql IS NOT NULL;'
+            for name, statement in conn.execute(sql, (table,)).fetchall():
+                conn.execute('DROP INDEX "{}";'.format(name))
+                statements.append(statement)
+            conn.commit()
+        return statements
+    with mysql_connection(info) as conn:
+        constraints = []
+        if foreign_keys:
+            constraints = drop_foreign_keys(conn, table)
+        definitions = []
+        cur = conn.cursor(dictionary=True)
+        cur.execute('SHOW INDEX FROM `{}`;'.format(table))
+        indexes = {}
+        for row in cur.fetchall():
+            if row['Key_name'] != 'PRIMARY':
+                indexes.setdefault(row['Key_name'], []).append(row)
+        for name in indexes:
+            definition = mysql_index_definition(indexes[name])
+            if definition is None:
+                continue
+            try:
+                cur.execute('ALTER TABLE `{}` DROP INDEX `{}`;'.format(
+                    table, name))
+            except mysql.connector.Error as error:
+                logger.info('Keeping the index %s of the table %s: %s',
+                            name, table, error)
+                continue
+            definitions.append('ADD ' + definition)
+    # The foreign keys are added after the indexes which they use.
+    definitions += constraints
+    if definitions:
+        statements.append('ALTER TABLE `{}` {};'.format(
+            table, ', '.join(definitions)))
+    return statements
+
+
+def drop_foreign_keys(conn, table):
+    """Drops the foreign keys of a MySQL table.
+
+    Returns:
+        A list of the `ADD CONSTRAINT` clauses which create them again.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        'SELECT rc.CONSTRAINT_NAME, kcu.COLUMN_NAME, '
+        'kcu.REFERENCED_TABLE_NAME, kcu.REFERENCED_COLUMN_NAME, '
+        'rc.UPDATE_RULE, rc.DELETE_RULE '
+        'FROM information_schema.REFERENTIAL_CONSTRAINTS AS rc '
+        'JOIN information_schema.KEY_COLUMN_USAGE AS kcu '
+        'ON kcu.CONSTRAINT_SCHEMA = rc.CONSTRAINT_SCHEMA '
+        'AND kcu.CONSTRAINT_NAME = rc.CONSTRAINT_NAME '
+        'AND kcu.TABLE_NAME = rc.TABLE_NAME '
+        'WHERE rc.CONSTRAINT_SCHEMA = DATABASE() AND rc.TABLE_NAME = %s '
+        'ORDER BY rc.CONSTRAINT_NAME, kcu.ORDINAL_POSITION;',
+        (table,)
+        )
+    foreign_keys = {}
+    for name, column, parent, parent_column, on_update, on_delete \
+            in cur.fetchall():
+        foreign_key = foreign_keys.setdefault(
+            name, ([], parent, [], on_update, on_delete))
+        foreign_key[0].append('`{}`'.format(column))
+        foreign_key[2].append('`{}`'.format(parent_column))
+    constraints = []
+    for name in foreign_keys:
+        columns, parent, parent_columns, on_update, on_delete = \
+            foreign_keys[name]
+        cur.execute('ALTER TABLE `{}` DROP FOREIGN KEY `{}`;'.format(
+            table, name))
+        constraints.append(
+            'ADD CONSTRAINT `{}` FOREIGN KEY ({}) REFERENCES `{}` ({}) '
+            'ON DELETE {} ON UPDATE {}'.format(
+                name, ', '.join(columns), parent, ', '.join(parent_columns),
+                on_delete, on_update))
+    return constraints
+
+
+def mysql_index_definition(rows):
+    """Builds the definition of an index from its rows
+    in the result of `SHOW INDEX`, returns None for the
+    functional indexes, which are kept as they are.
+    """
+    rows = sorted(rows, key=lambda row: row['Seq_in_index'])
+    columns = []
+    for row in rows:
+        if row['Column_name'] is None:
+            return None
+        column = '`{}`'.format(row['Column_name'])
+        if row['Sub_part'] is not None:
+            column += '({})'.format(row['Sub_part'])
+        columns.append(column)
+    kind = 'INDEX'
+    if rows[0]['Index_type'] in ('FULLTEXT', 'SPATIAL'):
+        kind = '{} INDEX'.format(rows[0]['Index_type'])
+    elif not int(rows[0]['Non_unique']):
+        kind = 'UNIQUE INDEX'
+    return '{} `{}` ({})'.format(kind, rows[0]['Key_name'],
+                                 ', '.join(columns))
+
+
+def has_unique_key(info, conn, table):
+    """Returns True if the target table has a primary key or a unique
+    index, which drops the rows that are inserted again. The unique
+    indexes which are dropped by drop_indexes don't count.
+    """
+    if info['mode'] == 'mysql_to_sqlite':
+        sql = 'PRAGMA table_info("{}");'.format(table)
+        if any(map(lambda column: column[5], conn.execute(sql).fetchall())):
+            return True
+        sql = 'PRAGMA index_list("{}");'.format(table)
+        return any(map(lambda index: index[2], conn.execute(sql).fetchall()))
+    from sqlite3_to_mysql.mysql_utils import safe_identifier_length
+    cur = conn.cursor()
+    cur.execute('SHOW INDEX FROM `{}` WHERE Non_unique = 0;'.format(
+        safe_identifier_length(table)))
+    return cur.fetchall() != []
+
+
+def create_indexes(info, statements):
+    """Creates the indexes which are dropped by drop_indexes.
+    The rows which are already in MySQL aren't checked
+    against the foreign keys again.
+    """
+    with target_connection(info) as conn:
+        if fast_load(info):
+            set_fast_load_pragmas(conn)
+        cur = conn.cursor()
+        if info['mode'] == 'sqlite_to_mysql':
+            cur.execute('SET SESSION foreign_key_checks = 0;')
+        for statement in statements:
+            cur.execute(statement)
+        conn.commit()
+
+
+def server_load(conn):
+    """Returns the (lag, threads) of a MySQL server, lag is the
+    replication lag in seconds if the server is a replica, infinite
+    if the replica isn't replicating, otherwise None, threads is the
+    number of its running threads.
+    """
+    import mysql.connector
+    cur = conn.cursor(dictionary=True)
+    cur.execute("SHOW GLOBAL STATUS LIKE 'Threads_running';")
+    threads = int(cur.fetchone()['Value'])
+    replica = None
+    for sql in ('SHOW REPLICA STATUS;', 'SHOW SLAVE STATUS;'):
+        try:
+            cur.execute(sql)
+            replica = cur.fetchone()
+            break
+        except mysql.connector.Error:
+            # MySQL before 8.0.22 and MariaDB before 10.5.1.
+            continue
+    lag = None
+    if replica is not None:
+        lag = replica.get('Seconds_Behind_Source',
+                          replica.get('Seconds_Behind_Master'))
+        lag = math.inf if lag is None else int(lag)
+    return lag, threads
+
+
+def watch_server(info, control, stopped):
+    """Holds the workers of a transfer while the replication lag of
+    the MySQL server is above `info['max_lag']` seconds, or while its
+    running threads are above `info['max_threads']`, until the
+    stopped event is set. It runs in a thread of its own over its
+    own connection, so it never waits for the pool. A replica which
+    isn't replicating is treated as lagging. The lag of the replicas
+    of a primary server isn't visible from it, so `max_lag` only
+    applies when the connected server is a replica.
+    """
+    try:
+        conn = connect_mysql(info)
+    except Exception as error:
+        logger.error('Failed to watch the MySQL server: %s', error)
+        return
+    try:
+        while not stopped.is_set():
+            try:
+                lag, threads = server_load(conn)
+            except Exception as error:
+                logger.error('Failed to watch the MySQL server: %s', error)
+                return
+            reason = None
+            if info.get('max_threads') and threads > info['max_threads']:
+                reason = '{} running threads'.format(threads)
+            if info.get('max_lag') and lag is not None and \
+                    lag > info['max_lag']:
+                reason = 'replication lag of {} s'.format(lag)
+            control.overload(reason)
+            stopped.wait(MONITOR_INTERVAL)
+    finally:
+        control.overload(None)
+        conn.close()
+
+
+def snapshot(info):
+    """Returns True if the MySQL tables are read in one snapshot."""
+    return bool(info.get('snapshot')) and info['mode'] == 'mysql_to_sqlite'
+
+
+def binlog_coordinates(cur):
+    """Returns the binary log file, the position and the executed
+    GTIDs of the server as a dictionary, which is empty if the binary
+    log is disabled.
+    """
+    import mysql.connector
+    status = None
+    for sql in ('SHOW BINARY LOG STATUS;', 'SHOW MASTER STATUS;'):
+        try:
+            cur.execute(sql)
+            row = cur.fetchone()
+            cur.fetchall()
+        except mysql.connector.Error:
+            # MySQL before 8.2 and MariaDB.
+            continue
+        if row is not None:
+            status = dict(zip(map(lambda column: column[0],
+                                  cur.description), row))
+        break
+    if status is None:
+        return {}
+    coordinates = {
+        'binlog_file': status['File'],
+        'binlog_position': status['Position']
+        }
+    if status.get('Executed_Gtid_Set'):
+        coordinates['gtid_executed'] = status['Executed_Gtid_Set']
+    return coordinates
+
+
+def snapshot_coordinates(cur):
+    """Returns the binary log coordinates of the snapshot of the
+    current transaction, which only MariaDB reports, or an empty
+    dictionary.
+    """
+    cur.execute("SHOW STATUS LIKE 'binlog_snapshot_%';")
+    status = dict(map(lambda row: (row[0].lower(), row[1]), cur.fetchall()))
+    if not status.get('binlog_snapshot_file'):
+        return {}
+    return {
+        'binlog_file': status['binlog_snapshot_file'],
+        'binlog_position': status['binlog_snapshot_position']
+        }
+
+
+def open_snapshot(info, readers):
+    """Opens the connections which read the MySQL tables of a
+    transfer at the same point in time. The connections are opened
+    first, then the writes of the server are held by `FLUSH TABLES
+    WITH READ LOCK` while every connection starts a transaction `WITH
+    CONSISTENT SNAPSHOT` and the binary log position is read, which
+    takes a few milliseconds once the lock is taken. If the user may
+    not take the lock, one connection is kept, and the workers read
+    their tables through it in turn.
+
+    Args:
+        info: The dictionary of the transfer options.
+        readers: The number of the connections.
+
+    Returns:
+        A pool.SnapshotPool of the connections and a dictionary of
+        the snapshot, its time, the way it's taken, the binary log
+        coordinates if the binary log is enabled, and whether they
+        are exact.
+    """
+    import mysql.connector
+    from res.logic import pool
+    connections = []
+    coordinator = connect_mysql(info)
+    try:
+        for number in range(readers):
+            # Starting a query on a connection with unread rows
+            # reads them, as a connection can't be reset.
+            connections.append(connect_mysql(info, consume_results=True))
+        cur = coordinator.cursor()
+        cur.execute('SET SESSION lock_wait_timeout = {};'.format(
+            SNAPSHOT_LOCK_TIMEOUT))
+        locked = time.monotonic()
+        try:
+            cur.execute('FLUSH TABLES WITH READ LOCK;')
+        except mysql.connector.Error as error:
+            if error.errno not in LOCK_ERRORS:
+                raise
+            logger.warning('Reading the tables through one connection, as '
+                           'the global read lock is denied: %s', error)
+            locked = None
+            for conn in connections[1:]:
+                with contextlib.suppress(Exception):
+                    conn.close()
+            del connections[1:]
+        try:
+            for conn in connections:
+                conn.start_transaction(consistent_snapshot=True,
+                                       isolation_level='REPEATABLE READ',
+                                       readonly=True)
+            metadata = {'method': 'lock', 'binlog_exact': 1}
+            if locked is not None:
+                metadata.update(binlog_coordinates(cur))
+            else:
+                metadata['method'] = 'single connection'
+                coordinates = snapshot_coordinates(connections[0].cursor())
+                if coordinates == {}:
+                    # The position right after the snapshot.
+                    coordinates = binlog_coordinates(cur)
+                    metadata['binlog_exact'] = 0
+                metadata.update(coordinates)
+        finally:
+            if locked is not None:
+                cur.execute('UNLOCK TABLES;')
+                logger.info('Held the global read lock for %.3f s',
+                            time.monotonic() - locked)
+    except Exception:
+        for conn in connections:
+            with contextlib.suppress(Exception):
+                conn.close()
+        raise
+    finally:
+        coordinator.close()
+    if 'binlog_file' not in metadata:
+        metadata.pop('binlog_exact')
+    metadata.update({
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(
+            timespec='seconds'),
+        'host': info['host'],
+        'database': info['database']
+        })
+    logger.info('Reading the tables in a snapshot of %s', ', '.join(map(
+        lambda name: '{} {}'.format(name, metadata[name]), metadata)))
+    return pool.SnapshotPool(connections, SNAPSHOT_WAIT), metadata
+
+
+def save_metadata(info, metadata):
+    """Replaces the snapshot which is recorded in
+    METADATA_TABLE of the SQLite database.
+    """
+    with sqlite_connection(info) as conn:
+        conn.execute('CREATE TABLE IF NOT EXISTS "{}" (key TEXT PRIMARY KEY, '
+                     'value TEXT);'.format(METADATA_TABLE))
+        sql = 'DELETE FROM "{}" '.format(METADATA_TABLE)
+        sql += "WHERE key LIKE 'snapshot\\_%' ESCAPE '\\';"
+        conn.execute(sql)
+        conn.executemany(
+            'INSERT INTO "{}" VALUES (?, ?);'.format(METADATA_TABLE),
+            map(lambda name: ('snapshot_' + name, str(metadata[name])),
+                metadata)
+            )
+        conn.commit()
+
+
+def checkpoint_name(info, table, key_range=None, watermark=None):
+    """Returns the name of the checkpoint of a table or of a key range
+    of it, the checkpoints are only reused with the same chunk size,
+    key range, watermarks, row filter and columns.
+    """
+    name = '{} chunk={}'.format(table, info['chunk'] or 'auto')
+    columns = info.get('columns', {}).get(table)
+    if row_filter(info, table) or columns:
+        options = repr((row_filter(info, table), sorted(columns or [])))
+        name += ' options={:08x}'.format(zlib.crc32(options.encode('utf-8')))
+    if key_range is not None:
+        name += ' range={}:{}'.format(key_range[1], key_range[2])
+    if watermark is not None:
+        name += ' watermark={}:{}'.format(watermark[1], watermark[2])
+    return name
+
+
+def read_chunks(source, chunker, keys, table, progress=None, tracer=None):
+    """Yields the chunks of a source cursor as (rows, last, size)
+    tuples, last is the key of the last row if the rows are read
+    with their key in front, which is stripped, or None.
+    """
+    from res.logic import profiling
+    while True:
+        with profiling.span(tracer, 'read', table):
+            rows = source.fetchmany(chunker.size)
+        if not rows:
+            return
+        last = None
+        if keys:
+            last = int(rows[-1][0])
+            rows = list(map(lambda row: row[1:], rows))
+        size = chunk_size(rows)
+        if progress is not None:
+            progress.read(table, len(rows), size)
+        yield rows, last, size
+
+
+def submit_chunks(chunks, submit):
+    """Adds the future of the conversion of every chunk, or None, to
+    the (rows, last, size) tuples of read_chunks. The conversions are
+    submitted as soon as the chunks are read, so they run ahead of
+    the writer in the processes like the reads do in prefetch.
+    """
+    for rows, last, size in chunks:
+        yield rows, last, size, submit(rows)
+
+
+def prefetch(items, depth, queued=None):
+    """Iterates `items` in a reader thread which runs up to `depth`
+    items ahead of the caller through a bounded queue, so reading the
+    next chunk from the source overlaps writing the previous one into
+    the target, and a slow target holds the reader back instead of
+    piling the chunks up in memory. The items are yielded in order
+    and an error of the reader is raised by the generator.
+    The generator must be closed (e.g. by contextlib.closing) before
+    the connections of the reader are closed, closing it stops and
+    joins the reader.
+
+    Args:
+        items: An iterator, which is consumed in the reader thread.
+        depth: The size of the queue, zero iterates `items` in
+          the calling thread.
+        queued: A function which is called with the number of the
+          items left in the queue whenever an item is taken, or None.
+    """
+    if depth < 1:
+        yield from items
+        return
+    chunks = queue.Queue(depth)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                chunks.put(item, timeout=QUEUE_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read():
+        try:
+            for item in items:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except Exception as error:
+            put((False, error))
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while True:
+            more, item = chunks.get()
+            if queued is not None:
+                queued(chunks.qsize())
+            if not more:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stopped.set()
+        reader.join()
+
+
+def copy_table(info, table, key_range=None, progress=None, watermark=None,
+               journal=None, control=None, tracer=None, processes=None):
+    """Copies the rows of a table, or of a key range of it, from the
+    source database to the target database. Every call opens its own
+    connections, so the tables and the ranges can be copied by several
+    workers at the same time. The rows of the incremental transfers
+    are upserted, so the updated rows replace their old copies.
+    Only the rows which match the row filter of the table are read,
+    and only its projected columns, see row_filter and projection.
+    If `info['bulk']` is set, the chunks are loaded into MySQL with
+    `LOAD DATA LOCAL INFILE`, except the chunks with BLOBs and the
+    chunks of the incremental transfers, which are upserted.
+    The chunks are read up to `info['queue']` chunks ahead of the
+    writes by a reader thread, see prefetch.
+
+    The rows are read in the order of the integer key of the table and
+    the last key of every committed chunk is recorded in the journal,
+    so an interrupted copy resumes after its last committed chunk.
+    The tables without an integer key are copied again from the start,
+    the rows of their interrupted copy are deleted first unless the
+    target drops them by its unique key, an incremental copy of such
+    a table can't be resumed.
+
+    Args:
+        key_range: A (key, low, high) tuple which is made by
+          key_ranges, or None to copy the whole table.
+        progress: A Progress instance which collects the number
+          of the read and written rows and bytes.
+        watermark: A (column, low, high, inclusive) tuple which is
+          made by incremental_watermarks, or None to copy all the rows.
+        journal: The checkpoints of the interrupted transfer which
+          is returned by state.load_journal, or None to start over.
+        control: A Control instance which is waited for after
+          every committed chunk, or None.
+        tracer: A profiling.Tracer instance which times the
+          stages of every chunk, or None.
+        processes: A conversion.ConversionPool instance which converts
+          the chunks into the rows of SQLite or the files of the bulk
+          mode, or None to convert them in the writer.
+
+    Returns:
+        The number of the copied rows.
+
+    Raises:
+        Cancelled: If the transfer is cancelled by the control.
+        RuntimeError: If the incremental copy of a table without an
+          integer key or a unique key is interrupted.
+    """
+    import mysql.connector
+    from sqlite3_to_mysql.mysql_utils import safe_identifier_length
+    from res.logic import profiling
+    depth = info.get('queue', QUEUE_DEPTH)
+    # The chunks in the queue, the one being read and the one
+    # being written.
+    chunker = ChunkSizer(info['chunk'], depth + 2 if depth else 1)
+    checkpoint = checkpoint_name(info, table, key_range, watermark)
+    resumed = (journal or {}).get(checkpoint, {})
+    if resumed.get('done'):
+        logger.info('The rows of the table %s are already copied (%s)',
+                    table, checkpoint)
+        return 0
+    key = split_key(info, table)
+    last_key = None
+    if key is not None and resumed.get('last') is not None:
+        last_key = (key, resumed['last'])
+        logger.info('Resuming the table %s after %s = %s',
+                    table, key, resumed['last'])
+    where, params = where_clause(info, key_range, watermark, last_key,
+                                 row_filter(info, table))
+    order = ''
+    if key is not None:
+        order = ' ORDER BY {}'.format(source_column(info, key))
+    # LOAD DATA can only upsert by REPLACE, which deletes the old
+    # rows and so the rows of their ON DELETE CASCADE children.
+    bulk = info.get('bulk') and info['mode'] == 'sqlite_to_mysql' and \
+        not info.get('incremental')
+    # The schema is looked up before the connections are taken, as
+    # the pool (e.g. of a snapshot) may have no connection left to
+    # check its version with.
+    source_schema = schema.get_schema(info)
+    projected = None
+    if info['mode'] == 'mysql_to_sqlite' and \
+            info.get('columns', {}).get(table):
+        projected = projection(info, table, list(map(
+            lambda column: column[0], source_schema.columns[table])))
+    with sqlite_connection(info) as sqlite_conn, \
+            mysql_connection(info, bulk) as mysql_conn:
+        if fast_load(info):
+            set_fast_load_pragmas(sqlite_conn)
+        if info['mode'] == 'sqlite_to_mysql':
+            sql = 'SELECT name FROM PRAGMA_TABLE_INFO("{}");'.format(table)
+            columns = list(map(lambda row: row[0],
+                               sqlite_conn.execute(sql).fetchall()))
+            columns = projection(info, table, columns)
+            selected = list(map(lambda column: '"{}"'.format(column),
+                                columns))
+            if info['rowid'] and sqlite_has_rowid(sqlite_conn, table):
+                columns.insert(0, 'rowid')
+                selected.insert(0, 'rowid AS "rowid"')
+            keys = []
+            if key is not None:
+                keys = [source_column(info, key)]
+            source = sqlite_conn.cursor()
+            source.execute('SELECT {} FROM "{}"{}{};'.format(
+                ', '.join(keys + selected), table, where, order), params)
+            columns = list(map(lambda column: '`{}`'.format(
+                safe_identifier_length(column)), columns))
+            insert = 'INSERT IGNORE INTO `{}` ({}) VALUES ({})'
+            if info.get('incremental'):
+                insert = 'INSERT INTO `{}` ({}) VALUES ({})'
+            insert = insert.format(safe_identifier_length(table),
+                                   ', '.join(columns),
+                                   ', '.join(['%s'] * len(selected)))
+            if info.get('incremental'):
+                updates = map(lambda column: '{0} = VALUES({0})'.format(
+                    column), columns)
+                insert += ' ON DUPLICATE KEY UPDATE ' + ', '.join(updates)
+            load = "LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE `{}` "
+            load += "CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' "
+            load += "ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({})"
+            load = load.format(safe_identifier_length(table),
+                               ', '.join(columns))
+            target_conn = mysql_conn
+            target = mysql_conn.cursor()
+            # The tables are copied in parallel and largest-first, a
+            # child row may come before its parent, which INSERT
+            # IGNORE would drop silently as a warning. The pool resets
+            # the session of the connection.
+            target.execute('SET SESSION foreign_key_checks = 0;')
+            if defer_keys(info):
+                target.execute('SET SESSION unique_checks = 0;')
+            convert = list
+            # The values are inserted as they are read,
+            # only the files of the bulk mode are encoded.
+            stage = encode_tsv if bulk else None
+        else:
+            keys = []
+            if key is not None:
+                keys = [source_column(info, key)]
+            selected = ['`{}`.*'.format(table)]
+            if projected is not None:
+                selected = list(map(lambda column: '`{}`'.format(column),
+                                    projected))
+            source = mysql_conn.cursor(raw=True, buffered=info['buffered'])
+            source.execute('SELECT {} FROM `{}`{}{};'.format(
+                ', '.join(keys + selected), table, where, order), params)
+            names = list(map(lambda column: column[0],
+                             source.description[len(keys):]))
+            columns = list(map(lambda column: '"{}"'.format(column), names))
+            insert = 'INSERT OR IGNORE INTO "{}" ({}) VALUES ({})'
+            if info.get('incremental'):
+                insert = 'INSERT OR REPLACE INTO "{}" ({}) VALUES ({})'
+            insert = insert.format(table, ', '.join(columns),
+                                   ', '.join(['?'] * len(columns)))
+            target_conn = sqlite_conn
+            target = sqlite_conn.cursor()
+            convert = functools.partial(
+                encode_rows,
+                converters=column_converters(source_schema, table, names)
+                )
+            stage = convert
+        if key is None and resumed and \
+                not has_unique_key(info, target_conn, table):
+            # The rows of the interrupted copy would be inserted twice.
+            if info.get('incremental'):
+                raise RuntimeError('The interrupted copy has no key to '
+                                   'resume from, transfer the table '
+                                   'without resuming it.')
+            logger.info('Deleting the rows of the interrupted copy of the '
+                        'table %s', table)
+            if info['mode'] == 'sqlite_to_mysql':
+                target.execute('DELETE FROM `{}`;'.format(
+                    safe_identifier_length(table)))
+            else:
+                target.execute('DELETE FROM "{}";'.format(table))
+            target_conn.commit()
+            resumed = {}
+        if journal is not None and not resumed:
+            # Marks the copy as started, see has_unique_key.
+            state.save_checkpoint(info, table, checkpoint, {'rows': 0})
+        copied = resumed.get('rows', 0)
+        queued = None
+        if progress is not None:
+            queued = functools.partial(progress.queued, table)
+
+        def submit(rows):
+            if processes is None or stage is None:
+                return None
+            return processes.submit(stage, rows)
+
+        chunks = read_chunks(source, chunker, keys, table, progress, tracer)
+        chunks = prefetch(submit_chunks(chunks, submit), depth, queued)
+        with contextlib.closing(chunks):
+            started = time.monotonic()
+            for rows, last, size, future in chunks:
+                writing = time.monotonic()
+                converted = None
+                if future is not None:
+                    with profiling.span(tracer, 'convert', table):
+                        converted = processes.result(future)
+                loaded = False
+                if bulk:
+                    try:
+                        with profiling.span(tracer, 'write', table,
+                                            rows=len(rows), bulk=True):
+                            if future is None:
+                                converted = encode_tsv(rows)
+                            loaded = load_data(target, load, converted)
+                    except mysql.connector.Error as error:
+                        if error.errno not in LOCAL_INFILE_ERRORS:
+                            raise
+                        logger.info('Inserting the rows of the table %s, '
+                                    'as LOAD DATA LOCAL INFILE is '
+                                    'disabled: %s', table, error)
+                        bulk = False
+                        stage = None
+                        if progress is not None:
+                            progress.retry(table, 'load_data')
+                if not loaded:
+                    values = converted
+                    if future is None or stage is not convert:
+                        with profiling.span(tracer, 'convert', table):
+                            values = convert(rows)
+                    with profiling.span(tracer, 'write', table,
+                                        rows=len(rows)):
+                        target.executemany(insert, values)
+                with profiling.span(tracer, 'commit', table):
+                    target_conn.commit()
+                copied += len(rows)
+                if progress is not None:
+                    progress.written(table, len(rows))
+                    progress.chunk(table, time.monotonic() - writing)
+                # The time since the previous chunk, which is the
+                # time of the slower side once they overlap.
+                finished = time.monotonic()
+                seconds = finished - started
+                started = finished
+                if chunker.update(len(rows), size, seconds):
+                    logger.info('Settled on chunks of %s rows for the table '
+                                '%s (%.0f bytes per row, %.0f rows/s)',
+                                chunker.size, table, size / len(rows),
+                                len(rows) / seconds if seconds else 0)
+                if journal is not None and keys:
+                    state.save_checkpoint(info, table, checkpoint,
+                                          {'last': last, 'rows': copied})
+                if control is not None:
+                    control.wait(len(rows), size)
+                    # The time of a pause isn't the time of the chunk.
+                    started = time.monotonic()
+        if journal is not None:
+            state.save_checkpoint(info, table, checkpoint,
+                                  {'done': True, 'rows': copied})
+        if where == '':
+            logger.info('Copied %s rows of the table %s', copied, table)
+        else:
+            logger.info('Copied %s rows of the table %s where %s',
+                        copied, table, where.strip())
+        return copied
+
+
+def transfer(info, table_done=None, progress=None, control=None):
+    """Transfers the selected tables. The tables are scheduled
+    largest-first across a pool of `info['workers']` workers,
+    each of them copies a table over its own connections.
+    The tables in `info['split']` are split into `info['ranges']`
+    key ranges which are copied concurrently, their secondary
+    indexes are created once all of their ranges have landed.
+    If `info['incremental']` is set, only the rows beyond the last
+    watermark of each eligible table are copied, the new watermarks
+    are saved once the tables are copied.
+    The committed chunks are recorded in a journal, the checkpoints of
+    the tables are cleared once all the tables are copied, if
+    `info['resume']` is set, the chunks of an interrupted transfer
+    aren't copied again.
+    If `info['fast_load']` is set, SQLite is written without
+    fsyncs and all the indexes are created after the rows.
+    If `info['defer_keys']` is set, the MySQL tables are loaded with
+    only their primary keys, the indexes and the foreign keys of
+    each table are created by one `ALTER TABLE` afterwards.
+    The duration of the phases of each table is logged and
+    recorded in the progress.
+    If `info['verify']` is set, every copied table is compared with
+    its source by the checksums of its key ranges, see verify, a
+    mismatch fails the table.
+    The workers wait for the control between the chunks, if
+    `info['max_lag']` or `info['max_threads']` is set, the workers
+    are held while the MySQL server is overloaded, see watch_server.
+    If `info['profile']` or `info['cprofile']` is set, the stages of
+    every chunk are timed and written as a Chrome trace and a summary
+    next to the log file, see profiling.
+    If `info['metrics_port']` or `info['metrics_file']` is set, the
+    progress is published as Prometheus metrics, see metrics.
+    If `info['processes']` is set, the chunks are converted by a pool
+    of that many worker processes, see conversion.
+    If `info['snapshot']` is set, the MySQL tables of a
+    mysql_to_sqlite transfer are read in one consistent snapshot,
+    which is recorded in METADATA_TABLE, see open_snapshot. The chunks
+    of an earlier snapshot aren't resumed.
+
+    Args:
+        info: The dictionary of the transfer options
+          which is collected by transfer_thread.
+        table_done: A function which is called with the name of
+          each copied table and an error string or None.
+        progress: A Progress instance which is updated by the workers.
+        control: A Control instance to cancel, pause or throttle the
+          transfer, or None.
+
+    Raises:
+        TransferError: If at least one of the tables failed.
+        Cancelled: If the transfer is cancelled, the committed chunks
+          are kept in the journal.
+    """
+    from res.logic import profiling
+    started = time.monotonic()
+    tracer = None
+    if info.get('profile') or info.get('cprofile'):
+        tracer = profiling.Tracer(info.get('cprofile'))
+    with profiling.span(tracer, 'schema'):
+        create_tables(info)
+        # The schema of the source is checked once, the copies
+        # and the verification use it as it is.
+        info = dict(info, schema=schema.get_schema(info))
+    setup_logger(info['log'])
+    logger.info('Created the tables in %.1f s', time.monotonic() - started)
+    tasks = []
+    pending = {}
+    deferred = {}
+    tables, estimates = plan(info)
+    if progress is None and (info.get('metrics_port') or
+                             info.get('metrics_file')):
+        progress = Progress()
+    watermarks = {}
+    if info.get('incremental'):
+        watermarks = incremental_watermarks(info, tables)
+    if not info.get('resume') or snapshot(info):
+        state.clear_journal(info, info['tables'])
+    journal = state.load_journal(info)
+    errors = {}
+    cancelled = set()
+    copy_started = {}
+    stopped = threading.Event()
+    if control is None:
+        control = Control()
+    journal_mode = None
+    exporter = None
+    processes = None
+    # The options of the copies, which read through the connections
+    # of the snapshot if there is one.
+    source_info = info
+    snapshot_pool = None
+    metadata = None
+    workers = info['workers']
+    late_verify = False
+    unverified = []
+
+    def copy(table, key_range):
+        copy_started.setdefault(table, time.monotonic())
+        control.wait()
+        with profiling.profile(tracer):
+            return copy_table(source_info, table, key_range, progress,
+                              watermarks.get(table), journal, control,
+                              tracer, processes)
+
+    def finish(table, phases):
+        """Verifies a copied table if it's asked for and reports it."""
+        if info.get('verify') and table not in errors:
+            verified = time.monotonic()
+            try:
+                with profiling.span(tracer, 'verify', table):
+                    result = verify.verify_table(source_info, table)
+                if verify.describe(result):
+                    errors[table] = verify.describe(result)
+                    logger.error('Failed to verify the table %s: %s',
+                                 table, errors[table])
+                else:
+                    logger.info('Verified %s ranges of the table %s',
+                                result['ranges'], table)
+            except Exception as error:
+                errors[table] = str(error)
+                logger.error('Failed to verify the table %s: %s',
+                             table, error)
+            phases['verify'] = time.monotonic() - verified
+        logger.info('Phases of the table %s: %s', table, ', '.join(map(
+            lambda name: '{} {:.1f} s'.format(name, phases[name]),
+            phases)))
+        if progress is not None:
+            for name in phases:
+                progress.phase(table, name, phases[name])
+        if table in watermarks and table not in errors:
+            column, low, high, inclusive = watermarks[table]
+            state.save_watermark(info, table, column, high)
+        if progress is not None:
+            progress.finish(table, errors.get(table))
+        if table_done is not None:
+            table_done(table, errors.get(table))
+
+    try:
+        if fast_load(info):
+            with sqlite_connection(info) as conn:
+                journal_mode = conn.execute(
+                    'PRAGMA journal_mode;').fetchone()[0]
+                if journal_mode.lower() == 'wal':
+                    # WAL is a persistent mode, the connections of the
+                    # workers can't switch to the MEMORY journal in it.
+                    conn.execute('PRAGMA journal_mode = DELETE;')
+        for table in tables:
+            if progress is not None:
+                total = estimates.get(table, (0, 0))[0]
+                if table in watermarks and \
+                        watermarks[table][1] is not None:
+                    # The number of the new rows is unknown.
+                    total = 0
+                progress.start(table, total)
+            ranges = [None]
+            if table in info['split'] and info['ranges'] > 1:
+                ranges = key_ranges(info, table, info['ranges'])
+            if len(ranges) > 1 or fast_load(info) or defer_keys(info):
+                # The indexes of an interrupted transfer are created
+                # again by the converter, they are dropped again but
+                # their statements are kept in the journal, unless
+                # they were already created.
+                checkpoint = '{} indexes'.format(table)
+                statements = drop_indexes(info, table, defer_keys(info))
+                if not journal.get(checkpoint):
+                    journal[checkpoint] = statements
+                    state.save_checkpoint(info, table, checkpoint,
+                                          statements)
+                deferred[table] = journal[checkpoint]
+            pending[table] = len(ranges)
+            for key_range in ranges:
+                tasks.append((table, key_range))
+        if info.get('metrics_port') or info.get('metrics_file'):
+            from res.logic import metrics
+            exporter = metrics.exporter(progress, info)
+        if info.get('processes'):
+            from res.logic import conversion
+            processes = conversion.ConversionPool(info['processes'])
+        if info.get('max_lag') or info.get('max_threads'):
+            threading.Thread(target=watch_server,
+                             args=(info, control, stopped),
+                             daemon=True).start()
+        if snapshot(info):
+            # The verification reads the snapshot as well.
+            snapshot_pool, metadata = open_snapshot(
+                info, info['workers'] + bool(info.get('verify')))
+            source_info = dict(info, pool=snapshot_pool)
+            # A copy holds its connection until the table is copied.
+            workers = max(len(snapshot_pool.connections) -
+                          bool(info.get('verify')), 1)
+            # A single connection is held by the copies, the tables
+            # are verified through it once all of them are copied.
+            late_verify = len(snapshot_pool.connections) == 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for table, key_range in tasks:
+                futures[pool.submit(copy, table, key_range)] = table
+            for future in as_completed(futures):
+                table = futures[future]
+                error = future.exception()
+                if isinstance(error, Cancelled):
+                    cancelled.add(table)
+                elif error is not None and table not in errors:
+                    errors[table] = str(error)
+                    logger.error('Failed to copy the table %s: %s',
+                                 table, error)
+                pending[table] -= 1
+                if pending[table]:
+                    continue
+                if table in cancelled:
+                    # The statements of the dropped indexes stay in the
+                    # journal, they are run when the table is resumed.
+                    logger.info('Cancelled the copy of the table %s', table)
+                    if progress is not None:
+                        progress.finish(table, errors.get(table), True)
+                    if table in errors and table_done is not None:
+                        table_done(table, errors[table])
+                    continue
+                copied = time.monotonic()
+                phases = {'copy': copied - copy_started[table]}
+                if table in deferred:
+                    try:
+                        with profiling.span(tracer, 'indexes', table):
+                            create_indexes(info, deferred[table])
+                        state.save_checkpoint(info, table,
+                                              '{} indexes'.format(table), [])
+                    except Exception as error:
+                        errors.setdefault(table, str(error))
+                        logger.error('Failed to create the indexes of the '
+                                     'table %s: %s', table, error)
+                    phases['indexes'] = time.monotonic() - copied
+                if info.get('verify') and late_verify:
+                    unverified.append((table, phases))
+                    continue
+                finish(table, phases)
+        for table, phases in unverified:
+            finish(table, phases)
+    finally:
+        stopped.set()
+        if snapshot_pool is not None:
+            snapshot_pool.close()
+        if processes is not None:
+            processes.close()
+        if exporter is not None:
+            exporter.stop()
+        if tracer is not None:
+            files = tracer.write(profiling.output_base(info))
+            logger.info('Wrote the profile of the transfer to %s',
+                        ', '.join(files))
+        if journal_mode is not None and journal_mode.lower() == 'wal':
+            with sqlite_connection(info) as conn:
+                conn.execute('PRAGMA journal_mode = WAL;')
+    control.check()
+    if errors:
+        raise TransferError(errors)
+    if metadata is not None:
+        save_metadata(info, metadata)
+    state.clear_journal(info, info['tables'])
+    if info['mode'] == 'mysql_to_sqlite' and info['vacuum']:
+        with sqlite_connection(info) as conn:
+            conn.execute('VACUUM;')
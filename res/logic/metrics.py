@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""Publishes the progress of a running transfer in the text format of
+Prometheus, on a local HTTP endpoint which Prometheus scrapes and/or
+in a file which the textfile collector of node_exporter reads, so a
+long transfer can be followed on the dashboards.
+"""
+
+import http.server
+import os
+import threading
+from res.logic import engine
+
+# The address of the HTTP endpoint, which is only reachable from
+# the local machine unless another address is given.
+METRICS_HOST = '127.0.0.1'
+
+# Seconds between two writes of the metrics file.
+METRICS_INTERVAL = 5
+
+
+def escape(value):
+    """Escapes a label value of the text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+
+def labels(**values):
+    return '{' + ','.join(map(
+        lambda name: '{}="{}"'.format(name, escape(values[name])),
+        sorted(values))) + '}'
+
+
+def number(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def table_status(stats):
+    """Returns the value of the table_finished metric of a table."""
+    if stats['error']:
+        return -1
+    if stats['cancelled']:
+        return -2
+    return int(stats['finished'] is not None)
+
+
+def render(progress, info, running=True):
+    """Returns the metrics of a transfer in the Prometheus text format.
+
+    Args:
+        progress: The engine.Progress instance of the transfer.
+        info: The dictionary of the transfer options.
+        running: False once the transfer has ended.
+    """
+    tables = progress.snapshot()
+    overall = progress.overall(tables)
+    families = []
+
+    def family(name, kind, description, samples):
+        lines = ['# HELP berudele_{} {}'.format(name, description),
+                 '# TYPE berudele_{} {}'.format(name, kind)]
+        for suffix, sample_labels, value in samples:
+            lines.append('berudele_{}{}{} {}'.format(
+                name, suffix, labels(**sample_labels) if sample_labels
+                else '', number(value)))
+        families.append('\n'.join(lines))
+
+    family('transfer_info', 'gauge', 'The direction and the databases of '
+           'the transfer.', [('', {
+               'mode': info['mode'],
+               'database': info['database'],
+               'sqlite_database': info['sqlite_database']}, 1)])
+    family('transfer_running', 'gauge', 'Whether the transfer is running.',
+           [('', {}, int(running))])
+    family('transfer_rows_per_second', 'gauge', 'The committed rows per '
+           'second of all the tables since the first chunk.',
+           [('', {}, overall['rate'])])
+    if overall['remaining'] is not None and running:
+        family('transfer_remaining_seconds', 'gauge', 'The estimated '
+               'seconds until all the tables are copied.',
+               [('', {}, overall['remaining'])])
+    family('rows_read_total', 'counter', 'The rows read from the source.',
+           map(lambda stats: ('', {'table': stats['table']}, stats['read']),
+               tables))
+    family('rows_written_total', 'counter', 'The rows committed to the '
+           'target.', map(lambda stats: (
+               '', {'table': stats['table']}, stats['written']), tables))
+    family('bytes_read_total', 'counter', 'The bytes of the rows read from '
+           'the source.', map(lambda stats: (
+               '', {'table': stats['table']}, stats['bytes']), tables))
+    family('rows_estimated', 'gauge', 'The estimated rows of the table, '
+           '0 if unknown.', map(lambda stats: (
+               '', {'table': stats['table']}, stats['total']), tables))
+    family('table_rows_per_second', 'gauge', 'The committed rows per '
+           'second of the table.', map(lambda stats: (
+               '', {'table': stats['table']}, stats['rate']), tables))
+    family('table_finished', 'gauge', 'Whether the table is copied, -1 if '
+           'it failed, -2 if its copy is cancelled.', map(lambda stats: (
+               '', {'table': stats['table']}, table_status(stats)), tables))
+    family('queue_depth', 'gauge', 'The chunks which wait in the read-ahead '
+           'queue of the table.', map(lambda stats: (
+               '', {'table': stats['table']}, stats['queued']), tables))
+    retries = []
+    for stats in tables:
+        for reason in sorted(stats['retries']):
+            retries.append(('', {'table': stats['table'], 'reason': reason},
+                            stats['retries'][reason]))
+    family('retries_total', 'counter', 'The chunks which are written again, '
+           'e.g. inserted after LOAD DATA failed.', retries)
+    latencies = []
+    for stats in tables:
+        count = 0
+        bounds = list(map(number, engine.LATENCY_BUCKETS)) + ['+Inf']
+        for bound, chunks in zip(bounds, stats['latency']):
+            count += chunks
+            latencies.append(('_bucket', {'table': stats['table'],
+                                          'le': bound}, count))
+        latencies.append(('_sum', {'table': stats['table']},
+                          stats['latency_sum']))
+        latencies.append(('_count', {'table': stats['table']},
+                          stats['chunks']))
+    family('chunk_seconds', 'histogram', 'The seconds to write and commit '
+           'a chunk.', latencies)
+    phases = []
+    for stats in tables:
+        for name in sorted(stats['phases']):
+            phases.append(('', {'table': stats['table'], 'phase': name},
+                           stats['phases'][name]))
+    family('phase_seconds', 'gauge', 'The seconds of the phases of the '
+           'copied tables.', phases)
+    return '\n'.join(families) + '\n'
+
+
+def write_textfile(path, text):
+    """Replaces the metrics file at once, so the collector
+    never reads a half-written file.
+    """
+    temporary = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temporary, 'w', encoding='utf-8') as metrics_file:
+        metrics_file.write(text)
+    os.replace(temporary, path)
+
+
+class Exporter:
+    """Serves and writes the metrics of a transfer while it runs.
+
+    Args:
+        progress: The engine.Progress instance of the transfer.
+        info: The dictionary of the transfer options, the metrics are
+          served on `info['metrics_port']` of `info['metrics_host']`
+          and written to `info['metrics_file']` if they are set.
+
+    Methods:
+        start: Starts the HTTP server and the writer of the file.
+        stop: Writes the final metrics and stops both.
+    """
+
+    def __init__(self, progress, info):
+        self.progress = progress
+        self.info = info
+        self.running = True
+        self.server = None
+        self.stopped = threading.Event()
+        self.writer = None
+
+    def render(self):
+        return render(self.progress, self.info, self.running)
+
+    def start(self):
+        exporter = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type',
+                                 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        if self.info.get('metrics_port'):
+            self.server = http.server.ThreadingHTTPServer(
+                (self.info.get('metrics_host') or METRICS_HOST,
+                 self.info['metrics_port']), Handler)
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever,
+                             daemon=True).start()
+        if self.info.get('metrics_file'):
+            self.writer = threading.Thread(target=self.write, daemon=True)
+            self.writer.start()
+
+    def write(self):
+        while True:
+            write_textfile(self.info['metrics_file'], self.render())
+            if self.stopped.wait(METRICS_INTERVAL):
+                return
+
+    def stop(self):
+        self.running = False
+        self.stopped.set()
+        if self.writer is not None:
+            self.writer.join()
+            # The final values stay in the file for the collector.
+            write_textfile(self.info['metrics_file'], self.render())
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def exporter(progress, info):
+    """Returns a started Exporter if the metrics are enabled,
+    otherwise None.
+    """
+    if not info.get('metrics_port') and not info.get('metrics_file'):
+        return None
+    metrics = Exporter(progress, info)
+    metrics.start()
+    return metrics
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+from PyQt5 import QtCore, QtWidgets
+from res.pyui import options_ui
+from res.logic import engine
+from res.logic import messages
+
+# The running checks of the row filters, which are kept until they
+# finish, even if their dialog is closed.
+checks = set()
+
+
+def init(dialog, self, parent, table):
+    """Initializing the options dialog of a table.
+    Args:
+        parent: An instance of transfer_ui.Ui_dialog()
+        table: The selected table from the tables_treeWidget.
+    """
+    self.table_groupBox.setTitle(table)
+    dialog.setModal(True)
+    dialog.setWindowModality(QtCore.Qt.ApplicationModal)
+    self.filter_lineEdit.setText(parent.table_filters.get(table, ''))
+    selected = parent.table_columns.get(table)
+    keys = parent.schema.primary_key(table)
+    for column in parent.schema.columns[table]:
+        item = QtWidgets.QListWidgetItem(column[0])
+        if selected is None or column[0] in selected or column[0] in keys:
+            item.setCheckState(QtCore.Qt.Checked)
+        else:
+            item.setCheckState(QtCore.Qt.Unchecked)
+        if column[0] in keys:
+            # The primary key is always transferred.
+            item.setFlags(item.flags() & ~QtCore.Qt.ItemIsUserCheckable)
+        self.columns_listWidget.addItem(item)
+    self.buttonBox.accepted.connect(
+        lambda: save_options(dialog, self, parent, table)
+        )
+    self.buttonBox.rejected.connect(dialog.reject)
+    self.buttonBox.button(QtWidgets.QDialogButtonBox.Reset).clicked.connect(
+        lambda: reset_options(dialog, self)
+        )
+
+
+def reset_options(dialog, self):
+    """Clears the row filter and checks all the columns."""
+    self.filter_lineEdit.clear()
+    for row in range(self.columns_listWidget.count()):
+        self.columns_listWidget.item(row).setCheckState(QtCore.Qt.Checked)
+
+
+def save_options(dialog, self, parent, table):
+    """Checks the row filter on the source database and saves
+    the options of the table into the transfer dialog. The filter
+    is checked in a thread, as it queries the source database.
+
+    Connected to:
+        The accepted signal of the buttonBox.
+    """
+    predicate = self.filter_lineEdit.text().strip()
+    columns = []
+    for row in range(self.columns_listWidget.count()):
+        item = self.columns_listWidget.item(row)
+        if item.checkState() == QtCore.Qt.Checked:
+            columns.append(item.text())
+    if predicate == '':
+        apply_options(dialog, self, parent, table, predicate, columns)
+        return
+    from res.logic.transfer import connection_info
+    self.buttonBox.setDisabled(True)
+    thread = CheckFilter(connection_info(dialog, parent), table, predicate)
+    self.check_filter_thread = thread
+    checks.add(thread)
+    thread.finished.connect(lambda: checks.discard(thread))
+    thread.result.connect(
+        lambda: apply_options(dialog, self, parent, table, predicate,
+                              columns)
+        )
+    thread.error.connect(lambda error: filter_error(dialog, self, error))
+    thread.start()
+
+
+def filter_error(dialog, self, error):
+    self.buttonBox.setDisabled(False)
+    message = 'The row filter is not valid:\n{}'.format(error)
+    messages.error(dialog, 'Error...', message)
+
+
+def apply_options(dialog, self, parent, table, predicate, columns):
+    """Saves the checked options of the table into the transfer
+    dialog and closes the options dialog.
+    """
+    if not dialog.isVisible():
+        # The dialog is closed while the row filter was checked.
+        return
+    if predicate != '':
+        parent.table_filters[table] = predicate
+    else:
+        parent.table_filters.pop(table, None)
+    if len(columns) < self.columns_listWidget.count():
+        parent.table_columns[table] = columns
+    else:
+        parent.table_columns.pop(table, None)
+    dialog.accept()
+
+
+class CheckFilter(QtCore.QThread):
+    """Checks the row filter of a table on the source database,
+    see engine.check_filter.
+
+    Args:
+        info: The options which describe the databases.
+        table: The name of the table.
+        predicate: The row filter.
+
+    Signals:
+        result: Emits when the row filter is valid.
+        error: Emits a string when the row filter is not valid.
+    """
+    result = QtCore.pyqtSignal()
+    error = QtCore.pyqtSignal(str)
+
+    def __init__(self, info, table, predicate):
+        super().__init__()
+        self.info = info
+        self.table = table
+        self.predicate = predicate
+
+    def run(self):
+        try:
+            engine.check_filter(self.info, self.table, self.predicate)
+            self.result.emit()
+        except Exception as error:
+            self.error.emit(str(error))
+
+
+def run_options(parent_dialog, parent, table):
+    dialog = QtWidgets.QDialog(parent=parent_dialog)
+    ui = options_ui.Ui_dialog()
+    ui.setupUi(dialog)
+    init(dialog, ui, parent, table)
+    dialog.show()
+    return dialog.exec_()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import queue
+import threading
+import time
+
+# Seconds that a connection may stay idle before it's
+# pinged again when it's handed out.
+PING_AFTER = 30
+
+
+class ConnectionPool:
+    """A small thread-safe pool of MySQL connections which are
+    shared by the table list, the previews and the transfers, so
+    they don't pay the TCP and authentication handshakes again.
+    A connection is handed out to one thread at a time and is
+    never shared between threads while it's in use.
+
+    Args:
+        connect: A function which opens a new MySQL connection.
+        size: The maximum number of open connections, the threads
+          which ask for more connections wait for a released one.
+
+    Methods:
+        acquire: Returns an idle connection or opens a new one.
+        release: Gives a connection back to the pool.
+        connection: A context manager around acquire/release.
+        close: Closes the idle connections.
+    """
+
+    def __init__(self, connect, size):
+        self.connect = connect
+        self.size = size
+        self.idle = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        self.slots.acquire()
+        try:
+            while True:
+                with self.lock:
+                    if self.idle == []:
+                        break
+                    conn, released = self.idle.pop()
+                if time.monotonic() - released < PING_AFTER:
+                    return conn
+                if self.ping(conn):
+                    return conn
+            return self.connect()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def ping(self, conn):
+        """Validates an idle connection, a broken
+        connection is closed and dropped.
+        """
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            with contextlib.suppress(Exception):
+                conn.close()
+            return False
+
+    def release(self, conn):
+        """Resets the session of the connection, which ends its open
+        transaction, so the next thread doesn't read from an old
+        snapshot or inherit its session variables, and puts it back.
+        """
+        try:
+            conn.reset_session()
+        except Exception:
+            with contextlib.suppress(Exception):
+                conn.close()
+        else:
+            with self.lock:
+                self.idle.append((conn, time.monotonic()))
+        finally:
+            self.slots.release()
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self.lock:
+            idle = self.idle
+            self.idle = []
+        for conn, released in idle:
+            with contextlib.suppress(Exception):
+                conn.close()
+
+
+class SnapshotPool:
+    """A fixed set of MySQL connections which read the database at
+    the same point in time, see engine.open_snapshot. It hands them
+    out to the workers of a transfer like a ConnectionPool, but a
+    released connection keeps its transaction and its snapshot, and
+    a closed one can't be replaced.
+
+    Args:
+        connections: The connections in their snapshot transactions.
+        timeout: Seconds to wait for an idle connection, or None
+          to wait forever.
+
+    Methods:
+        connection: A context manager which waits for an idle connection.
+        close: Ends the transactions and closes the connections.
+    """
+
+    def __init__(self, connections, timeout=None):
+        self.connections = list(connections)
+        self.timeout = timeout
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.holders = {}
+        for conn in self.connections:
+            self.idle.put(conn)
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Hands out an idle connection.
+
+        Raises:
+            RuntimeError: If the calling thread already holds all of
+              its connections, which would wait forever, or if no
+              connection is released within the timeout.
+        """
+        thread = threading.get_ident()
+        with self.lock:
+            held = self.holders.get(thread, 0)
+        if held == len(self.connections):
+            raise RuntimeError('The thread already holds all the '
+                               'connections of the snapshot.')
+        try:
+            conn = self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError('No connection of the snapshot was released '
+                               'in {} seconds.'.format(self.timeout))
+        with self.lock:
+            self.holders[thread] = held + 1
+        try:
+            yield conn
+        finally:
+            with self.lock:
+                self.holders[thread] -= 1
+                if self.holders[thread] == 0:
+                    del self.holders[thread]
+            self.idle.put(conn)
+
+    def close(self):
+        for conn in self.connections:
+            with contextlib.suppress(Exception):
+                conn.rollback()
+            with contextlib.suppress(Exception):
+                conn.close()
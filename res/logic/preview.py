@@ -4,17 +4,25 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 from res.pyui import preview_ui
 from res.logic import messages
 
+# The number of rows which are fetched each time the view
+# scrolls to the end of the loaded rows.
+PAGE_SIZE = 256
+
+# The threads of the fetched pages, which are kept until they finish,
+# even if their dialog is closed.
+fetches = set()
+
 
 def init(dialog, self, parent, table):
     """Initializing the preview dialog.
     Args:
         parent: An instance of transfer_ui.Ui_dialog()
-        table: The selected table from the tables_listWidget.
+        table: The selected table from the tables_treeWidget.
     """
     self.table_groupBox.setTitle(table)
     self.mode = parent.mode
-    self.mysql_conn = parent.mysql_conn
-    self.mysql_cur = parent.mysql_cur
+    self.mysql_pool = parent.mysql_pool
+    self.schema = parent.schema
     self.sqlite_conn = parent.sqlite_conn
     self.sqlite_cur = parent.sqlite_cur
     dialog.setModal(True)
@@ -23,33 +31,16 @@ def init(dialog, self, parent, table):
 
 
 def fetch_table(dialog, self, table):
-    """Based on the chosen table name, fetches the
-    corresponding data. I used a separate thread to
-    fetch data from the MySQL database, as it might be
-    an IO-bound process.
+    """Based on the chosen table name, reads the column names and
+    the key columns of the table from the schema cache, the rows are
+    fetched page by page by the TableModel as the user scrolls.
     """
-    sql_fetch_all = 'select * from {};'.format(table)
-    if self.mode == 'sqlite_to_mysql':
-        sql = 'SELECT name FROM PRAGMA_TABLE_INFO("{}");'.format(table)
-        self.sqlite_cur.execute(sql)
-        headers = self.sqlite_cur.fetchall()
-        self.sqlite_cur.execute(sql_fetch_all)
-        rows = self.sqlite_cur.fetchall()
-        load_table(dialog, self, (headers, rows))
+    headers = list(map(lambda column: column[0], self.schema.columns[table]))
+    if table in self.schema.rowid:
+        keys = ['rowid']
     else:
-        sql = 'SHOW COLUMNS FROM {};'.format(table)
-        self.fetch_table_thread = FetchTable(
-            self.mysql_cur,
-            sql,
-            sql_fetch_all
-            )
-        self.fetch_table_thread.start()
-        self.fetch_table_thread.result.connect(
-            lambda result: load_table(dialog, self, result)
-            )
-        self.fetch_table_thread.error.connect(
-            lambda error: thread_error_handler(dialog, self, error)
-            )
+        keys = self.schema.primary_key(table)
+    load_table(dialog, self, table, (headers, keys))
 
 
 def thread_error_handler(dialog, self, error):
@@ -59,60 +50,204 @@ def thread_error_handler(dialog, self, error):
     messages.error(dialog, 'Error...', error)
 
 
-def load_table(dialog, self, result):
-    """Loads the result into the table_tableWidget.
+def load_table(dialog, self, table, result):
+    """Creates a TableModel for the table and sets it
+    as the model of the table_tableView.
     Args:
-        result: A list of the database rows.
+        result: A tuple of the column names and the names of the
+          key columns which are used to paginate the rows.
     """
     headers = result[0]
-    rows = result[1]
-    headers = list(map(lambda header: header[0], headers))
-    self.table_tableWidget.setColumnCount(len(headers))
-    self.table_tableWidget.setHorizontalHeaderLabels(headers)
-    rows = list(map(lambda row: list(row), rows))
-    row_count = len(rows)
-    self.table_tableWidget.setRowCount(row_count)
-    for row in range(row_count):
-        for column in range(len(headers)):
-            text = str(rows[row][column])
-            item = QtWidgets.QTableWidgetItem(text)
-            self.table_tableWidget.setItem(row, column, item)
-
-
-class FetchTable(QtCore.QThread):
-    """Fetches the headers and the rows of a table.
+    keys = result[1]
+
+    def fetch_page(sql, params, callback, failed):
+        if self.mode == 'sqlite_to_mysql':
+            try:
+                self.sqlite_cur.execute(sql, params)
+                rows = self.sqlite_cur.fetchall()
+            except Exception as error:
+                failed()
+                thread_error_handler(dialog, self, str(error))
+                return
+            callback(rows)
+        else:
+            fetch_mysql_page(dialog, self, sql, params, callback, failed)
+
+    self.table_model = TableModel(self.mode, table, headers, keys,
+                                  fetch_page)
+    self.table_tableView.setModel(self.table_model)
+
+
+def fetch_mysql_page(dialog, self, sql, params, callback, failed):
+    """Fetches a page of the rows of a MySQL table in
+    a separate thread and passes the rows to the callback,
+    or calls `failed` and shows the error.
+    """
+    thread = FetchPage(self.mysql_pool, sql, params)
+    fetches.add(thread)
+    thread.finished.connect(lambda: fetches.discard(thread))
+    thread.result.connect(callback)
+    thread.error.connect(failed)
+    thread.error.connect(
+        lambda error: thread_error_handler(dialog, self, error)
+        )
+    thread.start()
+
+
+def page_sql(mode, table, keys, last_key, offset):
+    """Builds the SQL command which fetches the next page of a table.
+    The rows are paginated by the key columns (keyset pagination), so
+    fetching a page costs the same at the start and the end of a huge
+    table, the tables without any key are paginated by OFFSET.
 
     Args:
-        cur: The cursor of the MySQL connection.
-        header_sql: The SQL command to fetch the column names.
-        rows_sql: The SQL command to fetch the rows of the table.
+        keys: The names of the key columns, `rowid` or
+          the columns of the primary key.
+        last_key: The key of the last fetched row or None.
+        offset: The number of the fetched rows.
+
+    Returns:
+        A tuple of the SQL command and its parameters.
+    """
+    if mode == 'sqlite_to_mysql':
+        quote = '"{}"'
+        placeholder = '?'
+    else:
+        quote = '`{}`'
+        placeholder = '%s'
+    table = quote.format(table)
+    if keys == []:
+        sql = 'SELECT * FROM {} LIMIT {} OFFSET {};'
+        return sql.format(table, PAGE_SIZE, offset), ()
+    if keys == ['rowid']:
+        columns = ['rowid']
+    else:
+        columns = list(map(lambda key: quote.format(key), keys))
+    columns = ', '.join(columns)
+    where = ''
+    params = ()
+    if last_key is not None:
+        placeholders = ', '.join([placeholder] * len(keys))
+        where = 'WHERE ({}) > ({}) '.format(columns, placeholders)
+        params = tuple(last_key)
+    sql = 'SELECT {0}, {1}.* FROM {1} {2}ORDER BY {0} LIMIT {3};'
+    return sql.format(columns, table, where, PAGE_SIZE), params
+
 
-    Methods:
-        run: An overridden method, which runs by calling the
-          start method on an instance of the QThread class.
+class TableModel(QtCore.QAbstractTableModel):
+    """A read-only model which loads the rows of a table
+    lazily, a page at a time, when the view asks for more
+    rows by calling canFetchMore/fetchMore. So opening a
+    preview costs one page of memory and I/O, regardless
+    of the size of the table.
+
+    Args:
+        mode: `sqlite_to_mysql` or `mysql_to_sqlite`.
+        table: The name of the table.
+        headers: A list of the column names.
+        keys: A list of the key columns which are used
+          to paginate the rows.
+        fetch_page: A function which executes an SQL command with
+          its parameters and passes the rows to a callback, or calls
+          another callback if it failed.
+    """
+
+    def __init__(self, mode, table, headers, keys, fetch_page):
+        super().__init__()
+        self.mode = mode
+        self.table = table
+        self.headers = headers
+        self.keys = keys
+        self.fetch_page = fetch_page
+        self.rows = []
+        self.last_key = None
+        self.fetching = False
+        self.exhausted = False
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if index.isValid() and role == QtCore.Qt.DisplayRole:
+            return str(self.rows[index.row()][index.column()])
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal \
+           and role == QtCore.Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self.fetching and not self.exhausted
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or self.fetching:
+            return
+        self.fetching = True
+        sql, params = page_sql(self.mode, self.table, self.keys,
+                               self.last_key, len(self.rows))
+        self.fetch_page(sql, params, self.append_rows, self.fetch_failed)
+
+    def fetch_failed(self, *args):
+        """Lets the view ask for the page again."""
+        self.fetching = False
+
+    def append_rows(self, rows):
+        """Appends a fetched page to the model."""
+        self.fetching = False
+        if len(rows) < PAGE_SIZE:
+            self.exhausted = True
+        if rows == []:
+            return
+        key_count = len(self.keys)
+        if key_count:
+            self.last_key = rows[-1][:key_count]
+            rows = list(map(lambda row: row[key_count:], rows))
+        first = len(self.rows)
+        self.beginInsertRows(QtCore.QModelIndex(), first,
+                             first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+
+class FetchPage(QtCore.QThread):
+    """Fetches a page of the rows of a table.
+
+    Args:
+        mysql_pool: The pool of the MySQL connections.
+        sql: The SQL command which is built by page_sql.
+        params: The parameters of the SQL command.
 
     Signals:
-        result: A tuple with two lists, the first one contains the
-          names of the columns and the second one, contains the rows of the
-          table => ([h0, h1, ..., hN], [(c1, c2, ..., cN)])
+        result: A list of the fetched rows.
         error: A string that reports the problems of the process.
     """
-    result = QtCore.pyqtSignal(tuple)
+    result = QtCore.pyqtSignal(list)
     error = QtCore.pyqtSignal(str)
 
-    def __init__(self, cur, header_sql, rows_sql):
+    def __init__(self, mysql_pool, sql, params):
         super().__init__()
-        self.cur = cur
-        self.header_sql = header_sql
-        self.rows_sql = rows_sql
+        self.mysql_pool = mysql_pool
+        self.sql = sql
+        self.params = params
 
     def run(self):
         try:
-            self.cur.execute(self.header_sql)
-            headers = self.cur.fetchall()
-            self.cur.execute(self.rows_sql)
-            rows = self.cur.fetchall()
-            self.result.emit((headers, rows))
+            with self.mysql_pool.connection() as conn:
+                cur = conn.cursor()
+                cur.execute(self.sql, self.params)
+                rows = cur.fetchall()
+            self.result.emit(rows)
         except Exception as error:
             self.error.emit(str(error))
 
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Times the stages of a transfer, reading the chunks from the source,
+converting them, writing and committing them into the target, and
+creating the indexes, per chunk and per table. The spans are written
+as a Chrome trace, which opens in chrome://tracing or
+https://ui.perfetto.dev, with a summary table next to the log file.
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+# The stages which are shown in the columns of the summary,
+# the other spans (e.g. verify) are added after them.
+STAGES = ('read', 'convert', 'write', 'commit', 'indexes')
+
+# The functions of the cProfile statistics in the summary.
+PROFILE_LINES = 30
+
+# Since Python 3.12 cProfile profiles all the threads through
+# sys.monitoring, which allows only one profiler in the process.
+SHARED_PROFILER = sys.version_info >= (3, 12)
+
+logger = logging.getLogger('Berudele')
+
+
+class Tracer:
+    """Collects the spans of the stages from the workers.
+
+    Args:
+        cprofile: Profiles every copy with cProfile as well,
+          see profile.
+
+    Methods:
+        span: A context manager which times a stage of a table.
+        profile: A context manager which runs cProfile in the
+          calling thread if cprofile is set, or one profiler of
+          the process while any of the threads is in it.
+        write: Writes the trace, the summary and the statistics.
+    """
+
+    def __init__(self, cprofile=False):
+        self.cprofile = cprofile
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.events = []
+        self.threads = {}
+        self.profiles = []
+        self.profiler = None
+        self.profiling = 0
+        self.unavailable = False
+
+    @contextlib.contextmanager
+    def span(self, name, table, **args):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            thread = threading.current_thread()
+            with self.lock:
+                self.threads[thread.ident] = thread.name
+                self.events.append((name, table, thread.ident,
+                                    started - self.started,
+                                    finished - started, args))
+
+    @contextlib.contextmanager
+    def profile(self):
+        if not self.cprofile:
+            yield
+            return
+        if SHARED_PROFILER:
+            with self.shared_profile():
+                yield
+            return
+        profiler = self.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                with self.lock:
+                    self.profiles.append(profiler)
+
+    @contextlib.contextmanager
+    def shared_profile(self):
+        with self.lock:
+            if self.profiling == 0:
+                self.profiler = self.enable()
+            self.profiling += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.profiling -= 1
+                if self.profiling == 0 and self.profiler is not None:
+                    self.profiler.disable()
+                    self.profiles.append(self.profiler)
+                    self.profiler = None
+
+    def enable(self):
+        """Returns an enabled profiler, or None if another profiler
+        (e.g. of a debugger) is active, then the copies are only
+        timed by their spans.
+        """
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as error:
+            if not self.unavailable:
+                self.unavailable = True
+                logger.warning('Profiling without cProfile: %s', error)
+            return None
+        return profiler
+
+    def trace(self):
+        """Returns the spans in the Chrome trace event format."""
+        events = []
+        with self.lock:
+            for ident, name in self.threads.items():
+                events.append({'name': 'thread_name', 'ph': 'M',
+                               'pid': os.getpid(), 'tid': ident,
+                               'args': {'name': name}})
+            for name, table, ident, started, seconds, args in self.events:
+                events.append({
+                    'name': name,
+                    'cat': table or 'transfer',
+                    'ph': 'X',
+                    'ts': round(started * 1000000),
+                    'dur': round(seconds * 1000000),
+                    'pid': os.getpid(),
+                    'tid': ident,
+                    'args': dict(args, table=table)
+                    })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def totals(self):
+        """Returns a dictionary of the tables and the dictionaries of
+        their stages and (spans, seconds), the spans of the whole
+        transfer are under None.
+        """
+        totals = {}
+        with self.lock:
+            for name, table, ident, started, seconds, args in self.events:
+                stages = totals.setdefault(table, {})
+                spans, total = stages.get(name, (0, 0))
+                stages[name] = (spans + 1, total + seconds)
+        return totals
+
+    def summary(self):
+        """Returns the totals of the stages of every table as a text
+        table. The reads run ahead of the writes in another thread,
+        so the stages of a table may add up to more than its copy.
+        """
+        totals = self.totals()
+        names = list(STAGES)
+        for stages in totals.values():
+            for name in sorted(stages):
+                if name not in names:
+                    names.append(name)
+        tables = sorted(filter(lambda table: table is not None, totals),
+                        key=lambda table: -sum(map(
+                            lambda stage: stage[1], totals[table].values())))
+        width = max([len('Table')] + list(map(len, tables)))
+        lines = ['{:<{}}'.format('Table', width) + ''.join(map(
+            lambda name: '{:>12}'.format(name), names))]
+        if None in totals:
+            tables.append(None)
+        for table in tables:
+            cells = []
+            for name in names:
+                spans, seconds = totals[table].get(name, (0, 0))
+                cells.append('{:>12}'.format(
+                    '{:.3f} s'.format(seconds) if spans else '-'))
+            lines.append('{:<{}}'.format(table or '(transfer)', width) +
+                         ''.join(cells))
+        return '\n'.join(lines) + '\n'
+
+    def statistics(self):
+        """Returns the merged cProfile statistics of
+        the copies, or None if cprofile isn't set.
+        """
+        with self.lock:
+            profiles = list(self.profiles)
+        if profiles == []:
+            return None
+        return pstats.Stats(*profiles)
+
+    def write(self, base):
+        """Writes `base.trace.json`, `base.profile.txt` and,
+        with cprofile, `base.prof` which pstats and snakeviz read.
+
+        Returns:
+            The list of the written files.
+        """
+        files = [base + '.trace.json', base + '.profile.txt']
+        with open(files[0], 'w', encoding='utf-8') as trace_file:
+            json.dump(self.trace(), trace_file)
+        text = self.summary()
+        statistics = self.statistics()
+        if statistics is not None:
+            files.append(base + '.prof')
+            statistics.dump_stats(files[-1])
+            output = io.StringIO()
+            statistics.stream = output
+            statistics.sort_stats('cumulative').print_stats(PROFILE_LINES)
+            text += '\n' + output.getvalue()
+        with open(files[1], 'w', encoding='utf-8') as summary_file:
+            summary_file.write(text)
+        return files
+
+
+def span(tracer, name, table=None, **args):
+    """Returns tracer.span, or a context manager which does
+    nothing if there is no tracer.
+    """
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.span(name, table, **args)
+
+
+def profile(tracer):
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.profile()
+
+
+def output_base(info):
+    """Returns the path of the profiling files without their
+    extensions, next to the log file, or next to the SQLite
+    database if there is no log file.
+    """
+    return os.path.splitext(info['log'] or info['sqlite_database'])[0]
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import threading
+import time
+from res.logic import engine
+from res.logic import state
+
+# The loaded schemas, by the pair of databases of state.database_pair.
+cache = {}
+lock = threading.Lock()
+
+# Seconds during which a loaded schema is used without checking
+# its version again.
+SCHEMA_TTL = 5
+
+
+class Schema:
+    """The metadata of the tables of the source database, which is
+    loaded at once and shared by the table list, the previews and
+    the planning of the transfers.
+
+    Attributes:
+        version: A value which changes when the schema changes,
+          see schema_version.
+        pair: The pair of databases of state.database_pair.
+        checked: The time.monotonic of the last check of the version.
+        tables: A sorted list of the table (and view) names.
+        columns: A dictionary of the tables and their lists of
+          (name, type, key, extra) columns, key is the position of
+          the column in the primary key, zero if it's not in it.
+        indexes: A dictionary of the tables and their dictionaries
+          of the index names and their lists of columns.
+        estimates: A dictionary of the tables which contain rows
+          and their estimated (rows, bytes).
+        rowid: A set of the SQLite tables with a rowid.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.pair = None
+        self.checked = time.monotonic()
+        self.tables = []
+        self.columns = {}
+        self.indexes = {}
+        self.estimates = {}
+        self.rowid = set()
+
+    def primary_key(self, table):
+        """Returns the names of the primary key columns in order."""
+        keys = filter(lambda column: column[2], self.columns.get(table, []))
+        keys = sorted(keys, key=lambda column: column[2])
+        return list(map(lambda column: column[0], keys))
+
+
+def get_schema(info, refresh=False):
+    """Returns the schema of the source database from the cache.
+    The schema is loaded again if `refresh` is set or its version
+    has changed, the version is checked at most once in SCHEMA_TTL
+    seconds. A transfer passes its schema down in `info['schema']`,
+    which is used without checking the version.
+    """
+    key = state.database_pair(info)
+    schema = info.get('schema')
+    if not refresh and schema is not None and schema.pair == key:
+        return schema
+    with lock:
+        schema = cache.get(key)
+        if not refresh and schema is not None and \
+                time.monotonic() - schema.checked < SCHEMA_TTL:
+            return schema
+    version = schema_version(info)
+    with lock:
+        schema = cache.get(key)
+        if refresh or schema is None or schema.version != version:
+            if info['mode'] == 'sqlite_to_mysql':
+                schema = load_sqlite_schema(info, version)
+            else:
+                schema = load_mysql_schema(info, version)
+            schema.pair = key
+            cache[key] = schema
+        schema.checked = time.monotonic()
+        return schema
+
+
+def schema_version(info):
+    """Returns a value which changes with the schema, the schema
+    version of SQLite, or the number of the columns and the indexes,
+    the last creation time of the tables and a checksum of the
+    columns of MySQL, which changes with an in-place ALTER TABLE.
+    """
+    if info['mode'] == 'sqlite_to_mysql':
+        with engine.sqlite_connection(info) as conn:
+            return conn.execute('PRAGMA schema_version;').fetchone()[0]
+    with engine.mysql_connection(info) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            'SELECT (SELECT COUNT(*) FROM information_schema.COLUMNS '
+            'WHERE TABLE_SCHEMA = DATABASE()), '
+            '(SELECT COUNT(*) FROM information_schema.STATISTICS '
+            'WHERE TABLE_SCHEMA = DATABASE()), '
+            '(SELECT MAX(CREATE_TIME) FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE()), '
+            '(SELECT SUM(CRC32(CONCAT_WS(0x1f, TABLE_NAME, COLUMN_NAME, '
+            'ORDINAL_POSITION, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, EXTRA))) '
+            'FROM information_schema.COLUMNS '
+            'WHERE TABLE_SCHEMA = DATABASE());'
+            )
+        return str(cur.fetchone())
+
+
+def load_sqlite_schema(info, version):
+    schema = Schema(version)
+    with engine.sqlite_connection(info) as conn:
+        sql = 'SELECT m.name, p.name, p.type, p.pk FROM sqlite_master AS m '
+        sql += 'JOIN PRAGMA_TABLE_INFO(m.name) AS p '
+        sql += "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite\\_%' "
+        sql += "ESCAPE '\\' AND m.name != ? ORDER BY m.name, p.cid;"
+        rows = conn.execute(sql, (engine.METADATA_TABLE,)).fetchall()
+        for table, name, column_type, key in rows:
+            if table not in schema.columns:
+                schema.tables.append(table)
+                schema.columns[table] = []
+                schema.indexes[table] = {}
+            schema.columns[table].append((name, column_type, key, ''))
+        sql = 'SELECT m.name, l.name, i.name FROM sqlite_master AS m '
+        sql += 'JOIN PRAGMA_INDEX_LIST(m.name) AS l '
+        sql += 'JOIN PRAGMA_INDEX_INFO(l.name) AS i '
+        sql += "WHERE m.type = 'table' ORDER BY m.name, l.name, i.seqno;"
+        for table, index, column in conn.execute(sql).fetchall():
+            if table in schema.indexes:
+                schema.indexes[table].setdefault(index, []).append(column)
+        sizes = {}
+        try:
+            sql = 'SELECT name, SUM(pgsize) FROM dbstat GROUP BY name;'
+            sizes = dict(conn.execute(sql).fetchall())
+        except sqlite3.Error:
+            # SQLite is compiled without the dbstat virtual table.
+            pass
+        for table in schema.tables:
+            rows = 0
+            if engine.sqlite_has_rowid(conn, table):
+                schema.rowid.add(table)
+                sql = 'SELECT MAX(rowid) - MIN(rowid) + 1 FROM "{}";'
+                rows = conn.execute(sql.format(table)).fetchone()[0]
+            schema.estimates[table] = (rows or 0, sizes.get(table) or 0)
+    return schema
+
+
+def load_mysql_schema(info, version):
+    """Loads the columns of all the tables with one query and their
+    indexes with another one, instead of two queries per table.
+    """
+    schema = Schema(version)
+    with engine.mysql_connection(info) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            'SELECT c.TABLE_NAME, t.TABLE_TYPE, t.TABLE_ROWS, t.DATA_LENGTH, '
+            'c.COLUMN_NAME, c.DATA_TYPE, c.EXTRA '
+            'FROM information_schema.COLUMNS AS c '
+            'JOIN information_schema.TABLES AS t '
+            'ON t.TABLE_SCHEMA = c.TABLE_SCHEMA '
+            'AND t.TABLE_NAME = c.TABLE_NAME '
+            'WHERE c.TABLE_SCHEMA = DATABASE() '
+            'ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION;'
+            )
+        for table, table_type, rows, size, name, column_type, extra \
+                in cur.fetchall():
+            if table not in schema.columns:
+                schema.tables.append(table)
+                schema.columns[table] = []
+                schema.indexes[table] = {}
+                if table_type == 'BASE TABLE':
+                    schema.estimates[table] = (rows or 0, size or 0)
+            schema.columns[table].append([name, column_type, 0, extra])
+        cur.execute(
+            'SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, SEQ_IN_INDEX '
+            'FROM information_schema.STATISTICS '
+            'WHERE TABLE_SCHEMA = DATABASE() '
+            'ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX;'
+            )
+        for table, index, column, position in cur.fetchall():
+            if table not in schema.indexes:
+                continue
+            schema.indexes[table].setdefault(index, []).append(column)
+            if index != 'PRIMARY':
+                continue
+            for columns in schema.columns[table]:
+                if columns[0] == column:
+                    columns[2] = position
+    for table in schema.tables:
+        schema.columns[table] = list(map(tuple, schema.columns[table]))
+    return schema
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+# The root directory of Berudele, where main.py is.
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+
+def profile_imports(module):
+    """Imports a module in a fresh interpreter with `-X importtime`,
+    so the import of every module is timed from a cold start.
+
+    Args:
+        module: The name of the module, e.g. `main`.
+
+    Returns:
+        A list of (package, modules, milliseconds) tuples, the time of
+        a package is the sum of the times of its own modules, without
+        their dependencies, sorted by the time.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import {}'.format(module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+        )
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        if not self_time.strip().isdigit():
+            # The header of the table.
+            continue
+        package = name.strip().split('.')[0]
+        modules, milliseconds = imports.get(package, (0, 0))
+        imports[package] = (modules + 1, milliseconds + int(self_time) / 1000)
+    imports = map(lambda item: (item[0],) + item[1], imports.items())
+    return sorted(imports, key=lambda item: item[2], reverse=True)
+
+
+def print_imports(imports, limit=20):
+    """Prints the import-time breakdown which is returned
+    by profile_imports.
+    """
+    print('{:<32}{:>10}{:>12}'.format('Package', 'Modules', 'Time (ms)'))
+    for package, modules, milliseconds in imports[:limit]:
+        print('{:<32}{:>10}{:>12.1f}'.format(package, modules, milliseconds))
+    total = sum(map(lambda item: item[2], imports))
+    print('{:<32}{:>10}{:>12.1f}'.format(
+        'Total', sum(map(lambda item: item[1], imports)), total))
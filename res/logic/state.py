@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import threading
+
+# The file which remembers the watermarks of the incremental
+# transfers between the runs.
+STATE_FILE = os.path.join(os.path.expanduser('~'), '.berudele', 'state.json')
+
+# The directory of the journals of the interrupted transfers, one
+# file per pair of databases, where the checkpoints are appended.
+JOURNAL_DIRECTORY = os.path.join(os.path.expanduser('~'), '.berudele',
+                                 'journals')
+
+lock = threading.Lock()
+
+
+def database_pair(info):
+    """Returns the key of the pair of databases and the direction
+    of a transfer, the watermarks of a table are only reused for
+    the same SQLite file, MySQL database and mode.
+    """
+    return '{} {} {}@{}:{}/{}'.format(
+        info['mode'],
+        os.path.abspath(info['sqlite_database']),
+        info['username'],
+        info['host'],
+        info['port'],
+        info['database']
+        )
+
+
+def read_state():
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(state):
+    """Writes the state into a temporary file and replaces the state
+    file with it, so an interrupted write doesn't lose the watermarks.
+    """
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    temporary = STATE_FILE + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as state_file:
+        json.dump(state, state_file, indent=1, sort_keys=True)
+    os.replace(temporary, STATE_FILE)
+
+
+def section(state, name, info):
+    """Returns the part of the state of a pair of databases."""
+    return state.setdefault(name, {}).setdefault(database_pair(info), {})
+
+
+def load_watermarks(info):
+    """Returns a dictionary of the table names and their last
+    watermarks, {table: {'column': column, 'value': value}}.
+    """
+    with lock:
+        return section(read_state(), 'watermarks', info)
+
+
+def save_watermark(info, table, column, value):
+    """Remembers the highest value of the watermark column
+    which has been copied. The integers are kept as they are,
+    the dates and the other values are kept as strings, which
+    both databases compare in the same order.
+    """
+    if not isinstance(value, int):
+        value = str(value)
+    with lock:
+        state = read_state()
+        watermarks = section(state, 'watermarks', info)
+        watermarks[table] = {'column': column, 'value': value}
+        write_state(state)
+
+
+def journal_file(info):
+    """Returns the path of the journal of a pair of databases."""
+    name = hashlib.sha1(database_pair(info).encode('utf-8')).hexdigest()
+    return os.path.join(JOURNAL_DIRECTORY, name + '.jsonl')
+
+
+def read_journal(info):
+    """Returns the (table, checkpoint, value) entries of the journal,
+    the later entries of a checkpoint replace the earlier ones and a
+    line which is cut off by a crash is skipped.
+    """
+    entries = {}
+    try:
+        with open(journal_file(info), 'r', encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    table, checkpoint, value = json.loads(line)
+                except ValueError:
+                    continue
+                entries[checkpoint] = (table, checkpoint, value)
+    except OSError:
+        pass
+    return list(entries.values())
+
+
+def write_journal(info, entries):
+    """Replaces the journal with its entries, or removes it if
+    there are none.
+    """
+    path = journal_file(info)
+    if entries == []:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(JOURNAL_DIRECTORY, exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as journal:
+        for entry in entries:
+            journal.write(json.dumps(entry) + '\n')
+    os.replace(temporary, path)
+
+
+def load_journal(info):
+    """Returns the checkpoints of the last interrupted transfer,
+    a dictionary of the checkpoint names and their values. The
+    journal is compacted to its last entries on the way.
+    """
+    with lock:
+        entries = read_journal(info)
+        write_journal(info, entries)
+    return dict(map(lambda entry: entry[1:], entries))
+
+
+def save_checkpoint(info, table, checkpoint, value):
+    """Records a checkpoint of a table, it's called after every
+    committed chunk, so it only appends a line to the journal.
+    """
+    line = json.dumps([table, checkpoint, value]) + '\n'
+    with lock:
+        os.makedirs(JOURNAL_DIRECTORY, exist_ok=True)
+        with open(journal_file(info), 'a', encoding='utf-8') as journal:
+            journal.write(line)
+
+
+def clear_journal(info, tables):
+    """Forgets the checkpoints of the tables, once they are
+    transferred or when they are transferred from the start.
+    """
+    with lock:
+        entries = read_journal(info)
+        write_journal(info, list(filter(lambda entry: entry[0] not in tables,
+                                        entries)))
@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 
 from PyQt5 import QtCore, QtGui, QtWidgets
-import mysql.connector
-import sqlite3_to_mysql
-import mysql_to_sqlite3
-from res.logic.preview import run_preview
 from res.pyui import transfer_ui
+from res.logic import engine
 from res.logic import messages
+from res.logic import schema
+
+# Milliseconds between two refreshes of the progress of a transfer.
+REFRESH_INTERVAL = 250
+
+# The cancelled transfers of the closed dialogs, which are kept
+# until their workers stop.
+stopping = set()
 
 
 def init(dialog, self, parent):
@@ -19,19 +24,28 @@ def init(dialog, self, parent):
         self.sqlite_database: The address of the
             sqlite_database.
         self.mode: A string, `sqlite_to_mysql` or `mysql_to_sqlite`.
+        self.table_filters: A dictionary of the tables and
+            their row filters, see engine.row_filter.
+        self.table_columns: A dictionary of the tables and the
+            lists of their columns which are transferred.
     """
     self.preview_pushButton.setDisabled(True)
+    self.options_pushButton.setDisabled(True)
+    self.table_filters = {}
+    self.table_columns = {}
     self.sqlite_database = parent.sqlite_database
     self.mode = parent.mode
-    self.mysql_conn = parent.mysql_conn
-    self.mysql_cur = parent.mysql_cur
+    self.mysql_information = parent.mysql_information
+    self.mysql_pool = parent.mysql_pool
     self.sqlite_conn = parent.sqlite_conn
     self.sqlite_cur = parent.sqlite_cur
+    self.transfer_thread = None
     if self.mode == 'sqlite_to_mysql':
         self.vacuum_checkBox.hide()
+        self.fast_load_checkBox.hide()
+        self.snapshot_checkBox.hide()
         self.buffered_checkBox.hide()
         self.tables_groupBox.setTitle('SQLite tables:')
-        load_sqlite_tables(dialog, self)
     else:
         self.integer_type_label.hide()
         self.integer_type_comboBox.hide()
@@ -39,37 +53,86 @@ def init(dialog, self, parent):
         self.string_type_comboBox.hide()
         self.full_text_checkBox.hide()
         self.rowid_checkBox.hide()
+        self.bulk_checkBox.hide()
+        self.defer_keys_checkBox.hide()
         self.tables_groupBox.setTitle('MySQL tables:')
-        fetch_mysql_tables(dialog, self)
+    fetch_tables(dialog, self)
     self.preview_pushButton.clicked.connect(
         lambda: preview(dialog, self)
         )
+    self.options_pushButton.clicked.connect(
+        lambda: table_options(dialog, self)
+        )
+    self.refresh_pushButton.clicked.connect(
+        lambda: fetch_tables(dialog, self, True)
+        )
     self.transfer_pushButton.clicked.connect(
         lambda: transfer_thread(dialog, self, parent)
         )
     self.about_pushButton.clicked.connect(
         lambda: messages.about(dialog)
         )
+    self.pause_pushButton.toggled.connect(
+        lambda paused: pause_transfer(dialog, self, paused)
+        )
+    self.cancel_pushButton.clicked.connect(
+        lambda: cancel_transfer(dialog, self)
+        )
     self.close_pushButton.clicked.connect(dialog.close)
+    dialog.finished.connect(lambda: stop_transfer(dialog, self))
     self.log_toolButton.clicked.connect(lambda: save_log(dialog, self))
     self.select_all_checkBox.clicked.connect(
         lambda: select_all(dialog, self)
         )
-    self.tables_listWidget.doubleClicked.connect(
+    self.tables_treeWidget.sortByColumn(2, QtCore.Qt.DescendingOrder)
+    self.tables_treeWidget.doubleClicked.connect(
         lambda: preview(dialog, self)
         )
+    self.tables_treeWidget.currentItemChanged.connect(
+        lambda: show_watermark(dialog, self)
+        )
 
 
 def preview(dialog, self):
     """Launches the preview dialog and shows
-    a preview of the chosen table.
+    a preview of the chosen table. The preview dialog
+    is imported on first use.
     """
+    from res.logic.preview import run_preview
     self.preview_pushButton.setDisabled(True)
-    table = self.tables_listWidget.currentItem().text()
+    table = self.tables_treeWidget.currentItem().text(0)
     run_preview(dialog, self, table)
     self.preview_pushButton.setDisabled(False)
 
 
+def table_options(dialog, self):
+    """Launches the options dialog of the current table, which
+    sets its row filter and columns. The options dialog is
+    imported on first use.
+    """
+    from res.logic.options import run_options
+    item = self.tables_treeWidget.currentItem()
+    if item is None:
+        return
+    if run_options(dialog, self, item.text(0)):
+        show_options(dialog, self, item)
+
+
+def show_options(dialog, self, item):
+    """Shows the row filter and the number of the
+    columns of a table in its Options column.
+    """
+    table = item.text(0)
+    options = []
+    if table in self.table_filters:
+        options.append('WHERE {}'.format(self.table_filters[table]))
+    if table in self.table_columns:
+        options.append('{} of {} columns'.format(
+            len(self.table_columns[table]), len(self.schema.columns[table])))
+    item.setText(3, '; '.join(options))
+    item.setToolTip(3, '\n'.join(options))
+
+
 def save_log(dialog, self):
     """Launches a dialog and asks for the destination of the
     log file.
@@ -84,54 +147,149 @@ def save_log(dialog, self):
         self.log_lineEdit.setText(destination)
 
 
-def load_sqlite_tables(dialog, self):
-    """Fetches the names of the tables of the SQLite database.
-    Also loads the names into the tables_listWidget.
+def fetch_tables(dialog, self, refresh=False):
+    """Fetches the schema of the source database from the schema
+    cache and loads its tables into the tables_treeWidget. I used
+    a thread to do it, because it may freeze the GUI.
+
+    Args:
+        refresh: Loads the schema again instead of using the cache.
+    """
+    self.preview_pushButton.setDisabled(True)
+    self.options_pushButton.setDisabled(True)
+    self.refresh_pushButton.setDisabled(True)
+    self.fetch_tables_thread = LoadSchema(
+        connection_info(dialog, self),
+        refresh
+        )
+    self.fetch_tables_thread.start()
+    self.fetch_tables_thread.result.connect(
+        lambda source: load_tables(dialog, self, source)
+        )
+    self.fetch_tables_thread.error.connect(
+        lambda error: fetch_tables_error(dialog, self, error)
+        )
+
+
+def fetch_tables_error(dialog, self, error):
+    self.refresh_pushButton.setDisabled(False)
+    messages.error(dialog, 'Error...', error)
+
+
+def load_tables(dialog, self, source):
+    """Loads the table names of the source database and their
+    estimated rows and sizes into the tables_treeWidget, the checked
+    tables stay checked.
+
+    Args:
+        source: A schema.Schema instance.
+
+    Connected to:
+        The result signal of the self.fetch_tables_thread object.
     """
+    self.schema = source
     self.preview_pushButton.setDisabled(False)
-    sql = 'SELECT name FROM sqlite_master WHERE type = "table";'
-    self.sqlite_cur.execute(sql)
-    tables = self.sqlite_cur.fetchall()
-    tables = list(map(lambda table: table[0], tables))
-    if 'sqlite_sequence' in tables:
-        tables.remove('sqlite_sequence')
-    for table in tables:
-        item = QtWidgets.QListWidgetItem()
-        item.setText(table)
-        item.setCheckState(QtCore.Qt.Unchecked)
-        self.tables_listWidget.addItem(item)
-
-
-def fetch_mysql_tables(dialog, self):
-    """Fetches the table names of the MySQL database.
-    I used a thread to do it, because it may freeze the GUI.
+    self.options_pushButton.setDisabled(False)
+    self.refresh_pushButton.setDisabled(False)
+    checked = get_tables(dialog, self)
+    self.tables_treeWidget.clear()
+    for table in source.tables:
+        item = TableItem()
+        item.setText(0, table)
+        if table in source.estimates:
+            rows, size = source.estimates[table]
+            item.setText(1, '{:,}'.format(rows))
+            item.setData(1, QtCore.Qt.UserRole, rows)
+            item.setText(2, engine.format_size(size))
+            item.setData(2, QtCore.Qt.UserRole, size)
+            item.setTextAlignment(1, QtCore.Qt.AlignRight)
+            item.setTextAlignment(2, QtCore.Qt.AlignRight)
+        if table in checked:
+            item.setCheckState(0, QtCore.Qt.Checked)
+        else:
+            item.setCheckState(0, QtCore.Qt.Unchecked)
+        self.tables_treeWidget.addTopLevelItem(item)
+        show_options(dialog, self, item)
+    self.tables_treeWidget.resizeColumnToContents(0)
+    fetch_watermarks(dialog, self)
+
+
+def fetch_watermarks(dialog, self):
+    """Finds out which tables are eligible for the incremental
+    transfers and their last watermarks, in a thread, as it
+    queries the columns of every table.
     """
-    sql = 'SHOW TABLES;'
-    self.fetch_mysql_tables_thread = SlowQuery(self.mysql_cur, sql)
-    self.fetch_mysql_tables_thread.start()
-    self.fetch_mysql_tables_thread.result.connect(
-        lambda tables: load_mysql_tables(dialog, self, tables)
+    tables = []
+    for row in range(self.tables_treeWidget.topLevelItemCount()):
+        tables.append(self.tables_treeWidget.topLevelItem(row).text(0))
+    self.fetch_watermarks_thread = Watermarks(
+        connection_info(dialog, self),
+        tables
+        )
+    self.fetch_watermarks_thread.start()
+    self.fetch_watermarks_thread.result.connect(
+        lambda watermarks: load_watermarks(dialog, self, watermarks)
         )
 
 
-def load_mysql_tables(dialog, self, tables):
-    """Loads the table names of the MySQL database
-    into the tables_listWidget.
+def load_watermarks(dialog, self, watermarks):
+    """Keeps the watermark of each table in its item, the tables
+    which aren't eligible for the incremental transfers are shown
+    in italic.
 
     Args:
-        tables: A list of the table names.
+        watermarks: A dictionary of the tables and their
+          (column, value) watermarks, see engine.table_watermarks.
 
     Connected to:
-        The result signal of the self.fetch_mysql_tables_thread
-        object.
+        The result signal of the self.fetch_watermarks_thread object.
     """
-    self.preview_pushButton.setDisabled(False)
-    tables = list(map(lambda table: table[0], tables))
-    for table in tables:
-        item = QtWidgets.QListWidgetItem()
-        item.setText(table)
-        item.setCheckState(QtCore.Qt.Unchecked)
-        self.tables_listWidget.addItem(item)
+    for row in range(self.tables_treeWidget.topLevelItemCount()):
+        item = self.tables_treeWidget.topLevelItem(row)
+        if item.text(0) not in watermarks:
+            continue
+        column, value = watermarks[item.text(0)]
+        font = item.font(0)
+        font.setItalic(column is None)
+        item.setFont(0, font)
+        if column is None:
+            text = 'Not eligible for incremental transfers, '
+            text += 'it has no watermark column.'
+        elif value is None:
+            text = 'Watermark: {}, not transferred incrementally yet.'
+            text = text.format(column)
+        else:
+            text = 'Watermark: {} = {}'.format(column, value)
+        item.setData(0, QtCore.Qt.UserRole, text)
+    show_watermark(dialog, self)
+
+
+def show_watermark(dialog, self):
+    """Shows the watermark of the current table.
+    Connected to:
+        The currentItemChanged signal of the tables_treeWidget.
+    """
+    item = self.tables_treeWidget.currentItem()
+    text = ''
+    if item is not None:
+        text = item.data(0, QtCore.Qt.UserRole) or ''
+    self.watermark_label.setText(text)
+
+
+def connection_info(dialog, self):
+    """Returns the options of the transfer which
+    describe the databases and the connections.
+    """
+    return {
+        'mode': self.mode,
+        'username': self.mysql_information['username'],
+        'password': self.mysql_information['password'],
+        'database': self.mysql_information['database'],
+        'host': self.mysql_information['host'],
+        'port': self.mysql_information['port'],
+        'sqlite_database': self.sqlite_database,
+        'pool': self.mysql_pool
+        }
 
 
 def transfer_thread(dialog, self, parent):
@@ -144,6 +302,8 @@ def transfer_thread(dialog, self, parent):
         status: Emits a string which might be a an error
           or `transferred` which means, the process has
           been successfully completed.
+        table_status: Emits the name of each copied table
+          and an error string, which is empty on success.
     """
     full_text = self.full_text_checkBox.isChecked()
     chunk = self.chunk_spinBox.value()
@@ -155,12 +315,32 @@ def transfer_thread(dialog, self, parent):
     tables = get_tables(dialog, self)
     vacuum = self.vacuum_checkBox.isChecked()
     buffered = self.buffered_checkBox.isChecked()
+    workers = self.workers_spinBox.value()
+    ranges = self.ranges_spinBox.value()
+    queue = self.queue_spinBox.value()
+    rows_rate = self.rows_rate_spinBox.value()
+    bytes_rate = self.bytes_rate_spinBox.value() * 1048576
+    max_lag = self.max_lag_spinBox.value()
+    max_threads = self.max_threads_spinBox.value()
+    metrics_port = self.metrics_port_spinBox.value()
+    processes = self.processes_spinBox.value()
+    split = get_split_tables(dialog, self)
+    incremental = self.incremental_checkBox.isChecked()
+    resume = self.resume_checkBox.isChecked()
+    bulk = self.bulk_checkBox.isChecked()
+    fast_load = self.fast_load_checkBox.isChecked()
+    defer_keys = self.defer_keys_checkBox.isChecked()
+    verify = self.verify_checkBox.isChecked()
+    profile = self.profile_checkBox.isChecked()
+    cprofile = self.cprofile_checkBox.isChecked()
+    snapshot = self.snapshot_checkBox.isChecked()
     if integer == 'Default':
         integer = 'INT(11)'
     if string == 'Default':
         string = ' VARCHAR(255)'
     if tables != []:
-        info = {
+        info = connection_info(dialog, self)
+        info.update({
             'full_text': full_text,
             'chunk': chunk,
             'foreign': foreign,
@@ -170,20 +350,52 @@ def transfer_thread(dialog, self, parent):
             'string': string,
             'tables': tables,
             'vacuum': vacuum,
-            'mode': self.mode,
-            'username': parent.mysql_information['username'],
-            'password': parent.mysql_information['password'],
-            'database': parent.mysql_information['database'],
-            'host': parent.mysql_information['host'],
-            'port': parent.mysql_information['port'],
-            'sqlite_database': self.sqlite_database,
-            'buffered': buffered
-            }
+            'buffered': buffered,
+            'workers': workers,
+            'ranges': ranges,
+            'queue': queue,
+            'processes': processes,
+            'max_rows_rate': rows_rate,
+            'max_bytes_rate': bytes_rate,
+            'max_lag': max_lag,
+            'max_threads': max_threads,
+            'metrics_port': metrics_port,
+            'split': split,
+            'incremental': incremental,
+            'resume': resume,
+            'bulk': bulk,
+            'fast_load': fast_load,
+            'defer_keys': defer_keys,
+            'verify': verify,
+            'profile': profile,
+            'cprofile': cprofile,
+            'snapshot': snapshot,
+            'filters': dict(filter(lambda option: option[0] in tables,
+                                   self.table_filters.items())),
+            'columns': dict(filter(lambda option: option[0] in tables,
+                                   self.table_columns.items()))
+            })
+        clear_table_status(dialog, self)
+        self.transfer_progressBar.setValue(0)
+        self.transfer_progressBar.setFormat('%p%')
         self.transfer_thread = Transfer(info)
         self.transfer_thread.start()
+        self.transfer_pushButton.setDisabled(True)
+        self.pause_pushButton.setChecked(False)
+        self.pause_pushButton.setDisabled(False)
+        self.cancel_pushButton.setDisabled(False)
         self.transfer_thread.status.connect(
             lambda status: transferred(dialog, self, status)
             )
+        self.progress_timer = QtCore.QTimer(dialog)
+        self.progress_timer.timeout.connect(
+            lambda: refresh_progress(dialog, self)
+            )
+        self.progress_timer.start(REFRESH_INTERVAL)
+        self.transfer_thread.table_status.connect(
+            lambda table, error:
+            table_transferred(dialog, self, table, error)
+            )
     else:
         message = 'Please select at least one table.'
         messages.warning(dialog, 'Warning', message)
@@ -195,162 +407,297 @@ def transferred(dialog, self, status):
     Shows a message which indicates the status of the
     transferring process.
     """
+    self.progress_timer.stop()
+    refresh_progress(dialog, self)
+    self.transfer_pushButton.setDisabled(False)
+    self.pause_pushButton.setChecked(False)
+    self.pause_pushButton.setDisabled(True)
+    self.cancel_pushButton.setDisabled(True)
+    if self.transfer_thread.info['incremental']:
+        fetch_watermarks(dialog, self)
     if status == 'transferred':
         message = 'Successful transferring!'
         messages.info(dialog, 'Info', message)
+    elif status == 'cancelled':
+        message = 'The transfer is cancelled, the copied chunks are ' \
+                  'skipped when it is resumed.'
+        messages.info(dialog, 'Info', message)
     else:
         messages.error(dialog, 'Error...', status)
 
 
+def pause_transfer(dialog, self, paused):
+    """Pauses or resumes the running transfer, the workers
+    stop after their current chunks.
+
+    Connected to:
+        The toggled signal of the pause_pushButton.
+    """
+    if self.transfer_thread is None:
+        return
+    if paused:
+        self.transfer_thread.control.pause()
+        self.pause_pushButton.setText('Resume')
+    else:
+        self.transfer_thread.control.resume()
+        self.pause_pushButton.setText('Pause')
+
+
+def cancel_transfer(dialog, self):
+    """Cancels the running transfer after the current chunks.
+
+    Connected to:
+        The clicked signal of the cancel_pushButton.
+    """
+    if self.transfer_thread is not None:
+        self.transfer_thread.control.cancel()
+        self.cancel_pushButton.setDisabled(True)
+        self.pause_pushButton.setDisabled(True)
+
+
+def stop_transfer(dialog, self):
+    """Cancels the running transfer when the dialog is closed, its
+    workers stop after their current chunks in the background. The
+    application waits for them before it quits, so they don't keep
+    writing after it.
+
+    Connected to:
+        The finished signal of the dialog.
+    """
+    if self.transfer_thread is not None and \
+            self.transfer_thread.isRunning():
+        # There is no dialog to show the result anymore.
+        self.transfer_thread.status.disconnect()
+        self.transfer_thread.table_status.disconnect()
+        self.progress_timer.stop()
+        self.transfer_thread.control.cancel()
+        thread = self.transfer_thread
+        stopping.add(thread)
+        thread.finished.connect(lambda: stopping.discard(thread))
+        QtWidgets.QApplication.instance().aboutToQuit.connect(thread.wait)
+
+
+def refresh_progress(dialog, self):
+    """Loads a snapshot of the progress of the tables into the
+    progress_tableWidget and the transfer_progressBar, the
+    duration of the phases of a table is shown as its tooltip.
+    The progress bar shows the estimated remaining time of the
+    whole transfer.
+
+    Connected to:
+        The timeout signal of the self.progress_timer instance,
+        which coalesces the updates to a fixed refresh rate.
+    """
+    progress = self.transfer_thread.progress
+    tables = progress.snapshot()
+    self.progress_tableWidget.setRowCount(len(tables))
+    for row, stats in enumerate(tables):
+        values = [
+            stats['table'],
+            stats['read'],
+            stats['written'],
+            '{:.1f}'.format(stats['bytes'] / 1048576),
+            engine.format_seconds(stats['elapsed']),
+            '{:.0f}'.format(stats['rate']),
+            'Cancelled' if stats['cancelled']
+            else engine.format_seconds(stats['remaining'])
+            ]
+        phases = map(
+            lambda name: '{}: {}'.format(
+                name.capitalize(),
+                engine.format_seconds(stats['phases'][name])
+                ),
+            stats['phases']
+            )
+        phases = '\n'.join(phases)
+        for column, value in enumerate(values):
+            item = QtWidgets.QTableWidgetItem(str(value))
+            item.setToolTip(phases)
+            self.progress_tableWidget.setItem(row, column, item)
+    overall = progress.overall(tables)
+    if overall['total']:
+        self.transfer_progressBar.setValue(
+            int(overall['written'] * 100 / overall['total']))
+    text = '%p% ({:.0f} rows/s, remaining {})'.format(
+        overall['rate'],
+        engine.format_seconds(overall['remaining'])
+        )
+    self.transfer_progressBar.setFormat(text)
+
+
+def table_transferred(dialog, self, table, error):
+    """Marks the item of a copied table in the tables_treeWidget
+    with a success or a failure icon, the error is shown
+    as the tooltip of the item.
+
+    Connected to:
+        The table_status signal of the self.transfer_thread instance.
+    """
+    items = self.tables_treeWidget.findItems(table, QtCore.Qt.MatchExactly)
+    if error:
+        icon = QtWidgets.QStyle.SP_MessageBoxCritical
+    else:
+        icon = QtWidgets.QStyle.SP_DialogApplyButton
+    for item in items:
+        item.setIcon(0, dialog.style().standardIcon(icon))
+        item.setToolTip(0, error)
+
+
+def clear_table_status(dialog, self):
+    """Clears the icons and tooltips of the previous transfer."""
+    for row in range(self.tables_treeWidget.topLevelItemCount()):
+        item = self.tables_treeWidget.topLevelItem(row)
+        item.setIcon(0, QtGui.QIcon())
+        item.setToolTip(0, '')
+
+
 def select_all(dialog, self):
     """Toggle checked/unchecked all the items in the list.
     Connected to:
         The clicked signal of the select_all_checkBox.
     """
-    row_count = self.tables_listWidget.count()
+    row_count = self.tables_treeWidget.topLevelItemCount()
     select_all = self.select_all_checkBox.isChecked()
     if select_all:
         state = QtCore.Qt.Checked
     else:
         state = QtCore.Qt.Unchecked
     for row in range(row_count):
-        self.tables_listWidget.item(row).setCheckState(state)
+        self.tables_treeWidget.topLevelItem(row).setCheckState(0, state)
 
 
 def get_tables(dialog, self):
     """Returns a list of the selected tables."""
     tables = []
-    row_count = self.tables_listWidget.count()
+    row_count = self.tables_treeWidget.topLevelItemCount()
     for row in range(row_count):
-        item = self.tables_listWidget.item(row)
-        if item.checkState() == QtCore.Qt.Checked:
-            tables.append(item.text())
+        item = self.tables_treeWidget.topLevelItem(row)
+        if item.checkState(0) == QtCore.Qt.Checked:
+            tables.append(item.text(0))
     return tables
 
 
+def get_split_tables(dialog, self):
+    """Returns a list of the highlighted tables, which are
+    split into key ranges and copied concurrently.
+    """
+    items = self.tables_treeWidget.selectedItems()
+    return list(map(lambda item: item.text(0), items))
+
+
+class TableItem(QtWidgets.QTreeWidgetItem):
+    """An item of the tables_treeWidget, which sorts the rows
+    and the sizes by their numbers instead of their texts.
+    """
+
+    def __lt__(self, other):
+        column = self.treeWidget().sortColumn()
+        if column == 0:
+            return self.text(0).lower() < other.text(0).lower()
+        mine = self.data(column, QtCore.Qt.UserRole) or 0
+        theirs = other.data(column, QtCore.Qt.UserRole) or 0
+        return mine < theirs
+
+
 class Transfer(QtCore.QThread):
     """A separate thread that handles the process
     of transferring and prevents the GUI to freeze.
 
     Args:
-        info: A dictionary of information to create
-          `converter` instances from the two classes
-          SQLite3toMySQL and MySQLtoSQLite.
+        info: A dictionary of the transfer options which
+          is passed to engine.transfer. The tables are copied
+          by a pool of `info['workers']` workers.
+
+    Attributes:
+        progress: An engine.Progress instance which is updated
+          by the workers and read by refresh_progress.
+        control: An engine.Control instance which cancels,
+          pauses and throttles the workers.
 
     Methods:
-        sqlite_to_mysql:
-            Returns: A converter instance to transfer
-              tables from a SQLite database to a MySQL
-              database.
-        mysql_to_sqlite:
-            Returns: A converter instance to transfer
-              tables from a MySQL database to a SQLite
-              database.
         run: An overridden method, which runs by calling the
           start method on an instance of the QThread class.
 
     Signals:
         status: Emits a string that indicates the status
-          of the transferring process.
+          of the transferring process, `transferred`,
+          `cancelled` or an error.
+        table_status: Emits the name of each copied table
+          and an error string, which is empty on success.
     """
     status = QtCore.pyqtSignal(str)
+    table_status = QtCore.pyqtSignal(str, str)
 
     def __init__(self, info):
         super().__init__()
-        self.full_text = info['full_text']
-        self.chunk = info['chunk']
-        self.foreign = info['foreign']
-        self.rowid = info['rowid']
-        self.log = info['log']
-        self.integer = info['integer']
-        self.string = info['string']
-        self.tables = info['tables']
-        self.vacuum = info['vacuum']
-        self.mode = info['mode']
-        self.username = info['username']
-        self.password = info['password']
-        self.database = info['database']
-        self.host = info['host']
-        self.port = info['port']
-        self.sqlite_database = info['sqlite_database']
-        self.buffered = info['buffered']
-
-    def sqlite_to_mysql(self):
-        converter = sqlite3_to_mysql.SQLite3toMySQL(
-            sqlite_file=self.sqlite_database,
-            sqlite_tables=self.tables,
-            without_foreign_keys=self.foreign,
-            mysql_user=self.username,
-            mysql_password=self.password,
-            mysql_database=self.database,
-            mysql_host=self.host,
-            mysql_port=self.port,
-            mysql_integer_type=self.integer,
-            mysql_string_type=self.string,
-            use_fulltext=self.full_text,
-            with_rowid=self.rowid,
-            chunk=self.chunk,
-            log_file=self.log
-            )
-        return converter
-
-    def mysql_to_sqlite(self):
-        converter = mysql_to_sqlite3.MySQLtoSQLite(
-            sqlite_file=self.sqlite_database,
-            mysql_tables=self.tables,
-            without_foreign_keys=self.foreign,
-            mysql_user=self.username,
-            mysql_password=self.password,
-            mysql_database=self.database,
-            mysql_host=self.host,
-            mysql_port=self.port,
-            chunk=self.chunk,
-            vacuum=self.vacuum,
-            buffered=self.buffered,
-            log_file=self.log
-            )
-        return converter
+        self.info = info
+        self.progress = engine.Progress()
+        self.control = engine.Control(info['max_rows_rate'],
+                                      info['max_bytes_rate'])
+
+    def table_done(self, table, error):
+        self.table_status.emit(table, error or '')
 
     def run(self):
         try:
-            if self.mode == 'sqlite_to_mysql':
-                self.converter = self.sqlite_to_mysql()
-            else:
-                self.converter = self.mysql_to_sqlite()
-            self.converter.transfer()
+            engine.transfer(self.info, self.table_done, self.progress,
+                            self.control)
             self.status.emit('transferred')
+        except engine.Cancelled:
+            self.status.emit('cancelled')
         except Exception as error:
             self.status.emit(str(error))
 
 
-class SlowQuery(QtCore.QThread):
-    """Fetches the result of the `SHOW TABLES` SQL command.
+class LoadSchema(QtCore.QThread):
+    """Loads the schema of the source database from the schema cache.
 
     Args:
-        cur: The cursor of the MySQL connection.
-        sql: `SHOW TABLES`
+        info: The options which describe the databases.
+        refresh: Loads the schema again instead of using the cache.
 
-    Methods:
-        run: An overridden method, which runs by calling the
-          start method on an instance of the QThread class.
+    Signals:
+        result: Emits a schema.Schema instance.
+        error: Emits a string when an error occurred.
+    """
+    result = QtCore.pyqtSignal(object)
+    error = QtCore.pyqtSignal(str)
+
+    def __init__(self, info, refresh):
+        super().__init__()
+        self.info = info
+        self.refresh = refresh
+
+    def run(self):
+        try:
+            self.result.emit(schema.get_schema(self.info, self.refresh))
+        except Exception as error:
+            self.error.emit(str(error))
+
+
+class Watermarks(QtCore.QThread):
+    """Fetches the watermarks of the tables.
+
+    Args:
+        info: The options which describe the databases.
+        tables: A list of the table names.
 
     Signals:
-        result: Emits a list of the table names.
+        result: Emits a dictionary of the tables and their
+          (column, value) watermarks.
         error: Emits a string when an error occurred.
     """
-    result = QtCore.pyqtSignal(list)
+    result = QtCore.pyqtSignal(dict)
     error = QtCore.pyqtSignal(str)
 
-    def __init__(self, cur, sql):
+    def __init__(self, info, tables):
         super().__init__()
-        self.cur = cur
-        self.sql = sql
+        self.info = info
+        self.tables = tables
 
     def run(self):
         try:
-            self.cur.execute(self.sql)
-            data = self.cur.fetchall()
-            self.result.emit(data)
+            self.result.emit(engine.table_watermarks(self.info, self.tables))
         except Exception as error:
             self.error.emit(str(error))
 
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""Verifies the copied tables by comparing aggregate checksums of
+ranges of their integer keys, which are computed inside the
+databases. Only the ranges whose checksums differ are split into
+smaller ranges, and only the smallest ones are compared row by row,
+so a table which has been copied correctly costs one aggregate query
+on each side.
+"""
+
+import zlib
+from res.logic import engine
+from res.logic import schema
+
+# The keys of the ranges of the first aggregate query.
+VERIFY_RANGE = 100000
+
+# The number of the smaller ranges which a mismatching range is split
+# into, and the keys of the ranges which are compared row by row.
+VERIFY_FANOUT = 100
+VERIFY_ROWS = 1000
+
+# The real and decimal values are compared in millionths, as the
+# databases print the floating-point numbers differently.
+CHECKSUM_SCALE = 1000000
+
+# The keys of the missing, extra and different rows which are
+# reported per table.
+VERIFY_SAMPLE = 10
+
+
+class Side:
+    """One of the two databases of a verification, which builds the
+    checksum queries of a table in its own dialect.
+
+    Args:
+        conn: A connection to the database.
+        mysql: True if it's the MySQL database.
+        table: The name of the table in this database.
+        key: The integer key column, or None.
+        columns: The (name, type) columns of the MySQL table.
+        row_filter: The row filter of the table on the source
+          database, see engine.row_filter, or None.
+    """
+
+    def __init__(self, conn, mysql, table, key, columns, row_filter=None):
+        self.conn = conn
+        self.mysql = mysql
+        self.where = ''
+        if row_filter:
+            self.where = ' AND ({})'.format(row_filter)
+        self.table = self.quote(table)
+        self.key = self.quote(key) if key is not None else None
+        self.placeholder = '%s' if mysql else '?'
+        values = []
+        for name, column_type in columns:
+            column_type = column_type.lower()
+            # The numbers and the bytes are compared as they are
+            # copied, the other values in the text form of MySQL.
+            if column_type in engine.REAL_TYPES + engine.DECIMAL_TYPES:
+                value = 'CAST(ROUND({} * {}) AS {})'.format(
+                    self.quote(name), CHECKSUM_SCALE,
+                    'SIGNED' if mysql else 'INTEGER')
+            elif column_type in engine.BINARY_TYPES:
+                value = 'HEX({})'.format(self.quote(name))
+            elif mysql:
+                value = 'HEX(CONVERT({} USING utf8mb4))'.format(
+                    self.quote(name))
+            else:
+                value = 'HEX(CAST({} AS TEXT))'.format(self.quote(name))
+            # HEX never returns an N, so NULL differs from ''. The HEX
+            # of SQLite returns '' for NULL, so COALESCE can't be used.
+            values.append("CASE WHEN {} IS NULL THEN 'N' ELSE {} END".format(
+                self.quote(name), value))
+        if mysql:
+            self.checksum = "CRC32(CONCAT_WS(',', {}))".format(
+                ', '.join(values))
+        else:
+            conn.create_function('crc32', 1, crc32, deterministic=True)
+            self.checksum = "crc32({})".format(" || ',' || ".join(values))
+
+    def quote(self, name):
+        if self.mysql:
+            return '`{}`'.format(name)
+        return '"{}"'.format(name)
+
+    def execute(self, sql, params=()):
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+    def bounds(self):
+        """Returns the lowest and the highest key."""
+        return self.execute(
+            'SELECT MIN({0}), MAX({0}) FROM {1} WHERE 1 = 1{2};'.format(
+                self.key, self.table, self.where))[0]
+
+    def aggregates(self, low=None, high=None, width=None):
+        """Returns a dictionary of the ranges of `width` keys between
+        `low` and `high`, numbered from zero, and their (rows, checksum).
+        The whole table is range zero if `low` is None.
+        """
+        if low is None:
+            sql = 'SELECT 0, COUNT(*), SUM({}) FROM {} WHERE 1 = 1{};'.format(
+                self.checksum, self.table, self.where)
+            params = ()
+        else:
+            sql = 'SELECT ({0} - {5}) {1} {5}, COUNT(*), SUM({2}) FROM {3} '
+            sql += 'WHERE {0} BETWEEN {5} AND {5}{4} GROUP BY 1;'
+            # Both divisions round down, as the keys are above low.
+            sql = sql.format(self.key, 'DIV' if self.mysql else '/',
+                             self.checksum, self.table, self.where,
+                             self.placeholder)
+            params = (low, width, low, high)
+        return dict(map(
+            lambda row: (int(row[0]), (int(row[1]), int(row[2] or 0))),
+            self.execute(sql, params)))
+
+    def checksums(self, low, high):
+        """Returns a dictionary of the keys between
+        `low` and `high` and the checksums of their rows.
+        """
+        sql = 'SELECT {0}, {1} FROM {2} WHERE {0} BETWEEN {4} AND {4}{3};'
+        sql = sql.format(self.key, self.checksum, self.table, self.where,
+                         self.placeholder)
+        return dict(map(lambda row: (int(row[0]), int(row[1])),
+                        self.execute(sql, (low, high))))
+
+
+def crc32(text):
+    """The CRC32 function of MySQL for SQLite."""
+    if text is None:
+        return None
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def verify_key(info, table):
+    """Returns the integer key column which exists in both databases,
+    or None. The rowid of SQLite only exists in MySQL if it's copied.
+    """
+    key = engine.split_key(info, table)
+    if key != 'rowid':
+        return key
+    source = schema.get_schema(info)
+    keys = list(filter(lambda column: column[2],
+                       source.columns.get(table, [])))
+    if len(keys) == 1 and keys[0][1].lower() in engine.INTEGER_TYPES:
+        # An alias of the rowid.
+        return keys[0][0]
+    if info['rowid']:
+        return 'rowid'
+    return None
+
+
+def verify_table(info, table, width=None):
+    """Compares the rows of a copied table in both databases.
+
+    Args:
+        info: The dictionary of the transfer options.
+        table: The name of the table in the source database.
+        width: The keys of the ranges of the first aggregate query,
+          VERIFY_RANGE by default.
+
+    Returns:
+        A dictionary of the table, the number of the compared and
+        the mismatching ranges of the first query, the numbers of
+        the `missing`, `extra` and `different` rows of the target
+        and a sample of their keys in `keys`. The tables without an
+        integer key are compared as one range without the rows.
+        Only the rows of the row filter and the projected columns
+        of the table are compared.
+    """
+    from sqlite3_to_mysql.mysql_utils import safe_identifier_length
+    mysql_info = dict(info, mode='mysql_to_sqlite')
+    mysql_table = table
+    if info['mode'] == 'sqlite_to_mysql':
+        mysql_table = safe_identifier_length(table)
+    columns = schema.get_schema(mysql_info).columns.get(mysql_table, [])
+    columns = list(map(lambda column: column[:2], columns))
+    # Only the copied columns are compared.
+    copied = engine.projection(info, table, list(map(
+        lambda column: column[0], columns)))
+    columns = list(filter(lambda column: column[0] in copied, columns))
+    key = verify_key(info, table)
+    result = {
+        'table': table,
+        'ranges': 0,
+        'mismatched': 0,
+        'missing': 0,
+        'extra': 0,
+        'different': 0,
+        'keys': {'missing': [], 'extra': [], 'different': []}
+        }
+    with engine.sqlite_connection(info) as sqlite_conn, \
+            engine.mysql_connection(info) as mysql_conn:
+        row_filter = engine.row_filter(info, table)
+        if info['mode'] == 'sqlite_to_mysql':
+            source = Side(sqlite_conn, False, table, key, columns, row_filter)
+            target = Side(mysql_conn, True, mysql_table, key, columns)
+        else:
+            source = Side(mysql_conn, True, mysql_table, key, columns,
+                          row_filter)
+            target = Side(sqlite_conn, False, table, key, columns)
+        if key is None:
+            result['ranges'] = 1
+            if source.aggregates() != target.aggregates():
+                result['mismatched'] = 1
+            return result
+        bounds = list(filter(lambda bound: bound is not None,
+                             source.bounds() + target.bounds()))
+        if bounds == []:
+            return result
+        low = min(map(int, bounds))
+        high = max(map(int, bounds))
+        pending = [(low, high, width or VERIFY_RANGE)]
+        while pending:
+            # The ranges are split breadth-first, so
+            # the rows are compared in the order of their keys.
+            low, high, width = pending.pop(0)
+            expected = source.aggregates(low, high, width)
+            found = target.aggregates(low, high, width)
+            if result['ranges'] == 0:
+                result['ranges'] = -(-(high - low + 1) // width)
+                result['mismatched'] = len(list(filter(
+                    lambda bucket: expected.get(bucket) != found.get(bucket),
+                    set(expected) | set(found))))
+            for bucket in sorted(set(expected) | set(found)):
+                if expected.get(bucket) == found.get(bucket):
+                    continue
+                first = low + bucket * width
+                last = min(first + width - 1, high)
+                if width > VERIFY_ROWS:
+                    pending.append((first, last,
+                                    max(width // VERIFY_FANOUT, 1)))
+                    continue
+                compare_rows(result, source.checksums(first, last),
+                             target.checksums(first, last))
+    return result
+
+
+def compare_rows(result, expected, found):
+    """Adds the differences of the checksums of the rows to the result."""
+    differences = {
+        'missing': sorted(set(expected) - set(found)),
+        'extra': sorted(set(found) - set(expected)),
+        'different': sorted(filter(
+            lambda key: key in found and found[key] != expected[key],
+            expected))
+        }
+    for kind in differences:
+        result[kind] += len(differences[kind])
+        keys = result['keys'][kind]
+        keys.extend(differences[kind][:VERIFY_SAMPLE - len(keys)])
+
+
+def describe(result):
+    """Returns a description of the differences of a verified table,
+    or an empty string if the table matches.
+    """
+    if result['mismatched'] == 0:
+        return ''
+    if result['missing'] + result['extra'] + result['different'] == 0:
+        return 'The checksums of the table differ.'
+    parts = []
+    for kind in ('missing', 'extra', 'different'):
+        if result[kind]:
+            parts.append('{} {} rows ({}{})'.format(
+                result[kind],
+                kind,
+                ', '.join(map(str, result['keys'][kind])),
+                ', ...' if result[kind] > len(result['keys'][kind]) else ''
+                ))
+    return 'The verification found {} in {} of {} ranges.'.format(
+        ', '.join(parts), result['mismatched'], result['ranges'])
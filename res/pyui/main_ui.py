@@ -12,7 +12,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_main_win(object):
     def setupUi(self, main_win):
         main_win.setObjectName("main_win")
-        main_win.resize(361, 426)
+        main_win.resize(361, 452)
         self.centralwidget = QtWidgets.QWidget(main_win)
         self.centralwidget.setObjectName("centralwidget")
         self.gridLayout_4 = QtWidgets.QGridLayout(self.centralwidget)
@@ -83,6 +83,15 @@ class Ui_main_win(object):
         self.database_lineEdit.setClearButtonEnabled(True)
         self.database_lineEdit.setObjectName("database_lineEdit")
         self.gridLayout_3.addWidget(self.database_lineEdit, 4, 1, 1, 1)
+        self.pool_label = QtWidgets.QLabel(self.mysql_groupBox)
+        self.pool_label.setObjectName("pool_label")
+        self.gridLayout_3.addWidget(self.pool_label, 5, 0, 1, 1)
+        self.pool_spinBox = QtWidgets.QSpinBox(self.mysql_groupBox)
+        self.pool_spinBox.setMinimum(1)
+        self.pool_spinBox.setMaximum(64)
+        self.pool_spinBox.setProperty("value", 4)
+        self.pool_spinBox.setObjectName("pool_spinBox")
+        self.gridLayout_3.addWidget(self.pool_spinBox, 5, 1, 1, 1)
         self.gridLayout_5.addLayout(self.gridLayout_3, 0, 0, 1, 1)
         self.gridLayout_4.addWidget(self.mysql_groupBox, 1, 0, 1, 1)
         self.gridLayout_6 = QtWidgets.QGridLayout()
@@ -138,7 +147,8 @@ class Ui_main_win(object):
         main_win.setTabOrder(self.port_spinBox, self.username_lineEdit)
         main_win.setTabOrder(self.username_lineEdit, self.password_lineEdit)
         main_win.setTabOrder(self.password_lineEdit, self.database_lineEdit)
-        main_win.setTabOrder(self.database_lineEdit, self.sqlite_lineEdit)
+        main_win.setTabOrder(self.database_lineEdit, self.pool_spinBox)
+        main_win.setTabOrder(self.pool_spinBox, self.sqlite_lineEdit)
         main_win.setTabOrder(self.sqlite_lineEdit, self.sqlite_toolButton)
         main_win.setTabOrder(self.sqlite_toolButton, self.sqlite_to_mysql_radioButton)
         main_win.setTabOrder(self.sqlite_to_mysql_radioButton, self.mysql_to_sqlite_radioButton)
@@ -160,6 +170,8 @@ class Ui_main_win(object):
         self.username_label.setText(_translate("main_win", "Username:"))
         self.password_label.setText(_translate("main_win", "Password:"))
         self.database_label.setText(_translate("main_win", "Database:"))
+        self.pool_label.setToolTip(_translate("main_win", "The number of MySQL connections which are shared by the table list, the previews and the transfers."))
+        self.pool_label.setText(_translate("main_win", "Connections:"))
         self.connect_pushButton.setText(_translate("main_win", "Continue"))
         self.close_pushButton.setText(_translate("main_win", "Close"))
         self.about_pushButton.setText(_translate("main_win", "About..."))
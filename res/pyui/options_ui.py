@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'options.ui'
+#
+# Created by: PyQt5 UI code generator 5.12
+#
+# WARNING! All changes made in this file will be lost!
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_dialog(object):
+    def setupUi(self, dialog):
+        dialog.setObjectName("dialog")
+        dialog.resize(480, 420)
+        self.gridLayout_2 = QtWidgets.QGridLayout(dialog)
+        self.gridLayout_2.setObjectName("gridLayout_2")
+        self.table_groupBox = QtWidgets.QGroupBox(dialog)
+        self.table_groupBox.setObjectName("table_groupBox")
+        self.gridLayout = QtWidgets.QGridLayout(self.table_groupBox)
+        self.gridLayout.setObjectName("gridLayout")
+        self.filter_label = QtWidgets.QLabel(self.table_groupBox)
+        self.filter_label.setObjectName("filter_label")
+        self.gridLayout.addWidget(self.filter_label, 0, 0, 1, 1)
+        self.filter_lineEdit = QtWidgets.QLineEdit(self.table_groupBox)
+        self.filter_lineEdit.setClearButtonEnabled(True)
+        self.filter_lineEdit.setObjectName("filter_lineEdit")
+        self.gridLayout.addWidget(self.filter_lineEdit, 1, 0, 1, 1)
+        self.columns_label = QtWidgets.QLabel(self.table_groupBox)
+        self.columns_label.setObjectName("columns_label")
+        self.gridLayout.addWidget(self.columns_label, 2, 0, 1, 1)
+        self.columns_listWidget = QtWidgets.QListWidget(self.table_groupBox)
+        self.columns_listWidget.setAlternatingRowColors(True)
+        self.columns_listWidget.setObjectName("columns_listWidget")
+        self.gridLayout.addWidget(self.columns_listWidget, 3, 0, 1, 1)
+        self.gridLayout_2.addWidget(self.table_groupBox, 0, 0, 1, 1)
+        self.buttonBox = QtWidgets.QDialogButtonBox(dialog)
+        self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok|QtWidgets.QDialogButtonBox.Reset)
+        self.buttonBox.setObjectName("buttonBox")
+        self.gridLayout_2.addWidget(self.buttonBox, 1, 0, 1, 1)
+
+        self.retranslateUi(dialog)
+        QtCore.QMetaObject.connectSlotsByName(dialog)
+        dialog.setTabOrder(self.filter_lineEdit, self.columns_listWidget)
+
+    def retranslateUi(self, dialog):
+        _translate = QtCore.QCoreApplication.translate
+        dialog.setWindowTitle(_translate("dialog", "Table Options"))
+        self.table_groupBox.setTitle(_translate("dialog", "Table Name:"))
+        self.filter_label.setToolTip(_translate("dialog", "A condition in the SQL of the source database, only the matching rows are transferred."))
+        self.filter_label.setText(_translate("dialog", "Transfer the rows where:"))
+        self.filter_lineEdit.setPlaceholderText(_translate("dialog", "e.g. created_at >= \'2024-01-01\'"))
+        self.columns_label.setToolTip(_translate("dialog", "The unchecked columns are not read, they keep their default values in the target table. The primary key is always transferred."))
+        self.columns_label.setText(_translate("dialog", "Transfer the columns:"))
+
+
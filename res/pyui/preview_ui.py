@@ -19,19 +19,17 @@ class Ui_dialog(object):
         self.table_groupBox.setObjectName("table_groupBox")
         self.gridLayout = QtWidgets.QGridLayout(self.table_groupBox)
         self.gridLayout.setObjectName("gridLayout")
-        self.table_tableWidget = QtWidgets.QTableWidget(self.table_groupBox)
-        self.table_tableWidget.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
-        self.table_tableWidget.setAlternatingRowColors(True)
-        self.table_tableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
-        self.table_tableWidget.setObjectName("table_tableWidget")
-        self.table_tableWidget.setColumnCount(0)
-        self.table_tableWidget.setRowCount(0)
-        self.table_tableWidget.horizontalHeader().setHighlightSections(False)
-        self.table_tableWidget.horizontalHeader().setStretchLastSection(True)
-        self.table_tableWidget.verticalHeader().setVisible(False)
-        self.table_tableWidget.verticalHeader().setDefaultSectionSize(21)
-        self.table_tableWidget.verticalHeader().setHighlightSections(False)
-        self.gridLayout.addWidget(self.table_tableWidget, 0, 0, 1, 1)
+        self.table_tableView = QtWidgets.QTableView(self.table_groupBox)
+        self.table_tableView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table_tableView.setAlternatingRowColors(True)
+        self.table_tableView.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table_tableView.setObjectName("table_tableView")
+        self.table_tableView.horizontalHeader().setHighlightSections(False)
+        self.table_tableView.horizontalHeader().setStretchLastSection(True)
+        self.table_tableView.verticalHeader().setVisible(False)
+        self.table_tableView.verticalHeader().setDefaultSectionSize(21)
+        self.table_tableView.verticalHeader().setHighlightSections(False)
+        self.gridLayout.addWidget(self.table_tableView, 0, 0, 1, 1)
         self.gridLayout_2.addWidget(self.table_groupBox, 0, 0, 1, 1)
 
         self.retranslateUi(dialog)
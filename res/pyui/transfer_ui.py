@@ -12,31 +12,51 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_dialog(object):
     def setupUi(self, dialog):
         dialog.setObjectName("dialog")
-        dialog.resize(614, 369)
+        dialog.resize(760, 560)
         self.gridLayout_6 = QtWidgets.QGridLayout(dialog)
         self.gridLayout_6.setObjectName("gridLayout_6")
         self.tables_groupBox = QtWidgets.QGroupBox(dialog)
         self.tables_groupBox.setObjectName("tables_groupBox")
         self.gridLayout = QtWidgets.QGridLayout(self.tables_groupBox)
         self.gridLayout.setObjectName("gridLayout")
-        self.tables_listWidget = QtWidgets.QListWidget(self.tables_groupBox)
-        self.tables_listWidget.setAlternatingRowColors(True)
-        self.tables_listWidget.setObjectName("tables_listWidget")
-        self.gridLayout.addWidget(self.tables_listWidget, 1, 0, 1, 1)
+        self.tables_treeWidget = QtWidgets.QTreeWidget(self.tables_groupBox)
+        self.tables_treeWidget.setAlternatingRowColors(True)
+        self.tables_treeWidget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.tables_treeWidget.setRootIsDecorated(False)
+        self.tables_treeWidget.setUniformRowHeights(True)
+        self.tables_treeWidget.setObjectName("tables_treeWidget")
+        self.gridLayout.addWidget(self.tables_treeWidget, 1, 0, 1, 3)
         self.preview_pushButton = QtWidgets.QPushButton(self.tables_groupBox)
         self.preview_pushButton.setObjectName("preview_pushButton")
         self.gridLayout.addWidget(self.preview_pushButton, 2, 0, 1, 1)
+        self.options_pushButton = QtWidgets.QPushButton(self.tables_groupBox)
+        self.options_pushButton.setObjectName("options_pushButton")
+        self.gridLayout.addWidget(self.options_pushButton, 2, 1, 1, 1)
+        self.refresh_pushButton = QtWidgets.QPushButton(self.tables_groupBox)
+        self.refresh_pushButton.setObjectName("refresh_pushButton")
+        self.gridLayout.addWidget(self.refresh_pushButton, 2, 2, 1, 1)
+        self.watermark_label = QtWidgets.QLabel(self.tables_groupBox)
+        self.watermark_label.setText("")
+        self.watermark_label.setWordWrap(True)
+        self.watermark_label.setObjectName("watermark_label")
+        self.gridLayout.addWidget(self.watermark_label, 3, 0, 1, 3)
         self.select_all_checkBox = QtWidgets.QCheckBox(self.tables_groupBox)
         self.select_all_checkBox.setObjectName("select_all_checkBox")
-        self.gridLayout.addWidget(self.select_all_checkBox, 0, 0, 1, 1)
+        self.gridLayout.addWidget(self.select_all_checkBox, 0, 0, 1, 3)
         self.gridLayout_6.addWidget(self.tables_groupBox, 0, 0, 1, 1)
         self.settings_groupBox = QtWidgets.QGroupBox(dialog)
         self.settings_groupBox.setObjectName("settings_groupBox")
         self.gridLayout_4 = QtWidgets.QGridLayout(self.settings_groupBox)
         self.gridLayout_4.setObjectName("gridLayout_4")
+        self.bulk_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.bulk_checkBox.setObjectName("bulk_checkBox")
+        self.gridLayout_4.addWidget(self.bulk_checkBox, 6, 0, 1, 1)
+        self.defer_keys_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.defer_keys_checkBox.setObjectName("defer_keys_checkBox")
+        self.gridLayout_4.addWidget(self.defer_keys_checkBox, 7, 0, 1, 1)
         self.vacuum_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
         self.vacuum_checkBox.setObjectName("vacuum_checkBox")
-        self.gridLayout_4.addWidget(self.vacuum_checkBox, 6, 0, 1, 1)
+        self.gridLayout_4.addWidget(self.vacuum_checkBox, 8, 0, 1, 1)
         self.gridLayout_3 = QtWidgets.QGridLayout()
         self.gridLayout_3.setObjectName("gridLayout_3")
         self.integer_type_label = QtWidgets.QLabel(self.settings_groupBox)
@@ -81,6 +101,72 @@ class Ui_dialog(object):
         self.chunk_spinBox.setMaximum(999999999)
         self.chunk_spinBox.setObjectName("chunk_spinBox")
         self.gridLayout_3.addWidget(self.chunk_spinBox, 2, 1, 1, 1)
+        self.workers_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.workers_label.setObjectName("workers_label")
+        self.gridLayout_3.addWidget(self.workers_label, 3, 0, 1, 1)
+        self.workers_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.workers_spinBox.setMinimum(1)
+        self.workers_spinBox.setMaximum(64)
+        self.workers_spinBox.setObjectName("workers_spinBox")
+        self.gridLayout_3.addWidget(self.workers_spinBox, 3, 1, 1, 1)
+        self.ranges_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.ranges_label.setObjectName("ranges_label")
+        self.gridLayout_3.addWidget(self.ranges_label, 4, 0, 1, 1)
+        self.ranges_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.ranges_spinBox.setMinimum(1)
+        self.ranges_spinBox.setMaximum(64)
+        self.ranges_spinBox.setObjectName("ranges_spinBox")
+        self.gridLayout_3.addWidget(self.ranges_spinBox, 4, 1, 1, 1)
+        self.queue_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.queue_label.setObjectName("queue_label")
+        self.gridLayout_3.addWidget(self.queue_label, 5, 0, 1, 1)
+        self.queue_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.queue_spinBox.setMaximum(64)
+        self.queue_spinBox.setProperty("value", 2)
+        self.queue_spinBox.setObjectName("queue_spinBox")
+        self.gridLayout_3.addWidget(self.queue_spinBox, 5, 1, 1, 1)
+        self.rows_rate_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.rows_rate_label.setObjectName("rows_rate_label")
+        self.gridLayout_3.addWidget(self.rows_rate_label, 6, 0, 1, 1)
+        self.rows_rate_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.rows_rate_spinBox.setMaximum(999999999)
+        self.rows_rate_spinBox.setObjectName("rows_rate_spinBox")
+        self.gridLayout_3.addWidget(self.rows_rate_spinBox, 6, 1, 1, 1)
+        self.bytes_rate_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.bytes_rate_label.setObjectName("bytes_rate_label")
+        self.gridLayout_3.addWidget(self.bytes_rate_label, 7, 0, 1, 1)
+        self.bytes_rate_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.bytes_rate_spinBox.setMaximum(100000)
+        self.bytes_rate_spinBox.setObjectName("bytes_rate_spinBox")
+        self.gridLayout_3.addWidget(self.bytes_rate_spinBox, 7, 1, 1, 1)
+        self.max_lag_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.max_lag_label.setObjectName("max_lag_label")
+        self.gridLayout_3.addWidget(self.max_lag_label, 8, 0, 1, 1)
+        self.max_lag_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.max_lag_spinBox.setMaximum(86400)
+        self.max_lag_spinBox.setObjectName("max_lag_spinBox")
+        self.gridLayout_3.addWidget(self.max_lag_spinBox, 8, 1, 1, 1)
+        self.max_threads_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.max_threads_label.setObjectName("max_threads_label")
+        self.gridLayout_3.addWidget(self.max_threads_label, 9, 0, 1, 1)
+        self.max_threads_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.max_threads_spinBox.setMaximum(100000)
+        self.max_threads_spinBox.setObjectName("max_threads_spinBox")
+        self.gridLayout_3.addWidget(self.max_threads_spinBox, 9, 1, 1, 1)
+        self.metrics_port_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.metrics_port_label.setObjectName("metrics_port_label")
+        self.gridLayout_3.addWidget(self.metrics_port_label, 10, 0, 1, 1)
+        self.metrics_port_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.metrics_port_spinBox.setMaximum(65535)
+        self.metrics_port_spinBox.setObjectName("metrics_port_spinBox")
+        self.gridLayout_3.addWidget(self.metrics_port_spinBox, 10, 1, 1, 1)
+        self.processes_label = QtWidgets.QLabel(self.settings_groupBox)
+        self.processes_label.setObjectName("processes_label")
+        self.gridLayout_3.addWidget(self.processes_label, 11, 0, 1, 1)
+        self.processes_spinBox = QtWidgets.QSpinBox(self.settings_groupBox)
+        self.processes_spinBox.setMaximum(64)
+        self.processes_spinBox.setObjectName("processes_spinBox")
+        self.gridLayout_3.addWidget(self.processes_spinBox, 11, 1, 1, 1)
         self.gridLayout_4.addLayout(self.gridLayout_3, 1, 0, 1, 1)
         self.foreign_keys_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
         self.foreign_keys_checkBox.setObjectName("foreign_keys_checkBox")
@@ -88,8 +174,30 @@ class Ui_dialog(object):
         self.full_text_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
         self.full_text_checkBox.setObjectName("full_text_checkBox")
         self.gridLayout_4.addWidget(self.full_text_checkBox, 2, 0, 1, 1)
+        self.fast_load_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.fast_load_checkBox.setObjectName("fast_load_checkBox")
+        self.gridLayout_4.addWidget(self.fast_load_checkBox, 9, 0, 1, 1)
+        self.incremental_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.incremental_checkBox.setObjectName("incremental_checkBox")
+        self.gridLayout_4.addWidget(self.incremental_checkBox, 10, 0, 1, 1)
+        self.resume_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.resume_checkBox.setChecked(True)
+        self.resume_checkBox.setObjectName("resume_checkBox")
+        self.gridLayout_4.addWidget(self.resume_checkBox, 11, 0, 1, 1)
+        self.verify_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.verify_checkBox.setObjectName("verify_checkBox")
+        self.gridLayout_4.addWidget(self.verify_checkBox, 12, 0, 1, 1)
+        self.profile_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.profile_checkBox.setObjectName("profile_checkBox")
+        self.gridLayout_4.addWidget(self.profile_checkBox, 13, 0, 1, 1)
+        self.cprofile_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.cprofile_checkBox.setObjectName("cprofile_checkBox")
+        self.gridLayout_4.addWidget(self.cprofile_checkBox, 14, 0, 1, 1)
+        self.snapshot_checkBox = QtWidgets.QCheckBox(self.settings_groupBox)
+        self.snapshot_checkBox.setObjectName("snapshot_checkBox")
+        self.gridLayout_4.addWidget(self.snapshot_checkBox, 15, 0, 1, 1)
         spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.gridLayout_4.addItem(spacerItem, 8, 0, 1, 1)
+        self.gridLayout_4.addItem(spacerItem, 16, 0, 1, 1)
         self.gridLayout_2 = QtWidgets.QGridLayout()
         self.gridLayout_2.setObjectName("gridLayout_2")
         self.log_label = QtWidgets.QLabel(self.settings_groupBox)
@@ -110,46 +218,125 @@ class Ui_dialog(object):
         self.buffered_checkBox.setObjectName("buffered_checkBox")
         self.gridLayout_4.addWidget(self.buffered_checkBox, 3, 0, 1, 1)
         self.gridLayout_6.addWidget(self.settings_groupBox, 0, 1, 1, 1)
+        self.progress_groupBox = QtWidgets.QGroupBox(dialog)
+        self.progress_groupBox.setObjectName("progress_groupBox")
+        self.gridLayout_7 = QtWidgets.QGridLayout(self.progress_groupBox)
+        self.gridLayout_7.setObjectName("gridLayout_7")
+        self.transfer_progressBar = QtWidgets.QProgressBar(self.progress_groupBox)
+        self.transfer_progressBar.setProperty("value", 0)
+        self.transfer_progressBar.setObjectName("transfer_progressBar")
+        self.gridLayout_7.addWidget(self.transfer_progressBar, 0, 0, 1, 1)
+        self.progress_tableWidget = QtWidgets.QTableWidget(self.progress_groupBox)
+        self.progress_tableWidget.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.progress_tableWidget.setAlternatingRowColors(True)
+        self.progress_tableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.progress_tableWidget.setObjectName("progress_tableWidget")
+        self.progress_tableWidget.setColumnCount(7)
+        self.progress_tableWidget.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.progress_tableWidget.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.progress_tableWidget.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.progress_tableWidget.setHorizontalHeaderItem(2, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.progress_tableWidget.setHorizontalHeaderItem(3, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.progress_tableWidget.setHorizontalHeaderItem(4, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.progress_tableWidget.setHorizontalHeaderItem(5, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.progress_tableWidget.setHorizontalHeaderItem(6, item)
+        self.progress_tableWidget.horizontalHeader().setHighlightSections(False)
+        self.progress_tableWidget.horizontalHeader().setStretchLastSection(True)
+        self.progress_tableWidget.verticalHeader().setVisible(False)
+        self.progress_tableWidget.verticalHeader().setDefaultSectionSize(21)
+        self.gridLayout_7.addWidget(self.progress_tableWidget, 1, 0, 1, 1)
+        self.gridLayout_6.addWidget(self.progress_groupBox, 1, 0, 1, 2)
         self.gridLayout_5 = QtWidgets.QGridLayout()
         self.gridLayout_5.setObjectName("gridLayout_5")
         self.close_pushButton = QtWidgets.QPushButton(dialog)
         self.close_pushButton.setObjectName("close_pushButton")
-        self.gridLayout_5.addWidget(self.close_pushButton, 0, 3, 1, 1)
+        self.gridLayout_5.addWidget(self.close_pushButton, 0, 5, 1, 1)
         self.about_pushButton = QtWidgets.QPushButton(dialog)
         self.about_pushButton.setObjectName("about_pushButton")
-        self.gridLayout_5.addWidget(self.about_pushButton, 0, 2, 1, 1)
+        self.gridLayout_5.addWidget(self.about_pushButton, 0, 4, 1, 1)
         self.transfer_pushButton = QtWidgets.QPushButton(dialog)
         self.transfer_pushButton.setObjectName("transfer_pushButton")
         self.gridLayout_5.addWidget(self.transfer_pushButton, 0, 0, 1, 1)
+        self.pause_pushButton = QtWidgets.QPushButton(dialog)
+        self.pause_pushButton.setEnabled(False)
+        self.pause_pushButton.setCheckable(True)
+        self.pause_pushButton.setObjectName("pause_pushButton")
+        self.gridLayout_5.addWidget(self.pause_pushButton, 0, 1, 1, 1)
+        self.cancel_pushButton = QtWidgets.QPushButton(dialog)
+        self.cancel_pushButton.setEnabled(False)
+        self.cancel_pushButton.setObjectName("cancel_pushButton")
+        self.gridLayout_5.addWidget(self.cancel_pushButton, 0, 2, 1, 1)
         spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-        self.gridLayout_5.addItem(spacerItem1, 0, 1, 1, 1)
-        self.gridLayout_6.addLayout(self.gridLayout_5, 1, 0, 1, 2)
+        self.gridLayout_5.addItem(spacerItem1, 0, 3, 1, 1)
+        self.gridLayout_6.addLayout(self.gridLayout_5, 2, 0, 1, 2)
 
         self.retranslateUi(dialog)
         QtCore.QMetaObject.connectSlotsByName(dialog)
-        dialog.setTabOrder(self.select_all_checkBox, self.tables_listWidget)
-        dialog.setTabOrder(self.tables_listWidget, self.preview_pushButton)
-        dialog.setTabOrder(self.preview_pushButton, self.log_lineEdit)
+        dialog.setTabOrder(self.select_all_checkBox, self.tables_treeWidget)
+        dialog.setTabOrder(self.tables_treeWidget, self.preview_pushButton)
+        dialog.setTabOrder(self.preview_pushButton, self.options_pushButton)
+        dialog.setTabOrder(self.options_pushButton, self.refresh_pushButton)
+        dialog.setTabOrder(self.refresh_pushButton, self.log_lineEdit)
         dialog.setTabOrder(self.log_lineEdit, self.log_toolButton)
         dialog.setTabOrder(self.log_toolButton, self.integer_type_comboBox)
         dialog.setTabOrder(self.integer_type_comboBox, self.string_type_comboBox)
         dialog.setTabOrder(self.string_type_comboBox, self.chunk_spinBox)
-        dialog.setTabOrder(self.chunk_spinBox, self.full_text_checkBox)
+        dialog.setTabOrder(self.chunk_spinBox, self.workers_spinBox)
+        dialog.setTabOrder(self.workers_spinBox, self.ranges_spinBox)
+        dialog.setTabOrder(self.ranges_spinBox, self.queue_spinBox)
+        dialog.setTabOrder(self.queue_spinBox, self.rows_rate_spinBox)
+        dialog.setTabOrder(self.rows_rate_spinBox, self.bytes_rate_spinBox)
+        dialog.setTabOrder(self.bytes_rate_spinBox, self.max_lag_spinBox)
+        dialog.setTabOrder(self.max_lag_spinBox, self.max_threads_spinBox)
+        dialog.setTabOrder(self.max_threads_spinBox, self.metrics_port_spinBox)
+        dialog.setTabOrder(self.metrics_port_spinBox, self.processes_spinBox)
+        dialog.setTabOrder(self.processes_spinBox, self.full_text_checkBox)
         dialog.setTabOrder(self.full_text_checkBox, self.buffered_checkBox)
         dialog.setTabOrder(self.buffered_checkBox, self.foreign_keys_checkBox)
         dialog.setTabOrder(self.foreign_keys_checkBox, self.rowid_checkBox)
-        dialog.setTabOrder(self.rowid_checkBox, self.vacuum_checkBox)
-        dialog.setTabOrder(self.vacuum_checkBox, self.transfer_pushButton)
-        dialog.setTabOrder(self.transfer_pushButton, self.about_pushButton)
+        dialog.setTabOrder(self.rowid_checkBox, self.bulk_checkBox)
+        dialog.setTabOrder(self.bulk_checkBox, self.defer_keys_checkBox)
+        dialog.setTabOrder(self.defer_keys_checkBox, self.vacuum_checkBox)
+        dialog.setTabOrder(self.vacuum_checkBox, self.fast_load_checkBox)
+        dialog.setTabOrder(self.fast_load_checkBox, self.incremental_checkBox)
+        dialog.setTabOrder(self.incremental_checkBox, self.resume_checkBox)
+        dialog.setTabOrder(self.resume_checkBox, self.verify_checkBox)
+        dialog.setTabOrder(self.verify_checkBox, self.profile_checkBox)
+        dialog.setTabOrder(self.profile_checkBox, self.cprofile_checkBox)
+        dialog.setTabOrder(self.cprofile_checkBox, self.snapshot_checkBox)
+        dialog.setTabOrder(self.snapshot_checkBox, self.transfer_pushButton)
+        dialog.setTabOrder(self.transfer_pushButton, self.pause_pushButton)
+        dialog.setTabOrder(self.pause_pushButton, self.cancel_pushButton)
+        dialog.setTabOrder(self.cancel_pushButton, self.about_pushButton)
         dialog.setTabOrder(self.about_pushButton, self.close_pushButton)
 
     def retranslateUi(self, dialog):
         _translate = QtCore.QCoreApplication.translate
         dialog.setWindowTitle(_translate("dialog", "Berudele"))
         self.tables_groupBox.setTitle(_translate("dialog", "SQLite Tables:"))
+        self.tables_treeWidget.setSortingEnabled(True)
+        self.tables_treeWidget.headerItem().setText(0, _translate("dialog", "Table"))
+        self.tables_treeWidget.headerItem().setText(1, _translate("dialog", "Rows"))
+        self.tables_treeWidget.headerItem().setText(2, _translate("dialog", "Size"))
+        self.tables_treeWidget.headerItem().setText(3, _translate("dialog", "Options"))
         self.preview_pushButton.setText(_translate("dialog", "Preview"))
+        self.options_pushButton.setToolTip(_translate("dialog", "Sets the row filter and the columns of the current table."))
+        self.options_pushButton.setText(_translate("dialog", "Options..."))
+        self.refresh_pushButton.setToolTip(_translate("dialog", "Loads the schema of the database again."))
+        self.refresh_pushButton.setText(_translate("dialog", "Refresh"))
         self.select_all_checkBox.setText(_translate("dialog", "Select all"))
         self.settings_groupBox.setTitle(_translate("dialog", "Settings:"))
+        self.bulk_checkBox.setToolTip(_translate("dialog", "Loads the chunks with LOAD DATA LOCAL INFILE, the chunks with BLOBs are inserted. The server must allow local_infile."))
+        self.bulk_checkBox.setText(_translate("dialog", "Bulk load with LOAD DATA LOCAL INFILE"))
+        self.defer_keys_checkBox.setToolTip(_translate("dialog", "Loads the tables with only their primary keys and without the unique and foreign key checks, then creates the indexes and foreign keys with one ALTER TABLE per table."))
+        self.defer_keys_checkBox.setText(_translate("dialog", "Create the indexes and foreign keys after the rows"))
         self.vacuum_checkBox.setText(_translate("dialog", "Vacuum"))
         self.integer_type_label.setText(_translate("dialog", "MySQL default integer field type:"))
         self.integer_type_comboBox.setItemText(0, _translate("dialog", "Default"))
@@ -173,14 +360,75 @@ class Ui_dialog(object):
         self.string_type_comboBox.setItemText(12, _translate("dialog", "LONGBLOB"))
         self.string_type_label.setText(_translate("dialog", "MySQL default string field type:"))
         self.chunk_label.setText(_translate("dialog", "Chunk reading/writing SQL records:"))
+        self.chunk_spinBox.setToolTip(_translate("dialog", "Auto starts with a probe chunk and adjusts it per table to the measured throughput and row width."))
+        self.chunk_spinBox.setSpecialValueText(_translate("dialog", "Auto"))
+        self.workers_label.setText(_translate("dialog", "Parallel workers:"))
+        self.ranges_label.setToolTip(_translate("dialog", "The highlighted tables are split into ranges of their integer key which are copied concurrently."))
+        self.ranges_label.setText(_translate("dialog", "Key ranges of the highlighted tables:"))
+        self.queue_label.setToolTip(_translate("dialog", "The chunks which are read ahead while the previous chunk is being written, they bound the memory of each worker."))
+        self.queue_label.setText(_translate("dialog", "Chunks read ahead:"))
+        self.queue_spinBox.setToolTip(_translate("dialog", "Off reads and writes each chunk in turn."))
+        self.queue_spinBox.setSpecialValueText(_translate("dialog", "Off"))
+        self.rows_rate_label.setToolTip(_translate("dialog", "The rows per second of all the workers together, the workers sleep between the chunks."))
+        self.rows_rate_label.setText(_translate("dialog", "Maximum rows per second:"))
+        self.rows_rate_spinBox.setSpecialValueText(_translate("dialog", "Unlimited"))
+        self.bytes_rate_label.setToolTip(_translate("dialog", "The megabytes per second of all the workers together, the workers sleep between the chunks."))
+        self.bytes_rate_label.setText(_translate("dialog", "Maximum MB per second:"))
+        self.bytes_rate_spinBox.setSpecialValueText(_translate("dialog", "Unlimited"))
+        self.max_lag_label.setToolTip(_translate("dialog", "The workers are held while the MySQL server is a replica which lags behind by more seconds, or which is not replicating."))
+        self.max_lag_label.setText(_translate("dialog", "Hold above replication lag (s):"))
+        self.max_lag_spinBox.setSpecialValueText(_translate("dialog", "Off"))
+        self.max_threads_label.setToolTip(_translate("dialog", "The workers are held while the MySQL server runs more threads (Threads_running)."))
+        self.max_threads_label.setText(_translate("dialog", "Hold above running threads:"))
+        self.max_threads_spinBox.setSpecialValueText(_translate("dialog", "Off"))
+        self.metrics_port_label.setToolTip(_translate("dialog", "Serves the progress of the transfer as Prometheus metrics on http://127.0.0.1:port/metrics while it runs."))
+        self.metrics_port_label.setText(_translate("dialog", "Metrics port:"))
+        self.metrics_port_spinBox.setSpecialValueText(_translate("dialog", "Off"))
+        self.processes_label.setToolTip(_translate("dialog", "The chunks are encoded and decoded in worker processes, which pays off with fast databases and free cores, as long as the conversion takes longer than passing the chunks to the processes."))
+        self.processes_label.setText(_translate("dialog", "Conversion processes:"))
+        self.processes_spinBox.setToolTip(_translate("dialog", "Off converts the chunks in the workers."))
+        self.processes_spinBox.setSpecialValueText(_translate("dialog", "Off"))
         self.foreign_keys_checkBox.setText(_translate("dialog", "Do not transfer foreign keys"))
         self.full_text_checkBox.setText(_translate("dialog", " Use FULLTEXT indexes on TEXT columns"))
+        self.fast_load_checkBox.setToolTip(_translate("dialog", "Writes SQLite without fsyncs and with a large cache, and creates the indexes after the rows. The file may be corrupted if the transfer crashes."))
+        self.fast_load_checkBox.setText(_translate("dialog", "Fast load"))
+        self.incremental_checkBox.setToolTip(_translate("dialog", "Copies only the rows beyond the last watermark of the eligible tables and upserts them."))
+        self.incremental_checkBox.setText(_translate("dialog", "Incremental transfer"))
+        self.resume_checkBox.setToolTip(_translate("dialog", "Skips the chunks which have been committed by the last interrupted transfer."))
+        self.resume_checkBox.setText(_translate("dialog", "Resume the interrupted transfer"))
+        self.verify_checkBox.setToolTip(_translate("dialog", "Compares the checksums of the key ranges of every copied table in both databases, only the mismatching ranges are compared row by row."))
+        self.verify_checkBox.setText(_translate("dialog", "Verify the tables after the transfer"))
+        self.profile_checkBox.setToolTip(_translate("dialog", "Times the reads, the conversions, the writes, the commits and the indexes of every table, and writes a Chrome trace and a summary next to the log file."))
+        self.profile_checkBox.setText(_translate("dialog", "Profile the stages of the transfer"))
+        self.cprofile_checkBox.setToolTip(_translate("dialog", "Runs cProfile in the workers as well, which slows the transfer down, and writes its statistics next to the log file."))
+        self.cprofile_checkBox.setText(_translate("dialog", "Profile the functions with cProfile"))
+        self.snapshot_checkBox.setToolTip(_translate("dialog", "All the workers read MySQL at the same point in time, which is taken under a brief global read lock and recorded with the binary log position in the _berudele_metadata table of the SQLite file."))
+        self.snapshot_checkBox.setText(_translate("dialog", "Read MySQL in one consistent snapshot"))
         self.log_label.setText(_translate("dialog", "Log:"))
         self.log_toolButton.setText(_translate("dialog", "..."))
         self.rowid_checkBox.setText(_translate("dialog", "Transfer rowid columns"))
         self.buffered_checkBox.setText(_translate("dialog", "Use MySQLCursorBuffered for reading the MySQL database"))
+        self.progress_groupBox.setTitle(_translate("dialog", "Progress:"))
+        item = self.progress_tableWidget.horizontalHeaderItem(0)
+        item.setText(_translate("dialog", "Table"))
+        item = self.progress_tableWidget.horizontalHeaderItem(1)
+        item.setText(_translate("dialog", "Rows read"))
+        item = self.progress_tableWidget.horizontalHeaderItem(2)
+        item.setText(_translate("dialog", "Rows written"))
+        item = self.progress_tableWidget.horizontalHeaderItem(3)
+        item.setText(_translate("dialog", "MB"))
+        item = self.progress_tableWidget.horizontalHeaderItem(4)
+        item.setText(_translate("dialog", "Elapsed"))
+        item = self.progress_tableWidget.horizontalHeaderItem(5)
+        item.setText(_translate("dialog", "Rows/s"))
+        item = self.progress_tableWidget.horizontalHeaderItem(6)
+        item.setText(_translate("dialog", "Remaining"))
         self.close_pushButton.setText(_translate("dialog", "Close"))
         self.about_pushButton.setText(_translate("dialog", "About..."))
         self.transfer_pushButton.setText(_translate("dialog", "Transfer"))
+        self.pause_pushButton.setToolTip(_translate("dialog", "Holds the workers after their current chunks."))
+        self.pause_pushButton.setText(_translate("dialog", "Pause"))
+        self.cancel_pushButton.setToolTip(_translate("dialog", "Stops the workers after their current chunks, the transfer can be resumed later."))
+        self.cancel_pushButton.setText(_translate("dialog", "Cancel"))
 
 
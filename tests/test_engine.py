@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from res.logic import engine
+from res.logic import schema
+
+
+def transfer_info(sqlite_database, **options):
+    """Returns the options of a transfer from a SQLite database."""
+    info = {
+        'mode': 'sqlite_to_mysql',
+        'sqlite_database': sqlite_database,
+        'username': 'test',
+        'host': 'localhost',
+        'port': 3306,
+        'database': 'test',
+        'chunk': 0,
+        'rowid': False,
+        'queue': engine.QUEUE_DEPTH
+        }
+    info.update(options)
+    return info
+
+
+class MySQLCursor:
+    """A cursor of MySQLConnection, which translates the statements
+    of the copies into SQLite and drops the rows which violate a key
+    or a foreign key on `INSERT IGNORE`, like MySQL does.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def translate(self, sql):
+        return sql.replace('`', '"').replace('%s', '?')
+
+    def execute(self, sql, params=()):
+        if sql == 'SET SESSION foreign_key_checks = 0;':
+            self.conn.execute('PRAGMA foreign_keys = OFF;')
+        elif not sql.startswith('SET '):
+            self.conn.execute(self.translate(sql), params)
+
+    def executemany(self, sql, rows):
+        ignore = sql.startswith('INSERT IGNORE ')
+        sql = self.translate(sql.replace('INSERT IGNORE ', 'INSERT '))
+        for row in rows:
+            try:
+                self.conn.execute(sql, row)
+            except sqlite3.IntegrityError:
+                if not ignore:
+                    raise
+
+
+class MySQLConnection:
+    """A MySQL connection for copy_table, which is backed by a SQLite
+    database that checks the foreign keys.
+    """
+
+    def __init__(self, database):
+        self.conn = sqlite3.connect(database, check_same_thread=False)
+        self.conn.execute('PRAGMA foreign_keys = ON;')
+
+    def cursor(self, **kwargs):
+        return MySQLCursor(self.conn)
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class EngineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, 'source.db')
+        self.target = os.path.join(self.directory, 'target.db')
+        self.info = transfer_info(self.source)
+
+    def tearDown(self):
+        schema.cache.clear()
+        shutil.rmtree(self.directory)
+
+    def create(self, database, script):
+        conn = sqlite3.connect(database)
+        with conn:
+            conn.executescript(script)
+        conn.close()
+
+    @contextlib.contextmanager
+    def mysql_connection(self, info, local_infile=False):
+        conn = MySQLConnection(self.target)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+class KeyRangesTest(EngineTestCase):
+
+    def test_split_by_rowid(self):
+        self.create(self.source, 'CREATE TABLE t (name TEXT);' + ''.join(
+            map(lambda number: "INSERT INTO t VALUES ('{}');".format(number),
+                range(100))))
+        self.assertEqual(engine.key_ranges(self.info, 't', 4), [
+            ('rowid', None, 26),
+            ('rowid', 26, 51),
+            ('rowid', 51, 76),
+            ('rowid', 76, None)
+            ])
+
+    def test_split_by_integer_primary_key(self):
+        self.create(self.source, 'CREATE TABLE t (id INT PRIMARY KEY) '
+                    'WITHOUT ROWID; INSERT INTO t VALUES (10), (11), (40);')
+        self.assertEqual(engine.key_ranges(self.info, 't', 2), [
+            ('id', None, 26),
+            ('id', 26, None)
+            ])
+
+    def test_more_ranges_than_keys(self):
+        self.create(self.source, 'CREATE TABLE t (name TEXT);'
+                    "INSERT INTO t VALUES ('a'), ('b');")
+        self.assertEqual(engine.key_ranges(self.info, 't', 4), [
+            ('rowid', None, 2),
+            ('rowid', 2, None)
+            ])
+
+    def test_unsplittable_tables(self):
+        self.create(self.source, 'CREATE TABLE empty (name TEXT);'
+                    'CREATE TABLE t (name TEXT PRIMARY KEY) WITHOUT ROWID;'
+                    "INSERT INTO t VALUES ('a'), ('b');")
+        self.assertEqual(engine.key_ranges(self.info, 'empty', 4), [None])
+        self.assertEqual(engine.key_ranges(self.info, 't', 4), [None])
+
+
+class WhereClauseTest(unittest.TestCase):
+
+    def test_no_conditions(self):
+        info = transfer_info('source.db')
+        self.assertEqual(engine.where_clause(info), ('', ()))
+
+    def test_sqlite_conditions(self):
+        info = transfer_info('source.db')
+        self.assertEqual(
+            engine.where_clause(info, ('rowid', 26, 51),
+                                last_key=('rowid', 30), row_filter='x > 1'),
+            (' WHERE (x > 1) AND rowid >= ? AND rowid < ? AND rowid > ?',
+             (26, 51, 30)))
+
+    def test_mysql_conditions(self):
+        info = transfer_info('source.db', mode='mysql_to_sqlite')
+        self.assertEqual(
+            engine.where_clause(info, ('id', None, 100),
+                                ('updated_at', '2024', '2025', True)),
+            (' WHERE `id` < %s AND `updated_at` >= %s AND '
+             '`updated_at` <= %s', (100, '2024', '2025')))
+        self.assertEqual(
+            engine.where_clause(info, watermark=('id', None, 7, False)),
+            (' WHERE `id` <= %s', (7,)))
+
+
+class ChunkSizerTest(unittest.TestCase):
+
+    def test_fixed_chunk(self):
+        chunker = engine.ChunkSizer(500)
+        self.assertFalse(chunker.update(500, 500, 0.001))
+        self.assertEqual(chunker.size, 500)
+
+    def test_doubles_while_faster(self):
+        chunker = engine.ChunkSizer(0)
+        self.assertEqual(chunker.size, engine.PROBE_CHUNK)
+        self.assertFalse(chunker.update(1000, 100000, 0.1))
+        self.assertFalse(chunker.update(2000, 200000, 0.1))
+        self.assertEqual(chunker.size, 4000)
+        # The last doubling didn't pay off.
+        self.assertTrue(chunker.update(4000, 400000, 0.4))
+        self.assertEqual(chunker.size, 2000)
+        self.assertFalse(chunker.update(2000, 200000, 0.001))
+        self.assertEqual(chunker.size, 2000)
+
+    def test_smaller_chunk_is_ignored(self):
+        chunker = engine.ChunkSizer(0)
+        self.assertFalse(chunker.update(10, 1000, 0.1))
+        self.assertEqual(chunker.size, engine.PROBE_CHUNK)
+
+    def test_memory_ceiling(self):
+        chunker = engine.ChunkSizer(0, 4)
+        row = 1048576
+        self.assertTrue(chunker.update(1000, 1000 * row, 0.1))
+        self.assertEqual(chunker.size, engine.MIN_CHUNK)
+
+
+class PrefetchTest(unittest.TestCase):
+
+    def test_items_in_order(self):
+        for depth in (0, 1, 2):
+            self.assertEqual(list(engine.prefetch(iter(range(50)), depth)),
+                             list(range(50)))
+
+    def test_reader_error(self):
+
+        def items():
+            yield 1
+            yield 2
+            raise ValueError('read failed')
+
+        read = []
+        with self.assertRaisesRegex(ValueError, 'read failed'):
+            for item in engine.prefetch(items(), 2):
+                read.append(item)
+        self.assertEqual(read, [1, 2])
+
+    def test_close_stops_reader(self):
+
+        def items():
+            number = 0
+            while True:
+                number += 1
+                yield number
+
+        queued = []
+        chunks = engine.prefetch(items(), 2, queued.append)
+        with contextlib.closing(chunks):
+            self.assertEqual(next(chunks), 1)
+            self.assertEqual(next(chunks), 2)
+        self.assertEqual(len(queued), 2)
+        self.assertTrue(all(map(lambda count: 0 <= count <= 2, queued)))
+
+
+class EncodeTSVTest(unittest.TestCase):
+
+    def test_escapes(self):
+        self.assertEqual(
+            engine.encode_tsv([(1, None, 'a\tb\nc\\d', 1.5), (2, '', '', 0)]),
+            '1\t\\N\ta\\tb\\nc\\\\d\t1.5\n2\t\t\t0\n')
+
+    def test_values_which_cant_be_encoded(self):
+        self.assertIsNone(engine.encode_tsv([(1, b'\x00')]))
+        self.assertIsNone(engine.encode_tsv([(1, float('nan'))]))
+
+
+class CopyTableTest(EngineTestCase):
+
+    def test_child_before_parent(self):
+        # The tables are copied largest-first, the rows of a child
+        # table may be inserted before the rows of their parents.
+        tables = 'CREATE TABLE parent (id INTEGER PRIMARY KEY);'
+        tables += 'CREATE TABLE child (id INTEGER PRIMARY KEY, '
+        tables += 'parent_id INTEGER REFERENCES parent (id));'
+        self.create(self.target, tables)
+        self.create(self.source, tables + ''.join(map(
+            lambda number: 'INSERT INTO parent VALUES ({0});'
+            'INSERT INTO child VALUES ({0}, {0});'.format(number),
+            range(1, 21))))
+        with mock.patch.object(engine, 'mysql_connection',
+                               self.mysql_connection):
+            self.assertEqual(engine.copy_table(self.info, 'child'), 20)
+            self.assertEqual(engine.copy_table(self.info, 'parent'), 20)
+        conn = sqlite3.connect(self.target)
+        self.assertEqual(conn.execute(
+            'SELECT COUNT(*) FROM child;').fetchone()[0], 20)
+        self.assertEqual(conn.execute(
+            'PRAGMA foreign_key_check;').fetchall(), [])
+        conn.close()
+
+    def test_filtered_range(self):
+        self.create(self.target, 'CREATE TABLE t (id INTEGER PRIMARY KEY, '
+                    'name TEXT);')
+        self.create(self.source, 'CREATE TABLE t (id INTEGER PRIMARY KEY, '
+                    'name TEXT);' + ''.join(map(
+                        lambda number: "INSERT INTO t VALUES ({0}, '{0}');"
+                        .format(number), range(1, 101))))
+        info = dict(self.info, filters={'t': 'id % 2 = 0'})
+        with mock.patch.object(engine, 'mysql_connection',
+                               self.mysql_connection):
+            copied = engine.copy_table(info, 't', ('rowid', 11, 21))
+        self.assertEqual(copied, 5)
+        conn = sqlite3.connect(self.target)
+        self.assertEqual(conn.execute(
+            'SELECT id FROM t ORDER BY id;').fetchall(),
+            [(12,), (14,), (16,), (18,), (20,)])
+        conn.close()
+
+
+class PageSQLTest(unittest.TestCase):
+
+    def setUp(self):
+        # The preview imports PyQt5, which the engine doesn't need.
+        try:
+            from res.logic import preview
+        except ImportError as error:
+            self.skipTest(str(error))
+        self.preview = preview
+
+    def test_first_page(self):
+        sql, params = self.preview.page_sql('sqlite_to_mysql', 't',
+                                            ['rowid'], None, 0)
+        self.assertEqual(sql, 'SELECT rowid, "t".* FROM "t" ORDER BY rowid '
+                         'LIMIT {};'.format(self.preview.PAGE_SIZE))
+        self.assertEqual(params, ())
+
+    def test_next_page_by_keys(self):
+        sql, params = self.preview.page_sql('mysql_to_sqlite', 't',
+                                            ['a', 'b'], (1, 'x'), 256)
+        self.assertEqual(sql, 'SELECT `a`, `b`, `t`.* FROM `t` WHERE '
+                         '(`a`, `b`) > (%s, %s) ORDER BY `a`, `b` '
+                         'LIMIT {};'.format(self.preview.PAGE_SIZE))
+        self.assertEqual(params, (1, 'x'))
+
+    def test_pages_of_sqlite_table(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE t (a INTEGER, b TEXT, '
+                     'PRIMARY KEY (a, b)) WITHOUT ROWID;')
+        conn.executemany('INSERT INTO t VALUES (?, ?);', map(
+            lambda number: (number // 3, str(number)), range(600)))
+        rows = []
+        last_key = None
+        while True:
+            sql, params = self.preview.page_sql('sqlite_to_mysql', 't',
+                                                ['a', 'b'], last_key,
+                                                len(rows))
+            page = conn.execute(sql, params).fetchall()
+            rows.extend(map(lambda row: row[2:], page))
+            if len(page) < self.preview.PAGE_SIZE:
+                break
+            last_key = page[-1][:2]
+        conn.close()
+        self.assertEqual(len(rows), 600)
+        self.assertEqual(len(set(rows)), 600)
+
+    def test_table_without_keys(self):
+        sql, params = self.preview.page_sql('mysql_to_sqlite', 't', [],
+                                            None, 512)
+        self.assertEqual(sql, 'SELECT * FROM `t` LIMIT {} OFFSET 512;'.format(
+            self.preview.PAGE_SIZE))
+        self.assertEqual(params, ())
+
+
+if __name__ == '__main__':
+    unittest.main()
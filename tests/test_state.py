@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+from unittest import mock
+from res.logic import engine
+from res.logic import state
+from tests import test_engine
+
+
+class JournalTest(test_engine.EngineTestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = os.path.join(self.directory, 'journals')
+        patcher = mock.patch.object(state, 'JOURNAL_DIRECTORY', directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_later_entries_replace_earlier_ones(self):
+        state.save_checkpoint(self.info, 'a', 'a chunk=auto', {'rows': 0})
+        state.save_checkpoint(self.info, 'b', 'b chunk=auto', {'rows': 0})
+        state.save_checkpoint(self.info, 'a', 'a chunk=auto',
+                              {'last': 10, 'rows': 10})
+        self.assertEqual(state.load_journal(self.info), {
+            'a chunk=auto': {'last': 10, 'rows': 10},
+            'b chunk=auto': {'rows': 0}
+            })
+        # The journal is compacted to the last entries.
+        with open(state.journal_file(self.info), encoding='utf-8') as journal:
+            self.assertEqual(len(journal.readlines()), 2)
+
+    def test_line_cut_off_by_crash(self):
+        state.save_checkpoint(self.info, 'a', 'a chunk=auto',
+                              {'last': 10, 'rows': 10})
+        with open(state.journal_file(self.info), 'a',
+                  encoding='utf-8') as journal:
+            journal.write('["a", "a chunk=auto", {"last": 2')
+        self.assertEqual(state.load_journal(self.info), {
+            'a chunk=auto': {'last': 10, 'rows': 10}
+            })
+
+    def test_journals_of_other_databases(self):
+        other = dict(self.info, database='other')
+        state.save_checkpoint(self.info, 'a', 'a chunk=auto', {'rows': 0})
+        self.assertNotEqual(state.journal_file(self.info),
+                            state.journal_file(other))
+        self.assertEqual(state.load_journal(other), {})
+
+    def test_clear_tables(self):
+        state.save_checkpoint(self.info, 'a', 'a chunk=auto', {'rows': 0})
+        state.save_checkpoint(self.info, 'b', 'b chunk=auto', {'rows': 0})
+        state.clear_journal(self.info, ['a'])
+        self.assertEqual(state.load_journal(self.info),
+                         {'b chunk=auto': {'rows': 0}})
+        state.clear_journal(self.info, ['b'])
+        self.assertFalse(os.path.exists(state.journal_file(self.info)))
+        self.assertEqual(state.load_journal(self.info), {})
+
+    def test_resume_interrupted_copy(self):
+        table = 'CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT);'
+        self.create(self.target, table)
+        self.create(self.source, table + ''.join(map(
+            lambda number: "INSERT INTO t VALUES ({0}, '{0}');".format(
+                number), range(1, 101))))
+        info = dict(self.info, chunk=10, queue=0)
+        executemany = test_engine.MySQLCursor.executemany
+        chunks = []
+        interrupted = []
+
+        def write(cursor, sql, rows):
+            rows = list(rows)
+            chunks.append(rows)
+            if len(chunks) == 3 and not interrupted:
+                interrupted.append(rows)
+                raise RuntimeError('The connection is lost.')
+            executemany(cursor, sql, rows)
+
+        with mock.patch.object(engine, 'mysql_connection',
+                               self.mysql_connection), \
+                mock.patch.object(test_engine.MySQLCursor, 'executemany',
+                                  write):
+            with self.assertRaises(RuntimeError):
+                engine.copy_table(info, 't', journal={})
+            journal = state.load_journal(info)
+            checkpoint = engine.checkpoint_name(info, 't')
+            self.assertEqual(journal, {checkpoint: {'last': 20, 'rows': 20}})
+            del chunks[:]
+            self.assertEqual(engine.copy_table(info, 't', journal=journal),
+                             100)
+        # The copy resumes after the last committed chunk.
+        self.assertEqual(chunks[0][0][0], 21)
+        self.assertEqual(len(chunks), 8)
+        journal = state.load_journal(info)
+        self.assertEqual(journal, {checkpoint: {'done': True, 'rows': 100}})
+        self.assertEqual(engine.copy_table(info, 't', journal=journal), 0)
+        conn = sqlite3.connect(self.target)
+        self.assertEqual(conn.execute(
+            'SELECT COUNT(*), SUM(id) FROM t;').fetchone(), (100, 5050))
+        conn.close()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import unittest
+from res.logic import verify
+
+COLUMNS = [('id', 'int'), ('price', 'decimal(10,2)'), ('ratio', 'double'),
+           ('name', 'varchar(20)'), ('data', 'blob')]
+
+
+def empty_result():
+    return {
+        'table': 't',
+        'ranges': 1,
+        'mismatched': 1,
+        'missing': 0,
+        'extra': 0,
+        'different': 0,
+        'keys': {'missing': [], 'extra': [], 'different': []}
+        }
+
+
+class CompareRowsTest(unittest.TestCase):
+
+    def test_differences(self):
+        result = empty_result()
+        verify.compare_rows(result, {1: 10, 2: 20, 3: 30, 4: 40},
+                            {2: 20, 3: 31, 4: 41, 5: 50})
+        self.assertEqual(result['missing'], 1)
+        self.assertEqual(result['extra'], 1)
+        self.assertEqual(result['different'], 2)
+        self.assertEqual(result['keys'], {
+            'missing': [1],
+            'extra': [5],
+            'different': [3, 4]
+            })
+        self.assertEqual(
+            verify.describe(result),
+            'The verification found 1 missing rows (1), 1 extra rows (5), '
+            '2 different rows (3, 4) in 1 of 1 ranges.')
+
+    def test_sample_of_keys(self):
+        result = empty_result()
+        expected = dict(map(lambda key: (key, key), range(15)))
+        verify.compare_rows(result, expected, {})
+        verify.compare_rows(result, {100: 1}, {})
+        self.assertEqual(result['missing'], 16)
+        self.assertEqual(result['keys']['missing'],
+                         list(range(verify.VERIFY_SAMPLE)))
+        self.assertTrue(verify.describe(result).startswith(
+            'The verification found 16 missing rows (0, 1, 2, 3, 4, 5, 6, '
+            '7, 8, 9, ...)'))
+
+    def test_matching_tables(self):
+        result = empty_result()
+        result['mismatched'] = 0
+        verify.compare_rows(result, {1: 10}, {1: 10})
+        self.assertEqual(verify.describe(result), '')
+        result['mismatched'] = 1
+        self.assertEqual(verify.describe(result),
+                         'The checksums of the table differ.')
+
+
+class SideTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sides = []
+        for number in range(2):
+            conn = sqlite3.connect(':memory:')
+            conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, '
+                         'price DECIMAL(10,2), ratio DOUBLE, '
+                         'name VARCHAR(20), data BLOB);')
+            conn.executemany('INSERT INTO t VALUES (?, ?, ?, ?, ?);', map(
+                lambda key: (key, key / 4, key / 3, str(key),
+                             bytes([key % 256])), range(1, 301)))
+            self.addCleanup(conn.close)
+            self.sides.append(verify.Side(conn, False, 't', 'id', COLUMNS))
+
+    def test_same_rows(self):
+        source, target = self.sides
+        self.assertEqual(source.bounds(), (1, 300))
+        self.assertEqual(source.aggregates(), target.aggregates())
+        self.assertEqual(source.aggregates(1, 300, 100),
+                         target.aggregates(1, 300, 100))
+        self.assertEqual(sorted(source.aggregates(1, 300, 100)), [0, 1, 2])
+
+    def test_rounded_reals(self):
+        source, target = self.sides
+        # The databases print the floating-point numbers differently.
+        target.conn.execute('UPDATE t SET ratio = ratio + 1e-9;')
+        self.assertEqual(source.aggregates(), target.aggregates())
+
+    def test_different_rows(self):
+        source, target = self.sides
+        target.conn.execute("UPDATE t SET name = NULL WHERE id = 150;")
+        target.conn.execute("UPDATE t SET data = x'ff' WHERE id = 151;")
+        target.conn.execute('DELETE FROM t WHERE id = 152;')
+        expected = source.aggregates(1, 300, 100)
+        found = target.aggregates(1, 300, 100)
+        self.assertEqual(expected[0], found[0])
+        self.assertNotEqual(expected[1], found[1])
+        self.assertEqual(expected[2], found[2])
+        result = empty_result()
+        verify.compare_rows(result, source.checksums(101, 200),
+                            target.checksums(101, 200))
+        self.assertEqual(result['keys'], {
+            'missing': [152],
+            'extra': [],
+            'different': [150, 151]
+            })
+
+    def test_null_differs_from_empty(self):
+        source, target = self.sides
+        source.conn.execute("UPDATE t SET name = '' WHERE id = 1;")
+        target.conn.execute('UPDATE t SET name = NULL WHERE id = 1;')
+        self.assertNotEqual(source.checksums(1, 1), target.checksums(1, 1))
+
+    def test_row_filter(self):
+        conn = self.sides[0].conn
+        side = verify.Side(conn, False, 't', 'id', COLUMNS, 'id % 2 = 0')
+        self.assertEqual(side.bounds(), (2, 300))
+        self.assertEqual(side.aggregates()[0][0], 150)
+
+
+if __name__ == '__main__':
+    unittest.main()